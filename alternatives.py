@@ -0,0 +1,157 @@
+# alternatives.py
+import heapq
+from typing import List, Sequence, Tuple
+import numpy as np
+
+# Nombre de répartitions proposées par défaut à l'entraîneur
+DEFAULT_TOP_K = 5
+
+# Part minimale des paires de joueurs à séparer ou réunir pour qu'une
+# répartition compte comme une alternative distincte d'une autre
+DEFAULT_MIN_DIVERSITY = 0.05
+
+# Poids des paires réunies dans une même équipe dans la distance entre deux
+# répartitions, celui des paires réunies dans une même sous-équipe valant 1 - ce poids
+TEAM_DISTANCE_WEIGHT = 0.5
+
+
+def canonical_signature(assignment: Sequence[int], num_subteams: int) -> tuple:
+    """
+    Empreinte d'une répartition indépendante de la numérotation des équipes
+    et des sous-équipes : multiensemble des équipes, chacune vue comme le
+    multiensemble de ses sous-équipes (ensembles d'index de joueurs).
+    """
+    slots = {}
+    for player_index, slot in enumerate(assignment):
+        slots.setdefault(int(slot), []).append(player_index)
+    teams = {}
+    for slot, members in slots.items():
+        teams.setdefault(slot // num_subteams, []).append(tuple(members))
+    return tuple(sorted(tuple(sorted(subteams)) for subteams in teams.values()))
+
+
+def _pairs(counts: np.ndarray) -> int:
+    return int((counts * (counts - 1) // 2).sum())
+
+
+def _pair_distance(a: np.ndarray, b: np.ndarray, num_groups: int) -> float:
+    """
+    Part des paires de joueurs réunies dans un même groupe par une seule des
+    deux affectations `a` et `b` (groupes 0..num_groups-1). Calculée en O(n)
+    par la table de contingence des deux affectations.
+    """
+    num_players = len(a)
+    total_pairs = num_players * (num_players - 1) // 2
+    if not total_pairs:
+        return 0.0
+    together_a = _pairs(np.bincount(a, minlength=num_groups))
+    together_b = _pairs(np.bincount(b, minlength=num_groups))
+    together_both = _pairs(np.bincount(a * num_groups + b))
+    return (together_a + together_b - 2 * together_both) / total_pairs
+
+
+def co_membership_distance(
+    a: np.ndarray, b: np.ndarray, num_slots: int, num_subteams: int = 1
+) -> float:
+    """
+    Distance entre deux affectations, entre 0 (mêmes équipes et mêmes
+    sous-équipes à la numérotation près) et 1 : part des paires de joueurs
+    réunies dans une même sous-équipe par une seule des deux, et part des
+    paires réunies dans une même équipe, pondérée par TEAM_DISTANCE_WEIGHT.
+    Le niveau des équipes distingue deux répartitions qui regroupent les
+    mêmes sous-équipes autrement, par exemple avec des sous-équipes d'un
+    seul joueur.
+    """
+    a, b = np.asarray(a), np.asarray(b)
+    subteam_distance = _pair_distance(a, b, num_slots)
+    if num_subteams <= 1:
+        return subteam_distance
+    team_distance = _pair_distance(
+        a // num_subteams, b // num_subteams, num_slots // num_subteams
+    )
+    weight = TEAM_DISTANCE_WEIGHT
+    return (1 - weight) * subteam_distance + weight * team_distance
+
+
+class TopK:
+    """
+    Les `k` meilleures répartitions distinctes rencontrées pendant une
+    recherche, dans un tas borné (la moins bonne au sommet).
+
+    Une répartition déjà retenue à la numérotation des équipes près est
+    ignorée ; une répartition à moins de `min_diversity` (voir
+    co_membership_distance) d'une répartition retenue ne la remplace que si
+    elle est meilleure.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        num_slots: int,
+        num_subteams: int,
+        min_diversity: float = DEFAULT_MIN_DIVERSITY,
+    ):
+        self.k = k
+        self.num_slots = num_slots
+        self.num_subteams = num_subteams
+        self.min_diversity = min_diversity
+        # (-score, compteur, empreinte, affectation) : la moins bonne au sommet
+        self._heap = []
+        self._signatures = set()
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def worst_score(self) -> float:
+        """Score à battre pour entrer dans la sélection."""
+        if len(self._heap) < self.k:
+            return float("inf")
+        return -self._heap[0][0]
+
+    def offer(self, assignment: Sequence[int], score: float) -> bool:
+        """Propose une répartition ; retourne vrai si elle a été retenue."""
+        if self.k <= 0 or score >= self.worst_score():
+            return False
+        assignment = np.array(assignment, dtype=np.intp)
+        signature = canonical_signature(assignment.tolist(), self.num_subteams)
+        if signature in self._signatures:
+            return False
+
+        near = []
+        for entry in self._heap:
+            distance = co_membership_distance(
+                entry[3], assignment, self.num_slots, self.num_subteams
+            )
+            if distance < self.min_diversity:
+                if -entry[0] <= score:
+                    return False
+                near.append(entry)
+        if near:
+            near_ids = {id(entry) for entry in near}
+            self._heap = [entry for entry in self._heap if id(entry) not in near_ids]
+            heapq.heapify(self._heap)
+            for entry in near:
+                self._signatures.discard(entry[2])
+
+        self._counter += 1
+        heapq.heappush(
+            self._heap, (-float(score), self._counter, signature, assignment)
+        )
+        self._signatures.add(signature)
+        if len(self._heap) > self.k:
+            self._signatures.discard(heapq.heappop(self._heap)[2])
+        return True
+
+    def merge(self, entries: List[Tuple[np.ndarray, float]]):
+        for assignment, score in entries:
+            self.offer(assignment, score)
+
+    def entries(self) -> List[Tuple[np.ndarray, float]]:
+        """
+        Répartitions retenues (affectation, score), de la meilleure à la moins
+        bonne.
+        """
+        ordered = sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))
+        return [(entry[3], -entry[0]) for entry in ordered]
+
@@ -0,0 +1,375 @@
+# api.py
+"""
+Service HTTP JSON du moteur de répartition, sans autre dépendance que la
+bibliothèque standard.
+
+    POST /teams   {"players": [...], "num_teams": 3, "num_subteams": 2, ...}
+                  -> {"teams": {...}, "non_disponibles": [...], "score": ...}
+    POST /pdf     même requête, ou {"teams": {...}, "non_disponibles": [...]}
+                  -> document PDF
+    GET  /health  -> {"status": "ok"}
+
+Chaque joueur est un objet {"prénom", "poste", "niveau"} avec un champ
+"présence" facultatif ("X" pour un joueur disponible, valeur par défaut).
+Les répartitions et les rendus PDF s'exécutent dans un pool de processus
+borné ; les requêtes identiques reçues pendant un calcul partagent son résultat.
+
+Exemple :
+    python api.py --port 8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from distribution import STRATEGIES, solve
+from ingestion import PRESENT_MARK, normalize_roster, split_players
+from pdf_generator import create_pdf, pdf_cache_key
+from player import Player
+from result_cache import roster_hash
+from team import teams_to_data
+
+# Taille maximale d'un corps de requête
+MAX_BODY_BYTES = 1024 * 1024
+
+# Nombre maximal de calculs en cours ou en attente avant de refuser les requêtes
+DEFAULT_MAX_PENDING = 64
+
+# Champs obligatoires de chaque joueur des équipes reçues par /pdf
+PLAYER_FIELDS = ("prénom", "poste", "niveau")
+
+# Budget de temps maximal accepté pour une répartition, en millisecondes
+MAX_TIME_BUDGET_MS = 10_000
+
+# Délai d'inactivité avant de fermer une connexion persistante, en secondes
+KEEP_ALIVE_TIMEOUT = 15
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class RequestError(Exception):
+    """Erreur renvoyée au client avec le code HTTP `status`."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _solve_teams(
+    players: List[Player], num_teams: int, num_subteams: int, options: dict
+) -> Optional[dict]:
+    """Répartition exécutée dans un processus du pool."""
+    solution = solve(players, num_teams, num_subteams, **options)
+    if solution is None:
+        return None
+    return {
+        "teams": teams_to_data(solution.teams),
+        "score": solution.score,
+        "lower_bound": solution.lower_bound,
+        "strategy": solution.strategy,
+        "optimal": solution.optimal,
+    }
+
+
+def _render_pdf(teams: dict, non_disponibles: List[dict]) -> bytes:
+    """Rendu PDF exécuté dans un processus du pool."""
+    return create_pdf(teams, non_disponibles)
+
+
+def _parse_roster(payload: dict) -> Tuple[List[Player], List[dict]]:
+    import pandas as pd
+
+    records = payload.get("players")
+    if not isinstance(records, list):
+        raise RequestError(400, "Le champ players doit être une liste de joueurs")
+    if not all(isinstance(record, dict) for record in records):
+        raise RequestError(400, "Chaque joueur doit être un objet JSON")
+
+    df = pd.DataFrame(
+        [{"présence": PRESENT_MARK, **record} for record in records],
+        columns=["prénom", "poste", "niveau", "présence"],
+    )
+    try:
+        return split_players(normalize_roster(df))
+    except ValueError as error:
+        raise RequestError(400, str(error)) from error
+
+
+def _integer(payload: dict, name: str, default: Optional[int] = None) -> Optional[int]:
+    """Champ entier de la requête : ni flottant tronqué, ni booléen."""
+    value = payload.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RequestError(400, f"Paramètre invalide : {name} doit être un entier")
+    return value
+
+
+def _parse_options(payload: dict, num_players: int) -> Tuple[int, int, dict]:
+    """
+    Paramètres de répartition validés : pas plus de sous-équipes que de
+    joueurs disponibles, budget de temps d'au plus MAX_TIME_BUDGET_MS,
+    graine positive ou nulle.
+    """
+    num_teams = _integer(payload, "num_teams", 3)
+    num_subteams = _integer(payload, "num_subteams", 2)
+    options = {"strategy": payload.get("strategy", "auto")}
+    for name in ("seed", "time_budget_ms"):
+        value = _integer(payload, name)
+        if value is not None:
+            options[name] = value
+
+    if options.get("seed", 0) < 0:
+        raise RequestError(400, "seed doit être positive ou nulle")
+    if num_teams < 1 or num_subteams < 1:
+        raise RequestError(400, "num_teams et num_subteams doivent être positifs")
+    if num_players and num_teams * num_subteams > num_players:
+        raise RequestError(
+            400,
+            f"num_teams x num_subteams ne peut pas dépasser le nombre de joueurs "
+            f"disponibles ({num_players})",
+        )
+    if not 0 < options.get("time_budget_ms", 1) <= MAX_TIME_BUDGET_MS:
+        raise RequestError(
+            400, f"time_budget_ms doit être compris entre 1 et {MAX_TIME_BUDGET_MS}"
+        )
+    if options["strategy"] not in STRATEGIES:
+        raise RequestError(
+            400, f"Stratégie inconnue (attendu : {', '.join(STRATEGIES)})"
+        )
+    return num_teams, num_subteams, options
+
+
+def _parse_teams(teams) -> Dict[str, Dict[int, List[dict]]]:
+    """
+    Équipes reçues en JSON : les numéros de sous-équipes redeviennent des
+    entiers et chaque joueur doit être un objet {"prénom", "poste", "niveau"}.
+    """
+    try:
+        parsed = {
+            str(team_name): {
+                int(subteam_id): list(players)
+                for subteam_id, players in subteams.items()
+            }
+            for team_name, subteams in teams.items()
+        }
+    except (AttributeError, TypeError, ValueError) as error:
+        raise RequestError(400, "Format d'équipes invalide") from error
+    for subteams in parsed.values():
+        for players in subteams.values():
+            if not _valid_players(players):
+                raise RequestError(400, "Format d'équipes invalide")
+    return parsed
+
+
+def _valid_players(players) -> bool:
+    """Vrai si `players` est une liste d'objets portant les champs PLAYER_FIELDS."""
+    return isinstance(players, list) and all(
+        isinstance(player, dict) and all(key in player for key in PLAYER_FIELDS)
+        for player in players
+    )
+
+
+class TeamService:
+    """
+    Traite les requêtes de répartition et de rendu PDF dans un pool de
+    `workers` processus. Au-delà de `max_pending` calculs en cours ou en
+    attente, les nouvelles requêtes sont refusées (503) plutôt que mises en file.
+    """
+
+    def __init__(
+        self, workers: Optional[int] = None, max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        # spawn : un processus créé par fork depuis la boucle asyncio hériterait
+        # de ses sockets et de l'état de ses threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.max_pending = max_pending
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def _run(self, key: str, func, *args):
+        """
+        Exécute `func(*args)` dans le pool, ou attend le calcul identique déjà
+        en cours pour la même clé.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            if len(self._in_flight) >= self.max_pending:
+                raise RequestError(503, "Service saturé, réessayer plus tard")
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(
+                loop.run_in_executor(self.executor, func, *args)
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield : l'abandon d'un client n'annule pas le calcul partagé
+        return await asyncio.shield(future)
+
+    async def teams(self, payload: dict) -> dict:
+        players, non_disponibles = _parse_roster(payload)
+        num_teams, num_subteams, options = _parse_options(payload, len(players))
+        key = roster_hash(
+            players, num_teams=num_teams, num_subteams=num_subteams, **options
+        )
+        result = await self._run(
+            f"teams:{key}", _solve_teams, players, num_teams, num_subteams, options
+        )
+        if result is None:
+            raise RequestError(400, "Aucun joueur disponible")
+        return {**result, "non_disponibles": non_disponibles}
+
+    async def pdf(self, payload: dict) -> bytes:
+        if "teams" in payload:
+            teams = _parse_teams(payload["teams"])
+            non_disponibles = payload.get("non_disponibles") or []
+            if not _valid_players(non_disponibles):
+                raise RequestError(400, "Format des joueurs non disponibles invalide")
+        else:
+            result = await self.teams(payload)
+            teams, non_disponibles = result["teams"], result["non_disponibles"]
+        if not teams:
+            raise RequestError(400, "Aucune équipe à exporter")
+        key = pdf_cache_key(teams, non_disponibles)
+        return await self._run(f"pdf:{key}", _render_pdf, teams, non_disponibles)
+
+    async def dispatch(
+        self, method: str, path: str, body: bytes
+    ) -> Tuple[int, str, bytes]:
+        """Retourne le code HTTP, le type de contenu et le corps de la réponse."""
+        if path == "/health":
+            return 200, "application/json", b'{"status": "ok"}'
+        if path not in ("/teams", "/pdf"):
+            raise RequestError(404, f"Chemin inconnu : {path}")
+        if method != "POST":
+            raise RequestError(405, "Méthode non autorisée, utiliser POST")
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as error:
+            raise RequestError(400, f"JSON invalide : {error}") from error
+        if not isinstance(payload, dict):
+            raise RequestError(400, "Le corps de la requête doit être un objet JSON")
+
+        if path == "/teams":
+            result = await self.teams(payload)
+            content = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            return 200, "application/json", content
+        return 200, "application/pdf", await self.pdf(payload)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Traite les requêtes HTTP/1.1 d'une connexion, persistante ou non."""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(
+                        reader.readline(), KEEP_ALIVE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+
+                keep_alive = True
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    headers = await _read_headers(reader)
+                    keep_alive = _keep_alive(version, headers)
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise RequestError(413, "Requête trop volumineuse")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, content = await self.dispatch(
+                        method.upper(), path.split("?", 1)[0], body
+                    )
+                except RequestError as error:
+                    status, content_type = error.status, "application/json"
+                    content = json.dumps(
+                        {"error": str(error)}, ensure_ascii=False
+                    ).encode("utf-8")
+                except ValueError:
+                    status, content_type, keep_alive = 400, "application/json", False
+                    content = b'{"error": "Requ\\u00eate HTTP invalide"}'
+                except Exception as error:  # noqa: BLE001 - toujours répondre au client
+                    status, content_type = 500, "application/json"
+                    content = json.dumps({"error": repr(error)}).encode("utf-8")
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(content)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode("latin-1")
+                    + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+def _keep_alive(version: str, headers: Dict[str, str]) -> bool:
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+async def serve(host: str, port: int, workers: Optional[int], max_pending: int):
+    service = TeamService(workers, max_pending)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Service de répartition sur http://{host}:{port}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="processus de calcul")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
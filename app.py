@@ -1,121 +1,54 @@
 import streamlit as st
-import pandas as pd
 from player import Player
-from distribution import distribute_players
-from pdf_generator import create_pdf
-from utils import get_team_color
-import json
-import copy
-from streamlit_sortables import sort_items
-import random
+from team import teams_from_data, teams_to_data
+from layout import NON_DISPONIBLES, TeamLayout
 import io
 
+# Nombre de variantes de répartition proposées après une génération
+NUM_ALTERNATIVES = 5
+
+# Intervalle maximal, en secondes, entre deux rafraîchissements de la
+# progression : Streamlit ne traite un clic sur « Arrêter » qu'à ce moment
+STOP_POLL_SECONDS = 0.25
+
+# Les modules lourds (pandas, NumPy, reportlab, solveur) sont importés au
+# moment où l'interface en a besoin : Python garde les modules déjà chargés,
+# les réexécutions suivantes n'en paient donc pas le coût
+
 st.set_page_config(page_title="FCE Répartition Equipe", page_icon="⚽")
 
 
-def generate_random_data(num_players=20):
-    prenoms = [
-        "Alice",
-        "Béatrice",
-        "Clara",
-        "Diane",
-        "Élodie",
-        "Fanny",
-        "Gisèle",
-        "Hélène",
-        "Isabelle",
-        "Jade",
-        "Karine",
-        "Léa",
-        "Mélanie",
-        "Nathalie",
-        "Océane",
-        "Pascale",
-        "Quentin",
-        "Roxane",
-        "Sophie",
-        "Tatiana",
-        "Ursula",
-        "Valérie",
-        "Wendy",
-        "Xavier",
-        "Yasmine",
-        "Zoé",
+def to_player(player: dict) -> Player:
+    return Player(player["prénom"], player["poste"], player["niveau"])
+
+
+def store_solution(solution, non_disponibles):
+    """Conserve une répartition et ses variantes entre les réexécutions."""
+    from stats import TeamStats
+
+    # Répartition indexée par identifiant de joueur
+    team_data = teams_to_data(solution.teams)
+    st.session_state.layout = TeamLayout(team_data, non_disponibles)
+    st.session_state.team_stats = TeamStats(team_data)
+    st.session_state.layout_version = st.session_state.get("layout_version", 0) + 1
+
+    # Variantes issues de la même recherche, pour comparer sans relancer
+    st.session_state.alternatives = [
+        (score, teams_to_data(alternative))
+        for alternative, score in solution.alternatives
     ]
-    postes = ["G", "Def", "Mill", "Ailier", "Att"]
-    niveaux = [1, 2, 3, 4]
-    presences = ["X", ""]
-
-    data = {
-        "prénom": [random.choice(prenoms) for _ in range(num_players)],
-        "poste": [random.choice(postes) for _ in range(num_players)],
-        "niveau": [random.choice(niveaux) for _ in range(num_players)],
-        "présence": [random.choice(presences) for _ in range(num_players)],
-    }
-    return pd.DataFrame(data)
-
-
-def transform_data(team_data, non_disponibles):
-    original_items = []
-
-    # Ajouter les équipes
-    for team_index, (team_name, subteams) in enumerate(team_data.items()):
-        color_name, _ = get_team_color(team_index, len(team_data))
-        for subteam_id, players in subteams.items():
-            header = f"{color_name} - {subteam_id}"
-            items = [
-                f"{player['prénom']} ({player['poste']}, {player['niveau']})"
-                for player in players
-            ]
-            original_items.append({"header": header, "items": items})
-
-    # Ajouter les joueurs non disponibles
-    if non_disponibles:
-        header = "Non disponibles"
-        items = [
-            f"{player['prénom']} ({player['poste']}, {player['niveau']})"
-            for player in non_disponibles
-        ]
-        original_items.append({"header": header, "items": items})
-
-    return original_items
-
-
-def calculate_stats(team_data):
-    stats = {}
-    for team_name, subteams in team_data.items():
-        team_levels = []  # Liste des niveaux pour toute l'équipe
-        stats[team_name] = {}
-        for subteam_id, players in subteams.items():
-            levels = [player["niveau"] for player in players]
-            stats[team_name][subteam_id] = {
-                "sum": sum(levels),
-                "average": sum(levels) / len(levels) if levels else 0,
-                "total_players": len(players),
-            }
-            team_levels.extend(levels)
-
-        stats[team_name]["team"] = {
-            "sum": sum(team_levels),
-            "average": sum(team_levels) / len(team_levels) if team_levels else 0,
-            "total_players": len(team_levels),
-        }
-    return stats
+    st.session_state.alternative_non_disponibles = non_disponibles
+    st.session_state.alternative_shown = 0
 
 
 def main():
     st.title("⚽ Répartiteur d'équipes")
 
-    # Initialisation des états de session
-    if "initial_teams" not in st.session_state:
-        st.session_state.initial_teams = None
-    if "initial_non_disponibles" not in st.session_state:
-        st.session_state.initial_non_disponibles = None
-    if "team_data" not in st.session_state:
-        st.session_state.team_data = None
-
     # Bouton pour télécharger un modèle de fichier Excel
     if st.button("Générer un modèle de fichier Excel"):
+        import pandas as pd
+        from sample_data import generate_random_data
+
         df = generate_random_data()
         buffer = io.BytesIO()
         with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
@@ -128,9 +61,21 @@ def main():
             mime="application/vnd.ms-excel",
         )
 
-    uploaded_file = st.file_uploader("Choisis un fichier Excel", type=["xlsx"])
+    uploaded_file = st.file_uploader(
+        "Choisis un fichier Excel ou CSV", type=["xlsx", "csv"]
+    )
     if uploaded_file:
-        df = pd.read_excel(uploaded_file)
+        from ingestion import read_roster_bytes, split_players
+        from scoring import DEFAULT_CAP_WEIGHT, DEFAULT_SPREAD_WEIGHT, BalanceWeights
+        from stats import TeamStats
+
+        # Analyse mise en cache selon le contenu du fichier : les réexécutions
+        # (curseurs, glisser-déposer) ne relisent pas le classeur
+        try:
+            df = read_roster_bytes(uploaded_file.getvalue(), uploaded_file.name)
+        except ValueError as error:
+            st.error(f"Fichier invalide : {error}")
+            return
         st.write("Aperçu du fichier uploadé :")
         st.dataframe(df)
 
@@ -138,107 +83,216 @@ def main():
         num_subteams = st.slider(
             "Nombre de sous-équipes par équipe", min_value=1, max_value=5, value=2
         )
+        seed = st.number_input(
+            "Graine du tirage (changer pour obtenir une autre répartition)",
+            min_value=0,
+            value=0,
+            step=1,
+        )
+
+        # Critères de composition des sous-équipes, en plus de l'équilibre des niveaux
+        with st.expander("⚖️ Composition des sous-équipes"):
+            max_goalkeepers = st.number_input(
+                "Gardiens max par sous-équipe", min_value=0, value=1, step=1
+            )
+            cap_weight = st.number_input(
+                "Pénalité par joueur au-delà du maximum",
+                min_value=0.0,
+                value=DEFAULT_CAP_WEIGHT,
+                step=10.0,
+            )
+            spread_weight = st.number_input(
+                "Pénalité par joueur d'écart à la répartition des postes",
+                min_value=0.0,
+                value=DEFAULT_SPREAD_WEIGHT,
+                step=5.0,
+            )
+        weights = BalanceWeights(
+            cap_weight, spread_weight, (("G", int(max_goalkeepers)),)
+        )
+
+        # Rotation : éviter de réunir les joueuses qui ont souvent joué ensemble
+        with st.expander("🔁 Rotation des coéquipières"):
+            from history import DEFAULT_ROTATION_WEIGHT
+
+            use_history = st.checkbox(
+                "Tenir compte des séances enregistrées", value=False
+            )
+            rotation_weight = st.number_input(
+                "Pénalité par séance déjà jouée ensemble",
+                min_value=0.0,
+                value=DEFAULT_ROTATION_WEIGHT,
+                step=1.0,
+            )
 
         if st.button("🚀 Générer les équipes"):
-            players = []
-            non_disponibles = []
-            for index, row in df.iterrows():
-                player = Player(
-                    prénom=row["prénom"], poste=row["poste"], niveau=row["niveau"]
-                )
-                if row["présence"] == "X":
-                    players.append(player)
-                else:
-                    non_disponibles.append(
-                        {
-                            "prénom": row["prénom"],
-                            "poste": row["poste"],
-                            "niveau": row["niveau"],
-                        }
+            from contextlib import closing
+            from distribution import iter_solutions
+
+            players, non_disponibles = split_players(df)
+
+            pair_penalties = None
+            if use_history and rotation_weight > 0:
+                from history import HistoryStore
+
+                with HistoryStore() as history:
+                    pair_penalties = history.pair_penalties(
+                        [player.prénom for player in players], rotation_weight
                     )
 
-            teams = distribute_players(players, num_teams, num_subteams)
-
-            team_data = {}
-            for team in teams:
-                team_name = f"Équipe {team.team_id + 1}"
-                team_data[team_name] = {}
-                for subteam_id, subteam in enumerate(team.subteams):
-                    team_data[team_name][subteam_id + 1] = [
-                        {
-                            "prénom": player.prénom,
-                            "poste": player.poste,
-                            "niveau": player.niveau,
-                        }
-                        for player in subteam
-                    ]
-
-            st.session_state.initial_teams = copy.deepcopy(team_data)
-            st.session_state.initial_non_disponibles = copy.deepcopy(non_disponibles)
-            st.session_state.current_teams = team_data
-            st.session_state.current_non_disponibles = non_disponibles
+            # Chaque meilleure répartition est conservée dès qu'elle est trouvée :
+            # « Arrêter » relance le script au rafraîchissement suivant de la
+            # progression (au plus STOP_POLL_SECONDS plus tard), la fermeture
+            # du générateur arrête la recherche en arrière-plan et la nouvelle
+            # exécution affiche la dernière répartition conservée
+            st.button("⏹️ Arrêter la recherche")
+            progress = st.empty()
+            st.session_state.pop("solver_stats", None)
+            solution = stored = None
+            solutions = iter_solutions(
+                players,
+                num_teams,
+                num_subteams,
+                seed=int(seed),
+                collect_stats=True,
+                weights=weights,
+                alternatives=NUM_ALTERNATIVES,
+                pair_penalties=pair_penalties,
+                heartbeat=STOP_POLL_SECONDS,
+            )
+            with closing(solutions):
+                for solution in solutions:
+                    if solution is not stored:
+                        store_solution(solution, non_disponibles)
+                        stored = solution
+                    team_stats = st.session_state.team_stats
+                    progress.info(
+                        f"Recherche en cours… meilleur score : {solution.score:.1f} "
+                        f"(minorant {solution.lower_bound:.1f}) - "
+                        + " - ".join(
+                            f"{team_name} : {team_stats.team(team_name)['sum']}"
+                            for team_name in team_stats.team_names
+                        )
+                    )
+            progress.empty()
+            if solution is not None:
+                st.session_state.solver_stats = solution
 
         # Gestion des équipes modifiables
-        if "current_teams" in st.session_state:
-            # Transformer les données pour streamlit-sortables
-            original_items = transform_data(
-                st.session_state.current_teams, st.session_state.current_non_disponibles
-            )
+        if "layout" in st.session_state:
+            from streamlit_sortables import sort_items
+
+            layout = st.session_state.layout
+            team_stats = st.session_state.team_stats
+
+            alternatives = st.session_state.get("alternatives", [])
+            if len(alternatives) > 1:
+                shown = st.selectbox(
+                    "Variantes proposées",
+                    range(len(alternatives)),
+                    index=st.session_state.alternative_shown,
+                    format_func=lambda index: (
+                        f"Variante {index + 1} (score {alternatives[index][0]:.1f})"
+                    ),
+                )
+                if shown != st.session_state.alternative_shown:
+                    team_data = alternatives[shown][1]
+                    layout = st.session_state.layout = TeamLayout(
+                        team_data, st.session_state.alternative_non_disponibles
+                    )
+                    team_stats = st.session_state.team_stats = TeamStats(team_data)
+                    st.session_state.layout_version += 1
+                    st.session_state.alternative_shown = shown
+
+            # Une nouvelle clé réinitialise l'état interne du composant
+            if st.button("↩️ Revenir à la répartition générée"):
+                layout.reset()
+                team_stats = st.session_state.team_stats = TeamStats(layout.team_data())
+                st.session_state.layout_version += 1
+
+            # Absences et arrivées de dernière minute : la répartition actuelle
+            # est réparée en déplaçant le moins de joueuses possible
+            with st.expander("♻️ Absences et arrivées"):
+                in_teams = [
+                    player_id
+                    for key, player_ids in layout.containers.items()
+                    if key is not NON_DISPONIBLES
+                    for player_id in player_ids
+                ]
+                absent = st.multiselect(
+                    "Joueuses absentes",
+                    in_teams,
+                    format_func=lambda player_id: layout.labels[player_id],
+                )
+                arrived = st.multiselect(
+                    "Joueuses arrivées",
+                    layout.containers.get(NON_DISPONIBLES, ()),
+                    format_func=lambda player_id: layout.labels[player_id],
+                )
+                if st.button("♻️ Rééquilibrer"):
+                    from distribution import repair_distribution
+
+                    solution = repair_distribution(
+                        teams_from_data(layout.team_data()),
+                        added=[
+                            to_player(layout.players[player_id])
+                            for player_id in arrived
+                        ],
+                        removed=[
+                            to_player(layout.players[player_id])
+                            for player_id in absent
+                        ],
+                        weights=weights,
+                        seed=int(seed),
+                    )
+                    if solution is None:
+                        st.warning("Aucune joueuse disponible")
+                    else:
+                        non_disponibles = [
+                            layout.players[player_id]
+                            for player_id in layout.containers.get(NON_DISPONIBLES, ())
+                            if player_id not in arrived
+                        ] + [layout.players[player_id] for player_id in absent]
+                        team_data = teams_to_data(solution.teams)
+                        layout = st.session_state.layout = TeamLayout(
+                            team_data, non_disponibles
+                        )
+                        team_stats = st.session_state.team_stats = TeamStats(team_data)
+                        st.session_state.layout_version += 1
+                        # Les variantes ne correspondent plus à l'effectif présent
+                        st.session_state.alternatives = []
+                        st.success(
+                            f"Répartition rééquilibrée : {solution.moved} joueuse(s) "
+                            f"déplacée(s), score {solution.score:.1f}"
+                        )
 
             # Utilisation du composant streamlit-sortables
-            updated_items = sort_items(original_items, multi_containers=True)
+            updated_items = sort_items(
+                layout.sortable_items(),
+                multi_containers=True,
+                key=f"sortables-{st.session_state.layout_version}",
+            )
 
             if updated_items:
-                # Reconvertir les données en format d'origine
-                new_team_data = {}
-                non_disponibles = []
-
-                for item in updated_items:
-                    header = item["header"]
-                    items = item["items"]
-
-                    if "Non disponibles" in header:
-                        for player_str in items:
-                            prénom, poste_niveau = player_str.split(" (")
-                            poste, niveau = poste_niveau.rstrip(")").split(", ")
-                            non_disponibles.append(
-                                {
-                                    "prénom": prénom,
-                                    "poste": poste,
-                                    "niveau": int(niveau),
-                                }
-                            )
-                    else:
-                        team_name, subteam_id = header.split(" - ")
-                        if team_name not in new_team_data:
-                            new_team_data[team_name] = {}
-                        new_team_data[team_name][int(subteam_id)] = []
-                        for player_str in items:
-                            prénom, poste_niveau = player_str.split(" (")
-                            poste, niveau = poste_niveau.rstrip(")").split(", ")
-                            new_team_data[team_name][int(subteam_id)].append(
-                                {
-                                    "prénom": prénom,
-                                    "poste": poste,
-                                    "niveau": int(niveau),
-                                }
-                            )
-
-                st.session_state.current_teams = new_team_data
-                st.session_state.current_non_disponibles = non_disponibles
+                # Mise à jour des statistiques par différence, un joueur
+                # déplacé après l'autre
+                for player_id, source, target in layout.update(updated_items):
+                    team_stats.move(layout.players[player_id]["niveau"], source, target)
 
             # Afficher les statistiques
-            stats = calculate_stats(st.session_state.current_teams)
-            st.write("Statistiques des équipes:")
-            for team_name, subteams in stats.items():
-                team_stats = subteams.pop("team")
+            st.write(
+                "Statistiques des équipes (score d'équilibre : "
+                f"{team_stats.score():.1f}, plus il est bas, mieux c'est) :"
+            )
+            for team_name in team_stats.team_names:
+                team_summary = team_stats.team(team_name)
                 st.write(
                     f"**{team_name}** : "
-                    f"{team_stats['total_players']} joueuses - "
-                    f"Moyenne : {team_stats['average']:.1f} - "
-                    f"Total : {team_stats['sum']}"
+                    f"{team_summary['total_players']} joueuses - "
+                    f"Moyenne : {team_summary['average']:.1f} - "
+                    f"Total : {team_summary['sum']}"
                 )
-                for subteam_id, stat in subteams.items():
+                for subteam_id, stat in team_stats.subteams(team_name).items():
                     st.write(
                         f"Sous-équipe {subteam_id} : "
                         f"{stat['total_players']} joueuses - "
@@ -246,19 +300,60 @@ def main():
                         f"Total : {stat['sum']}"
                     )
 
+            # Mesures de la dernière recherche, pour le diagnostic
+            if "solver_stats" in st.session_state:
+                solution = st.session_state.solver_stats
+                with st.expander("🛠️ Débogage du solveur"):
+                    import pandas as pd
+
+                    st.write(
+                        f"Stratégie : {solution.strategy} - "
+                        f"Score : {solution.score:.1f} - "
+                        f"Minorant : {solution.lower_bound:.1f} "
+                        f"(écart {solution.gap:.1f}) - "
+                        f"Optimal : {'oui' if solution.optimal else 'non'} - "
+                        f"Évaluations : {solution.stats.iterations} - "
+                        f"Arrêt : {solution.stats.stop_reason}"
+                    )
+                    st.dataframe(
+                        pd.DataFrame(
+                            {
+                                "phase": list(solution.stats.phase_seconds),
+                                "ms": [
+                                    seconds * 1000
+                                    for seconds in solution.stats.phase_seconds.values()
+                                ],
+                            }
+                        )
+                    )
+                    if solution.stats.trajectory:
+                        st.line_chart(
+                            pd.DataFrame(
+                                solution.stats.trajectory,
+                                columns=["évaluations", "secondes", "meilleur score"],
+                            ).set_index("évaluations")["meilleur score"]
+                        )
+
+            # Enregistrer la répartition jouée, pour la rotation des séances suivantes
+            played_on = st.date_input("Date de la séance")
+            if st.button("💾 Enregistrer la séance"):
+                from history import HistoryStore
+
+                with HistoryStore() as history:
+                    history.record(layout.team_data(), played_on)
+                st.success("Séance enregistrée dans l'historique")
+
             # Générer le PDF avec les données actuelles
             if st.button("⏳ Générer le PDF"):
-                create_pdf(
-                    st.session_state.current_teams,
-                    st.session_state.current_non_disponibles,
+                from pdf_generator import create_pdf
+
+                pdf_bytes = create_pdf(layout.team_data(), layout.non_disponibles())
+                st.download_button(
+                    label="✅ Télécharger le PDF des équipes",
+                    data=pdf_bytes,
+                    file_name="teams.pdf",
+                    mime="application/pdf",
                 )
-                with open("teams.pdf", "rb") as file:
-                    st.download_button(
-                        label="✅ Télécharger le PDF des équipes",
-                        data=file,
-                        file_name="teams.pdf",
-                        mime="application/pdf",
-                    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+# benchmark.py
+"""
+Banc d'essai du moteur de répartition.
+
+Génère des effectifs aléatoires de différentes tailles, mesure pour chaque
+stratégie de distribution.solve la durée, le score final (evaluate_distribution),
+le nombre d'évaluations et le pic de mémoire, écrit les résultats en JSON et
+les compare à une référence enregistrée (DEFAULT_BASELINE_PATH par défaut,
+produite par --save-baseline). Les durées de référence dépendent de la
+machine : la régénérer avant de comparer sur une autre machine.
+
+Le mode --stress mesure toute la chaîne sur de très gros effectifs écrits
+sur disque : écriture du fichier, lecture, répartition et export PDF.
+
+Exemples :
+    python benchmark.py --save-baseline
+    python benchmark.py --output bench.json
+    python benchmark.py --stress 10000 100000 --stress-format csv
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+from distribution import SCORING_BATCH_SIZE, STRATEGIES, evaluate_distribution, solve
+from player import Player
+from sample_data import generate_random_data, write_random_roster
+
+# Référence comparée par défaut, écrite par --save-baseline
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json"
+)
+
+DEFAULT_SIZES = [10, 25, 50, 100, 250, 500]
+DEFAULT_GRIDS = ["2x1", "3x2", "4x3", "5x5"]
+
+# Nombre maximal de cellules (candidats x joueurs) d'un lot de tirages en mode --stress
+STRESS_MAX_BATCH_CELLS = 4_000_000
+
+# Marges tolérées avant de signaler une régression par rapport à la référence
+DEFAULT_LATENCY_TOLERANCE = 0.5
+DEFAULT_SCORE_TOLERANCE = 0.1
+
+
+def make_players(num_players: int, seed: int) -> List[Player]:
+    """Effectif synthétique construit à partir de generate_random_data."""
+    df = generate_random_data(num_players, seed=seed)
+    return [
+        Player(prénom=prénom, poste=poste, niveau=int(niveau))
+        for prénom, poste, niveau in zip(df["prénom"], df["poste"], df["niveau"])
+    ]
+
+
+def run_case(
+    players: List[Player],
+    num_teams: int,
+    num_subteams: int,
+    strategy: str,
+    seed: int,
+    repeat: int,
+) -> Dict:
+    """
+    Mesure une configuration. La durée est la médiane de `repeat` exécutions ;
+    le pic de mémoire est mesuré lors d'une exécution séparée, tracemalloc
+    ralentissant fortement le code instrumenté.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        solution = solve(
+            players, num_teams, num_subteams, strategy=strategy, seed=seed, cache=None
+        )
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    solve(players, num_teams, num_subteams, strategy=strategy, seed=seed, cache=None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "players": len(players),
+        "num_teams": num_teams,
+        "num_subteams": num_subteams,
+        "strategy": strategy,
+        "engine": solution.strategy,
+        "seconds": durations[len(durations) // 2],
+        "score": evaluate_distribution(solution.teams, num_subteams),
+        "optimal": solution.optimal,
+        "iterations": solution.iterations,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_stress(
+    num_players: int,
+    num_teams: int,
+    num_subteams: int,
+    strategy: str,
+    file_format: str,
+    seed: int,
+) -> Dict:
+    """
+    Mesure la chaîne complète sur un effectif écrit dans un fichier temporaire :
+    génération, lecture (ingestion), répartition et export PDF.
+    """
+    from ingestion import load_players
+    from pdf_generator import create_pdf
+    from team import teams_to_data
+
+    result = {"players": num_players, "format": file_format, "strategy": strategy}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"effectif.{file_format}")
+
+        start = time.perf_counter()
+        write_random_roster(path, num_players, seed=seed)
+        result["write_seconds"] = time.perf_counter() - start
+        result["file_bytes"] = os.path.getsize(path)
+
+        start = time.perf_counter()
+        players, non_disponibles = load_players(path)
+        result["ingestion_seconds"] = time.perf_counter() - start
+        result["available"] = len(players)
+
+    # Lots de tirages réduits pour borner la mémoire sur les très gros effectifs
+    batch_size = max(
+        1, min(SCORING_BATCH_SIZE, STRESS_MAX_BATCH_CELLS // max(len(players), 1))
+    )
+    start = time.perf_counter()
+    solution = solve(
+        players,
+        num_teams,
+        num_subteams,
+        batch_size=batch_size,
+        strategy=strategy,
+        seed=seed,
+        cache=None,
+    )
+    result["solve_seconds"] = time.perf_counter() - start
+    result["score"] = solution.score if solution is not None else None
+
+    if solution is not None:
+        start = time.perf_counter()
+        pdf_bytes = create_pdf(
+            teams_to_data(solution.teams), non_disponibles, use_cache=False
+        )
+        result["pdf_seconds"] = time.perf_counter() - start
+        result["pdf_bytes"] = len(pdf_bytes)
+
+    return result
+
+
+def case_key(result: Dict) -> str:
+    return (
+        f"{result['players']}:{result['num_teams']}x{result['num_subteams']}"
+        f":{result['strategy']}"
+    )
+
+
+def compare(
+    results: List[Dict],
+    baseline: List[Dict],
+    latency_tolerance: float,
+    score_tolerance: float,
+) -> List[str]:
+    """Liste les régressions de durée ou de score par rapport à la référence."""
+    reference = {case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = reference.get(case_key(result))
+        if previous is None:
+            continue
+        if result["seconds"] > previous["seconds"] * (1 + latency_tolerance):
+            regressions.append(
+                f"{case_key(result)} : durée {result['seconds']:.3f} s "
+                f"(référence {previous['seconds']:.3f} s)"
+            )
+        # Marge absolue d'un point pour les scores proches de zéro
+        if result["score"] > previous["score"] * (1 + score_tolerance) + 1:
+            regressions.append(
+                f"{case_key(result)} : score {result['score']:.1f} "
+                f"(référence {previous['score']:.1f})"
+            )
+    return regressions
+
+
+def parse_grid(grid: str):
+    num_teams, num_subteams = grid.lower().split("x")
+    return int(num_teams), int(num_subteams)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--grids", nargs="+", default=DEFAULT_GRIDS, help="ex. 3x2")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE_PATH,
+        help="fichier JSON de référence à comparer",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="enregistrer les résultats comme référence",
+    )
+    parser.add_argument(
+        "--latency-tolerance", type=float, default=DEFAULT_LATENCY_TOLERANCE
+    )
+    parser.add_argument(
+        "--score-tolerance", type=float, default=DEFAULT_SCORE_TOLERANCE
+    )
+    parser.add_argument(
+        "--stress",
+        type=int,
+        nargs="+",
+        help="tailles d'effectif pour le mode de charge",
+    )
+    parser.add_argument(
+        "--stress-format", choices=["csv", "xlsx", "parquet"], default="csv"
+    )
+    parser.add_argument("--stress-strategy", default="local")
+    args = parser.parse_args(argv)
+
+    if args.stress:
+        num_teams, num_subteams = parse_grid(args.grids[0])
+        results = []
+        for size in args.stress:
+            result = run_stress(
+                size,
+                num_teams,
+                num_subteams,
+                args.stress_strategy,
+                args.stress_format,
+                args.seed,
+            )
+            results.append(result)
+            print(
+                f"{size:>9d} joueurs  écriture {result['write_seconds']:7.2f} s  "
+                f"lecture {result['ingestion_seconds']:7.2f} s  "
+                f"répartition {result['solve_seconds']:7.2f} s  "
+                f"PDF {result.get('pdf_seconds', 0):7.2f} s",
+                file=sys.stderr,
+            )
+        report = json.dumps(results, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.write(report)
+        else:
+            print(report)
+        return 0
+
+    results = []
+    for size in args.sizes:
+        players = make_players(size, args.seed)
+        for grid in args.grids:
+            num_teams, num_subteams = parse_grid(grid)
+            for strategy in args.strategies:
+                result = run_case(
+                    players, num_teams, num_subteams, strategy, args.seed, args.repeat
+                )
+                results.append(result)
+                print(
+                    f"{case_key(result):<24} {result['seconds'] * 1000:9.1f} ms  "
+                    f"score {result['score']:9.1f}  "
+                    f"{result['iterations']:7d} it.  "
+                    f"{result['peak_memory_bytes'] / 1024:8.0f} Kio",
+                    file=sys.stderr,
+                )
+
+    report = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    else:
+        print(report)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            file.write(report)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"Pas de référence {args.baseline} : lancer avec --save-baseline",
+            file=sys.stderr,
+        )
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions = compare(
+        results, baseline, args.latency_tolerance, args.score_tolerance
+    )
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
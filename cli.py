@@ -0,0 +1,125 @@
+# cli.py
+"""
+Génération des équipes en ligne de commande, sans Streamlit.
+
+Lit un ou plusieurs fichiers de joueurs (Excel ou CSV), répartit les joueurs
+disponibles et écrit, pour chaque fichier, les équipes en JSON et/ou en PDF.
+Les modules lourds ne sont importés que lorsqu'ils sont utilisés.
+
+Exemples :
+    python cli.py joueurs.xlsx --teams 3 --subteams 2
+    python cli.py u11.xlsx u13.csv --teams 4 --json --pdf --output-dir sorties/
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+
+def positive_int(value: str) -> int:
+    """Type argparse : entier strictement positif."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"entier attendu : {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"doit être positif : {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from distribution import STRATEGIES
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="fichiers Excel (.xlsx) ou CSV")
+    parser.add_argument(
+        "--teams", type=positive_int, default=3, help="nombre d'équipes"
+    )
+    parser.add_argument(
+        "--subteams",
+        type=positive_int,
+        default=2,
+        help="nombre de sous-équipes par équipe",
+    )
+    parser.add_argument("--seed", type=int, help="graine du tirage")
+    parser.add_argument(
+        "--strategy", default="auto", choices=STRATEGIES, help="stratégie de recherche"
+    )
+    parser.add_argument("--time-budget-ms", type=float, help="budget de temps")
+    parser.add_argument(
+        "--workers", type=positive_int, default=1, help="processus de recherche"
+    )
+    parser.add_argument("--json", action="store_true", help="écrire <fichier>.json")
+    parser.add_argument("--pdf", action="store_true", help="écrire <fichier>.pdf")
+    parser.add_argument(
+        "--output-dir", default=".", help="répertoire des fichiers produits"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    from distribution import distribute_players
+    from ingestion import load_players
+    from team import teams_to_data
+
+    if args.pdf:
+        from pdf_generator import create_pdf
+
+    if args.json or args.pdf:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    status = 0
+    for path in args.inputs:
+        try:
+            players, non_disponibles = load_players(path)
+        except (OSError, ValueError) as error:
+            print(f"{path} : {error}", file=sys.stderr)
+            status = 1
+            continue
+        if players and args.teams * args.subteams > len(players):
+            print(
+                f"{path} : {args.teams} x {args.subteams} sous-équipes pour "
+                f"{len(players)} joueurs disponibles",
+                file=sys.stderr,
+            )
+            status = 1
+            continue
+
+        teams = distribute_players(
+            players,
+            args.teams,
+            args.subteams,
+            strategy=args.strategy,
+            time_budget_ms=args.time_budget_ms,
+            workers=args.workers,
+            seed=args.seed,
+        )
+        if teams is None:
+            print(f"{path} : aucun joueur disponible", file=sys.stderr)
+            status = 1
+            continue
+
+        team_data = teams_to_data(teams)
+        result = {"teams": team_data, "non_disponibles": non_disponibles}
+        stem = os.path.join(
+            args.output_dir, os.path.splitext(os.path.basename(path))[0]
+        )
+
+        if args.json:
+            with open(f"{stem}.json", "w", encoding="utf-8") as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+        if args.pdf:
+            with open(f"{stem}.pdf", "wb") as file:
+                create_pdf(team_data, non_disponibles, output=file)
+        if not (args.json or args.pdf):
+            json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
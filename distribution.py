@@ -1,19 +1,89 @@
+import atexit
+import queue
 import random
-from typing import List
-from collections import defaultdict
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 import numpy as np
 from math import ceil, floor
 from player import Player
 from team import Team
+from roster import Roster
+from result_cache import (
+    ResultCache,
+    default_cache,
+    player_key,
+    roster_hash,
+    teams_from_entry,
+    teams_to_entry,
+)
+from alternatives import DEFAULT_MIN_DIVERSITY, TopK, canonical_signature
+from scoring import (
+    DEVIATION_THRESHOLD,
+    BalanceWeights,
+    PairPenalties,
+    matrix_pairs,
+    position_bounds,
+    rotation_penalty,
+    score_assignments,
+    score_lower_bound,
+    slot_position_penalty,
+)
+from exact import EXACT_MAX_PLAYERS, SCORE_TOLERANCE, exact_supported, solve_exact
+from search import SwapState, local_search, simulated_annealing, tabu_search
+
+# Nombre de candidats évalués ensemble par le moteur vectorisé
+SCORING_BATCH_SIZE = 64
+
+# Moteurs de recherche disponibles pour distribute_players
+STRATEGIES = ("auto", "random", "local", "annealing", "tabu", "exact")
+
+# Écart au minorant du score (voir scoring.score_lower_bound) en dessous
+# duquel une solution est jugée très satisfaisante et la recherche arrêtée
+DEFAULT_SCORE_GAP = 50
+
+# Budget de temps par défaut des moteurs "annealing" et "tabu", en millisecondes.
+# Ils ne s'arrêtent qu'à l'échéance : sur 60 à 120 joueurs, 300 ms ne les
+# distinguent guère de "local", et au-delà de 1 s le gain devient marginal
+DEFAULT_TIME_BUDGET_MS = 1000
+
+# Relances depuis la meilleure répartition perturbée, par alternative demandée,
+# pour trouver des alternatives distinctes
+ALTERNATIVE_RESTARTS = 4
+
+# Part du budget de temps réservée à l'affinage des alternatives
+ALTERNATIVES_BUDGET_SHARE = 0.25
+
+# Essais sans amélioration avant d'arrêter l'affinage d'une alternative
+ALTERNATIVE_PATIENCE = 500
+
+# Coût par joueur changé de sous-équipe lors d'une réparation (repair_distribution)
+DEFAULT_MOVE_COST = 10.0
+
+# Relances successives sans amélioration, depuis la meilleure réparation
+# perturbée, avant d'arrêter une réparation (repair_distribution)
+REPAIR_RESTARTS = 2
+
+# Essais sans amélioration avant d'arrêter chaque descente d'une réparation
+REPAIR_PATIENCE = 500
 
 
 def distribute_players_by_position(
-    players_by_position: dict, num_teams: int
+    players_by_position: dict, num_teams: int, rng: Optional[random.Random] = None
 ) -> List[Player]:
     """
     Distribue les joueurs de chaque position équitablement entre les équipes
     avant de les mélanger dans chaque groupe.
+
+    `rng` permet d'utiliser un générateur aléatoire isolé plutôt que le
+    générateur global du module random.
     """
+    shuffle = rng.shuffle if rng is not None else random.shuffle
     distributed_players = []
     team_assignments = [[] for _ in range(num_teams)]
 
@@ -24,7 +94,7 @@ def distribute_players_by_position(
         extra_players = num_players % num_teams
 
         # Mélanger les joueurs de cette position
-        random.shuffle(players)
+        shuffle(players)
         player_index = 0
 
         # Distribuer le minimum de joueurs à chaque équipe
@@ -42,7 +112,7 @@ def distribute_players_by_position(
 
     # Mélanger l'ordre des joueurs dans chaque équipe
     for team_players in team_assignments:
-        random.shuffle(team_players)
+        shuffle(team_players)
         distributed_players.extend(team_players)
 
     return distributed_players
@@ -101,95 +171,1333 @@ def calculate_level_penalty(levels: List[float], target: float = None) -> float:
 
     # Pénalité supplémentaire pour les grands écarts
     if (
-        max_deviation > 0.5
+        max_deviation > DEVIATION_THRESHOLD
     ):  # Seuil à partir duquel on considère l'écart comme important
         penalty += (max_deviation * 2) ** 2 * 100
 
     return penalty
 
 
-def distribute_players(
-    players: List[Player], num_teams: int, num_subteams: int, max_iterations: int = 1000
+def create_distribution(
+    players_list: List[Player],
+    dist_plan: List[List[int]],
+    num_teams: int,
+    num_subteams: int,
 ) -> List[Team]:
-    total_players = len(players)
-    distribution_plan = calculate_optimal_distribution(
-        total_players, num_teams, num_subteams
+    teams = [Team(i, num_subteams) for i in range(num_teams)]
+    players_index = 0
+
+    for team_id, subteam_sizes in enumerate(dist_plan):
+        for subteam_id, size in enumerate(subteam_sizes):
+            for _ in range(size):
+                if players_index < len(players_list):
+                    teams[team_id].add_player_to_subteam(
+                        players_list[players_index], subteam_id
+                    )
+                    players_index += 1
+
+    return teams
+
+
+def evaluate_distribution(
+    teams: List[Team],
+    num_subteams: int,
+    weights: Optional[BalanceWeights] = None,
+    pair_penalties: Optional[PairPenalties] = None,
+) -> float:
+    score = 0
+
+    # Évaluer l'équilibre des niveaux entre équipes
+    team_levels = [team.get_average_level() for team in teams]
+    team_level_sums = [team.get_total_level() for team in teams]
+
+    # Pénalité basée sur la moyenne des niveaux
+    score += calculate_level_penalty(team_levels)
+
+    # Nouvelle pénalité basée sur la somme totale des niveaux
+    score += calculate_level_penalty(team_level_sums) * 0.5
+
+    # Récupérer tous les niveaux de sous-équipes
+    all_subteam_levels = []
+    for team in teams:
+        subteam_levels = [
+            team.get_subteam_average_level(i) for i in range(num_subteams)
+        ]
+        all_subteam_levels.extend(subteam_levels)
+
+        # Pénaliser les écarts au sein de chaque équipe
+        score += (
+            calculate_level_penalty(subteam_levels) * 2
+        )  # Coefficient plus élevé pour les sous-équipes
+
+    # Pénaliser les écarts entre toutes les sous-équipes
+    score += calculate_level_penalty(all_subteam_levels) * 1.5
+
+    # Critères de composition des sous-équipes (postes), s'ils sont demandés
+    if weights is not None and weights.active:
+        score += position_penalty(teams, num_subteams, weights)
+
+    # Paires de joueurs déjà souvent réunies (rotation), s'il y a un historique
+    if pair_penalties is not None:
+        names, assignment = [], []
+        for team_id, team in enumerate(teams):
+            for subteam_id, subteam in enumerate(team.subteams):
+                for player in subteam:
+                    names.append(player.prénom)
+                    assignment.append(team_id * num_subteams + subteam_id)
+        score += float(
+            rotation_penalty(np.array(assignment), pair_penalties.pairs(names))[0]
+        )
+
+    return score
+
+
+def position_penalty(
+    teams: List[Team], num_subteams: int, weights: BalanceWeights
+) -> float:
+    """Pénalité de composition de toutes les sous-équipes (voir BalanceWeights)."""
+    subteams = [
+        team.subteams[i] if i < len(team.subteams) else []
+        for team in teams
+        for i in range(num_subteams)
+    ]
+    labels = list(
+        dict.fromkeys(player.poste for subteam in subteams for player in subteam)
     )
+    codes = {label: code for code, label in enumerate(labels)}
+    counts = [[0] * len(labels) for _ in subteams]
+    for slot, subteam in enumerate(subteams):
+        for player in subteam:
+            counts[slot][codes[player.poste]] += 1
+
+    poste_totals = [sum(column) for column in zip(*counts)] if subteams else []
+    lows, highs = position_bounds(poste_totals, [len(subteam) for subteam in subteams])
+    caps = weights.caps_for(labels)
+    return sum(
+        slot_position_penalty(counts[slot], lows[slot], highs[slot], caps, weights)
+        for slot in range(len(subteams))
+    )
+
 
-    def create_distribution(
-        players_list: List[Player], dist_plan: List[List[int]]
-    ) -> List[Team]:
-        teams = [Team(i, num_subteams) for i in range(num_teams)]
-        players_index = 0
-
-        for team_id, subteam_sizes in enumerate(dist_plan):
-            for subteam_id, size in enumerate(subteam_sizes):
-                for _ in range(size):
-                    if players_index < len(players_list):
-                        teams[team_id].add_player_to_subteam(
-                            players_list[players_index], subteam_id
-                        )
-                        players_index += 1
-
-        return teams
-
-    def evaluate_distribution(teams: List[Team]) -> float:
-        score = 0
-
-        # Évaluer l'équilibre des niveaux entre équipes
-        team_levels = [team.get_average_level() for team in teams]
-        team_level_sums = [team.get_total_level() for team in teams]
-
-        # Pénalité basée sur la moyenne des niveaux
-        score += calculate_level_penalty(team_levels)
-        
-        # Nouvelle pénalité basée sur la somme totale des niveaux
-        score += calculate_level_penalty(team_level_sums) * 0.5 
-
-        # Récupérer tous les niveaux de sous-équipes
-        all_subteam_levels = []
-        for team in teams:
-            subteam_levels = [
-                team.get_subteam_average_level(i) for i in range(num_subteams)
-            ]
-            all_subteam_levels.extend(subteam_levels)
-
-            # Pénaliser les écarts au sein de chaque équipe
-            score += (
-                calculate_level_penalty(subteam_levels) * 2
-            )  # Coefficient plus élevé pour les sous-équipes
-
-        # Pénaliser les écarts entre toutes les sous-équipes
-        score += calculate_level_penalty(all_subteam_levels) * 1.5
-
-        return score
+def plan_slots(
+    dist_plan: List[List[int]], num_subteams: int, total_players: int
+) -> np.ndarray:
+    """
+    Traduit le plan de répartition en un tableau donnant, pour chaque rang
+    de la liste ordonnée des joueurs, l'index de sa sous-équipe
+    (équipe * nb_sous_équipes + sous-équipe).
+    """
+    slots = [
+        team_id * num_subteams + subteam_id
+        for team_id, subteam_sizes in enumerate(dist_plan)
+        for subteam_id, size in enumerate(subteam_sizes)
+        for _ in range(size)
+    ]
+    return np.array(slots[:total_players], dtype=np.intp)
+
+
+@dataclass
+class SolverStats:
+    """
+    Mesures d'une recherche : durée cumulée de chaque phase, nombre
+    d'évaluations, évolution du meilleur score et condition d'arrêt des
+    tirages aléatoires.
+    """
+
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+    iterations: int = 0
+    # (évaluations, secondes écoulées, meilleur score) à chaque amélioration
+    trajectory: List[Tuple[int, float, float]] = field(default_factory=list)
+    stop_reason: str = ""
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def add_time(self, phase: str, seconds: float):
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def record(self, iterations: int, score: float):
+        self.trajectory.append(
+            (iterations, time.perf_counter() - self.started_at, float(score))
+        )
+
+
+# Conditions d'arrêt de la recherche par tirages aléatoires ; "score_satisfaisant" :
+# le score est à moins de l'écart demandé du minorant
+STOP_SATISFYING_SCORE = "score_satisfaisant"
+STOP_NO_IMPROVEMENT = "sans_amelioration"
+STOP_MAX_ITERATIONS = "iterations_max"
+STOP_DEADLINE = "budget_temps"
+STOP_INTERRUPTED = "interrompu"
+STOP_CACHED = "cache"
+
+
+def _sample_orders(
+    position_groups: List[np.ndarray],
+    num_teams: int,
+    size: int,
+    np_rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Version vectorisée de distribute_players_by_position : tire `size` ordres
+    de joueurs d'un coup, sous la forme d'un tableau (size, nb_joueurs) d'index.
+    """
+    team_blocks = [[] for _ in range(num_teams)]
+    for members in position_groups:
+        # Mélanger les joueurs de cette position, indépendamment pour chaque tirage
+        shuffled = np_rng.permuted(
+            np.broadcast_to(members, (size, len(members))), axis=1
+        )
+        min_per_team, extra_players = divmod(len(members), num_teams)
+        start = 0
+        for team_idx in range(num_teams):
+            players_to_add = min_per_team + (1 if team_idx < extra_players else 0)
+            team_blocks[team_idx].append(shuffled[:, start : start + players_to_add])
+            start += players_to_add
+
+    # Mélanger l'ordre des joueurs dans chaque équipe
+    columns = [
+        np_rng.permuted(np.concatenate(blocks, axis=1), axis=1)
+        if blocks
+        else np.empty((size, 0), dtype=np.intp)
+        for blocks in team_blocks
+    ]
+    return np.concatenate(columns, axis=1)
 
+
+def _random_search(
+    position_groups: List[np.ndarray],
+    slot_of_rank: np.ndarray,
+    levels: np.ndarray,
+    num_teams: int,
+    num_subteams: int,
+    max_iterations: int,
+    batch_size: int,
+    deadline: Optional[float] = None,
+    np_rng: Optional[np.random.Generator] = None,
+    stop_event=None,
+    stats: Optional[SolverStats] = None,
+    poste_codes: Optional[np.ndarray] = None,
+    weights: Optional[BalanceWeights] = None,
+    caps: Optional[List[float]] = None,
+    top_k: Optional[TopK] = None,
+    pairs=None,
+    target: float = DEFAULT_SCORE_GAP,
+    progress: Optional[Callable[[Sequence[int], float], None]] = None,
+):
+    """
+    Recherche par tirages aléatoires successifs. Retourne l'affectation
+    joueur -> sous-équipe du meilleur candidat, son score et le nombre de
+    candidats évalués. Les mesures sont ajoutées à `stats` s'il est fourni.
+    Si `weights` est actif, les critères de postes entrent dans le score
+    (voir scoring.score_assignments), ainsi que les pénalités des paires
+    `pairs`. Chaque candidat est proposé à `top_k` s'il est fourni. La
+    recherche s'arrête dès qu'un candidat passe sous le score `target`.
+    `progress` est appelé avec l'affectation et le score de chaque nouveau
+    meilleur candidat.
+    """
+    if np_rng is None:
+        np_rng = np.random.default_rng()
+    if stats is None:
+        stats = SolverStats()
     best_score = float("inf")
-    best_distribution = None
+    best_assignment = None
     iterations_without_improvement = 0
+    iteration = 0
+    stats.stop_reason = STOP_MAX_ITERATIONS
 
-    for iteration in range(max_iterations):
-        # Regrouper les joueurs par position
-        players_by_position = defaultdict(list)
-        for player in players:
-            players_by_position[player.poste].append(player)
+    while iteration < max_iterations:
+        if best_assignment is not None:
+            if deadline is not None and time.perf_counter() >= deadline:
+                stats.stop_reason = STOP_DEADLINE
+                break
+            if stop_event is not None and stop_event.is_set():
+                stats.stop_reason = STOP_INTERRUPTED
+                break
 
-        # Distribuer les joueurs équitablement par position
-        ordered_players = distribute_players_by_position(players_by_position, num_teams)
-        teams = create_distribution(ordered_players, distribution_plan)
-        score = evaluate_distribution(teams)
+        # Générer un lot de candidats, chacun représenté par l'ordre des joueurs
+        start = time.perf_counter()
+        size = min(batch_size, max_iterations - iteration)
+        orders = _sample_orders(position_groups, num_teams, size, np_rng)
+        sampled = time.perf_counter()
 
-        if score < best_score:
-            best_score = score
-            best_distribution = teams
-            iterations_without_improvement = 0
+        # Affectation joueur -> sous-équipe, puis évaluation du lot en une passe
+        assignments = np.empty_like(orders)
+        np.put_along_axis(
+            assignments, orders, np.broadcast_to(slot_of_rank, orders.shape), axis=1
+        )
+        assigned = time.perf_counter()
+        scores = score_assignments(
+            assignments,
+            levels,
+            num_teams,
+            num_subteams,
+            poste_codes,
+            weights,
+            caps,
+            pairs,
+        )
+        scored = time.perf_counter()
+
+        stats.add_time("sampling", sampled - start)
+        stats.add_time("assignment", assigned - sampled)
+        stats.add_time("scoring", scored - assigned)
+
+        for assignment, score in zip(assignments, scores):
+            iteration += 1
+            if top_k is not None:
+                top_k.offer(assignment, score)
+            if score < best_score:
+                best_score = score
+                best_assignment = assignment
+                iterations_without_improvement = 0
+                stats.record(stats.iterations + iteration, best_score)
+                if progress is not None:
+                    progress(best_assignment, best_score)
+            else:
+                iterations_without_improvement += 1
+
+            # Conditions d'arrêt
+            if score < target:  # Solution très satisfaisante trouvée
+                stats.stop_reason = STOP_SATISFYING_SCORE
+                break
+            # Pas d'amélioration depuis longtemps
+            if iterations_without_improvement > 100:
+                stats.stop_reason = STOP_NO_IMPROVEMENT
+                break
         else:
-            iterations_without_improvement += 1
+            continue
+        break
+
+    stats.iterations += iteration
+    return best_assignment, best_score, iteration
+
+
+def _search_chain(
+    levels: np.ndarray,
+    poste_codes: np.ndarray,
+    position_groups: List[np.ndarray],
+    slot_of_rank: np.ndarray,
+    num_teams: int,
+    num_subteams: int,
+    max_iterations: int,
+    batch_size: int,
+    strategy: str,
+    time_budget_ms: Optional[float],
+    weights: Optional[BalanceWeights] = None,
+    poste_labels: Optional[List[str]] = None,
+    pair_matrix: Optional[np.ndarray] = None,
+    lower_bound: float = 0.0,
+    gap: float = DEFAULT_SCORE_GAP,
+    seed: Optional[int] = None,
+    stop_event=None,
+    stats: Optional[SolverStats] = None,
+    top_k: Optional[TopK] = None,
+    progress: Optional[Callable[[Sequence[int], float], None]] = None,
+):
+    """
+    Chaîne de recherche heuristique complète : tirages aléatoires puis, selon
+    la stratégie, amélioration par échanges. Retourne l'affectation joueur ->
+    sous-équipe de la meilleure répartition trouvée, son score et le nombre
+    de candidats et d'échanges évalués.
+
+    Chaque chaîne utilise ses propres générateurs aléatoires, initialisés par
+    `seed`. Les mesures sont ajoutées à `stats` s'il est fourni. `weights`
+    ajoute les critères de postes, `poste_labels` donnant le nom de chaque code ;
+    `pair_matrix` les pénalités des paires de joueurs réunies.
+
+    Les tirages s'arrêtent dès qu'un candidat est à moins de `gap` du
+    minorant `lower_bound`, les échanges dès qu'ils atteignent ce minorant.
+    `progress` est appelé avec l'affectation et le score de chaque nouvelle
+    meilleure répartition.
+
+    Si `top_k` (vide) est fourni, les meilleurs candidats distincts servent de
+    points de départ à des recherches locales (voir _refine_alternatives),
+    qui disposent de ALTERNATIVES_BUDGET_SHARE du budget de temps ; `top_k`
+    reçoit les répartitions affinées. Avec "random", il reçoit les candidats.
+    """
+    if stats is None:
+        stats = SolverStats()
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    deadline = search_deadline = None
+    if time_budget_ms is not None:
+        deadline = search_deadline = time.perf_counter() + time_budget_ms / 1000
+        if top_k is not None:
+            search_deadline -= ALTERNATIVES_BUDGET_SHARE * time_budget_ms / 1000
+    candidates = None
+    if top_k is not None:
+        candidates = TopK(
+            top_k.k, top_k.num_slots, top_k.num_subteams, top_k.min_diversity
+        )
+
+    best_assignment, best_score, iterations = _random_search(
+        position_groups,
+        slot_of_rank,
+        levels,
+        num_teams,
+        num_subteams,
+        max_iterations,
+        batch_size,
+        search_deadline,
+        np_rng,
+        stop_event,
+        stats,
+        poste_codes,
+        weights,
+        weights.caps_for(poste_labels) if weights is not None else None,
+        candidates,
+        matrix_pairs(pair_matrix) if pair_matrix is not None else None,
+        lower_bound + gap,
+        progress,
+    )
+    if best_assignment is None:
+        return best_assignment, best_score, iterations
+    if strategy == "random":
+        if top_k is not None:
+            top_k.merge(candidates.entries())
+        return best_assignment, best_score, iterations
+
+    def make_state(assignment: Sequence[int]) -> SwapState:
+        return SwapState(
+            assignment,
+            levels,
+            poste_codes,
+            num_teams,
+            num_subteams,
+            weights,
+            poste_labels,
+            pair_matrix=pair_matrix,
+        )
+
+    start = time.perf_counter()
+    state = make_state(best_assignment)
+
+    def on_improvement(improved: SwapState):
+        stats.record(stats.iterations + improved.evaluations, improved.score)
+        if progress is not None:
+            progress(improved.assignment, improved.score)
+
+    # Inutile de chercher sous le minorant
+    target = lower_bound + SCORE_TOLERANCE
+    if strategy in ("local", "exact"):
+        local_search(
+            state,
+            rng,
+            deadline=search_deadline,
+            stop_event=stop_event,
+            on_improvement=on_improvement,
+            target=target,
+        )
+        best_assignment, best_score = state.assignment, state.score
+    elif strategy == "annealing":
+        best_assignment, best_score = simulated_annealing(
+            state,
+            search_deadline,
+            rng,
+            stop_event=stop_event,
+            on_improvement=on_improvement,
+            target=target,
+        )
+    else:
+        best_assignment, best_score = tabu_search(
+            state,
+            search_deadline,
+            rng,
+            stop_event=stop_event,
+            on_improvement=on_improvement,
+            target=target,
+        )
+    stats.iterations += state.evaluations
+    iterations += state.evaluations
+    stats.add_time("refinement", time.perf_counter() - start)
+
+    if top_k is not None:
+        start = time.perf_counter()
+        evaluations = _refine_alternatives(
+            top_k,
+            [assignment for assignment, _ in candidates.entries()],
+            best_assignment,
+            best_score,
+            make_state,
+            rng,
+            deadline,
+            stop_event,
+        )
+        stats.iterations += evaluations
+        iterations += evaluations
+        stats.add_time("alternatives", time.perf_counter() - start)
+        # Une alternative affinée peut battre la meilleure répartition
+        assignment, score = top_k.entries()[0]
+        if score < best_score:
+            best_assignment, best_score = list(assignment), score
+            stats.record(stats.iterations, best_score)
+            if progress is not None:
+                progress(best_assignment, best_score)
+    return best_assignment, best_score, iterations
+
 
-        # Conditions d'arrêt
-        if score < 50:  # Solution très satisfaisante trouvée
+def _refine_alternatives(
+    top_k: TopK,
+    starts: List[np.ndarray],
+    best_assignment: Sequence[int],
+    best_score: float,
+    make_state: Callable[[Sequence[int]], SwapState],
+    rng: random.Random,
+    deadline: Optional[float] = None,
+    stop_event=None,
+) -> int:
+    """
+    Remplit `top_k` de répartitions distinctes menées chacune à un optimum
+    local : la meilleure répartition, chacun des points de départ `starts`,
+    puis des relances depuis la meilleure répartition perturbée par des
+    échanges aléatoires, jusqu'à ce que `top_k` soit plein. Au-delà de
+    ALTERNATIVE_RESTARTS relances par alternative demandée, l'effectif est
+    jugé trop petit pour en fournir davantage. Retourne le nombre d'échanges
+    évalués.
+    """
+    top_k.offer(best_assignment, best_score)
+    perturbation = max(2, len(best_assignment) // 3)
+    evaluations = 0
+    for attempt in range(len(starts) + ALTERNATIVE_RESTARTS * top_k.k):
+        if attempt >= len(starts) and len(top_k) >= top_k.k:
+            break
+        if stop_event is not None and stop_event.is_set():
             break
-        if iterations_without_improvement > 100:  # Pas d'amélioration depuis longtemps
+        if deadline is not None and time.perf_counter() >= deadline:
             break
+        if attempt < len(starts):
+            state = make_state(starts[attempt])
+        else:
+            state = make_state(best_assignment)
+            for _ in range(perturbation):
+                move = state.random_swap(rng)
+                if move is not None:
+                    state.apply_swap(*move)
+        local_search(
+            state,
+            rng,
+            patience=ALTERNATIVE_PATIENCE,
+            deadline=deadline,
+            stop_event=stop_event,
+        )
+        evaluations += state.evaluations
+        top_k.offer(state.assignment, state.score)
+    return evaluations
+
+
+_worker_stop_event = None
+
+# Pool de processus partagé par les recherches parallèles, créé au premier
+# besoin : démarrer des processus coûte plus cher qu'une recherche courte
+_pool = None
+_pool_workers = 0
+_pool_stop_event = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(stop_event):
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _get_pool(workers: int):
+    """
+    Pool d'au moins `workers` processus et son signal d'arrêt partagé,
+    recréé s'il est trop petit. À appeler en tenant _pool_lock.
+    """
+    global _pool, _pool_workers, _pool_stop_event
+    if _pool is None or _pool_workers < workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool_stop_event = multiprocessing.Event()
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(_pool_stop_event,)
+        )
+        _pool_workers = workers
+    return _pool, _pool_stop_event
+
+
+def _shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(_shutdown_pool)
+
+
+def _worker_chain(
+    chain_args: tuple,
+    seed: int,
+    top_k: Optional[TopK] = None,
+    target: float = DEFAULT_SCORE_GAP,
+):
+    """
+    Chaîne exécutée dans un processus de travail ; prévient les autres si elle
+    passe sous le score `target`. `top_k` (vide) est rempli dans le processus
+    et retourné.
+    """
+    stats = SolverStats()
+    assignment, score, iterations = _search_chain(
+        *chain_args, seed, _worker_stop_event, stats, top_k
+    )
+    if assignment is not None and score < target:
+        _worker_stop_event.set()
+    return assignment, score, iterations, stats, top_k
+
+
+def _parallel_search(
+    chain_args: tuple,
+    workers: int,
+    seed: Optional[int] = None,
+    stats: Optional[SolverStats] = None,
+    top_k: Optional[TopK] = None,
+    target: float = DEFAULT_SCORE_GAP,
+    external_stop=None,
+):
+    """
+    Lance `workers` chaînes de recherche indépendantes dans des processus
+    séparés, chacune avec sa propre graine dérivée de `seed`, et retourne la
+    meilleure solution avec le nombre total d'évaluations. Dès qu'une chaîne
+    passe sous le score `target`, les autres sont interrompues et retournent leur
+    meilleure solution courante.
+
+    `stats` reçoit la somme des durées de phase et des évaluations de toutes
+    les chaînes, ainsi que la trajectoire et la condition d'arrêt de la meilleure.
+    `top_k` reçoit les meilleures répartitions distinctes de toutes les chaînes.
+    Lever `external_stop` (threading.Event) interrompt toutes les chaînes.
+
+    Les processus sont réutilisés d'un appel à l'autre (voir _get_pool) ; les
+    recherches parallèles simultanées s'exécutent l'une après l'autre, car
+    elles partagent le signal d'arrêt des processus.
+    """
+    global _pool
+    seeds = np.random.SeedSequence(seed).generate_state(workers).tolist()
+    best_assignment, best_score = None, float("inf")
+    total_iterations = 0
+
+    with _pool_lock:
+        executor, stop_event = _get_pool(workers)
+        # Toutes les chaînes de l'appel précédent sont terminées
+        stop_event.clear()
+        try:
+            pending = {
+                executor.submit(_worker_chain, chain_args, seed, top_k, target)
+                for seed in seeds
+            }
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                if external_stop is not None and external_stop.is_set():
+                    stop_event.set()
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    result = future.result()
+                    assignment, score, iterations, chain_stats, chain_top_k = result
+                    total_iterations += iterations
+                    if top_k is not None:
+                        top_k.merge(chain_top_k.entries())
+                    if stats is not None:
+                        for phase, seconds in chain_stats.phase_seconds.items():
+                            stats.add_time(phase, seconds)
+                        stats.iterations += chain_stats.iterations
+                    if assignment is not None and score < best_score:
+                        best_assignment, best_score = assignment, score
+                        if stats is not None:
+                            stats.trajectory = chain_stats.trajectory
+                            stats.stop_reason = chain_stats.stop_reason
+                if best_score < target:
+                    stop_event.set()
+                    for future in pending:
+                        future.cancel()
+        except BrokenProcessPool:
+            # Un processus a disparu : le pool sera recréé au prochain appel
+            _pool = None
+            raise
+
+    return best_assignment, best_score, total_iterations
+
+
+@dataclass
+class Solution:
+    """Résultat d'une recherche de répartition."""
+
+    teams: List[Team]
+    score: float
+    strategy: str  # Moteur effectivement utilisé
+    optimal: bool = False  # Vrai si le score est prouvé minimal
+    iterations: int = 0  # Candidats et échanges évalués par la recherche heuristique
+    stats: Optional[SolverStats] = None  # Mesures détaillées, si demandées
+    moved: int = 0  # Joueurs changés de sous-équipe par repair_distribution
+    # Meilleures répartitions distinctes (équipes, score), la solution en tête
+    alternatives: List[Tuple[List[Team], float]] = field(default_factory=list)
+    lower_bound: float = 0.0  # Minorant du score de toute répartition
+
+    @property
+    def gap(self) -> float:
+        """Écart entre le score et son minorant : l'amélioration encore possible."""
+        return self.score - self.lower_bound
+
+
+def solve(
+    players: List[Player],
+    num_teams: int,
+    num_subteams: int,
+    max_iterations: int = 1000,
+    batch_size: int = SCORING_BATCH_SIZE,
+    strategy: str = "auto",
+    time_budget_ms: Optional[float] = None,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    cache: Optional[ResultCache] = default_cache,
+    collect_stats: bool = False,
+    weights: Optional[BalanceWeights] = None,
+    alternatives: int = 0,
+    min_diversity: float = DEFAULT_MIN_DIVERSITY,
+    pair_penalties: Optional[PairPenalties] = None,
+    gap: float = DEFAULT_SCORE_GAP,
+    on_improvement: Optional[Callable[[Solution], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[Solution]:
+    """
+    Répartit les joueurs en équipes et sous-équipes équilibrées.
+
+    `strategy` choisit le moteur de recherche :
+    - "random" : tirages aléatoires successifs (comportement historique) ;
+    - "local" : part du meilleur tirage aléatoire puis l'améliore par échanges
+      de joueurs de même poste entre équipes et sous-équipes ;
+    - "annealing" : recuit simulé, qui accepte des échanges dégradants selon
+      une température décroissante ;
+    - "tabu" : recherche tabou, qui interdit temporairement de redéplacer les
+      joueurs qui viennent de bouger ;
+    - "exact" : part du résultat de "local" puis recherche la répartition
+      optimale (voir exact.solve_exact), dans la limite de EXACT_MAX_NODES nœuds ;
+    - "auto" : "exact" jusqu'à EXACT_MAX_PLAYERS joueurs de niveaux entiers
+      (et si la grille le permet, voir exact.exact_supported), "local" au-delà.
+
+    Les échanges entre équipes se font toujours entre joueurs de même poste :
+    la répartition des postes entre équipes issue de
+    distribute_players_by_position est conservée.
+
+    `time_budget_ms` borne la durée totale de l'appel, résolution exacte
+    comprise : la meilleure répartition trouvée est retournée à l'échéance
+    (condition d'arrêt STOP_DEADLINE si la résolution exacte est abandonnée).
+    Les moteurs "annealing" et "tabu" ne s'arrêtent qu'à l'échéance et
+    utilisent DEFAULT_TIME_BUDGET_MS si aucun budget n'est donné ; avec un
+    budget plus court, ils n'apportent guère plus que "local".
+
+    Avec `workers` > 1, autant de chaînes de recherche indépendantes sont
+    lancées en parallèle dans des processus séparés et la meilleure est
+    retenue ; toutes s'arrêtent dès que l'une est à moins de `gap` du minorant.
+
+    `seed` initialise des générateurs aléatoires propres à la recherche : avec
+    un seul processus et sans budget de temps, un même effectif donne alors
+    toujours la même répartition. Les résultats obtenus avec une graine sont
+    conservés dans `cache` (None pour le désactiver), indexés par l'empreinte
+    de l'effectif et des paramètres, et retournés directement ensuite.
+
+    Avec `collect_stats`, la solution porte un SolverStats : durée de chaque
+    phase, évolution du meilleur score et condition d'arrêt.
+
+    `weights` (BalanceWeights) ajoute au score des critères de composition
+    des sous-équipes : maximum par poste (un gardien par défaut) et
+    répartition proportionnelle des postes. Les moteurs par échanges peuvent
+    alors aussi échanger deux joueurs de postes différents d'une même équipe.
+
+    Avec `alternatives` > 0, la solution propose `alternatives`
+    répartitions, la sienne en tête, distinctes à la numérotation des
+    équipes près et éloignées d'au moins `min_diversity` les unes des autres
+    (voir alternatives.TopK). Chacune est menée à un optimum local (voir
+    _refine_alternatives), sauf avec "random". Il y en a moins seulement si
+    l'effectif est trop petit pour fournir assez de répartitions distinctes
+    après ALTERNATIVE_RESTARTS relances par alternative, ou si le budget de
+    temps est épuisé avant.
+
+    `pair_penalties` pénalise les paires de joueurs (reconnus par leur
+    prénom) réunies dans une même sous-équipe, par exemple selon l'historique
+    des séances (voir history.HistoryStore) pour faire tourner les
+    coéquipières. Ce terme échappe à la résolution exacte : "exact" et
+    "auto" se limitent alors à "local".
+
+    Avant la recherche, un minorant du score est calculé à partir des
+    niveaux et des effectifs prévus (voir scoring.score_lower_bound) : les
+    tirages aléatoires s'arrêtent dès qu'un candidat est à moins de `gap` de
+    ce minorant, les moteurs par échanges dès qu'ils l'atteignent, et une
+    solution qui l'atteint est optimale sans résolution exacte. La solution
+    indique le minorant (`lower_bound`) et l'écart restant (`gap`).
+
+    `on_improvement` reçoit une Solution provisoire à chaque nouvelle
+    meilleure répartition de la recherche heuristique (avec `workers` = 1) ;
+    lever `stop_event` arrête la recherche, qui retourne alors sa meilleure
+    répartition courante. Voir iter_solutions.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"Stratégie inconnue : {strategy!r} (attendu : {', '.join(STRATEGIES)})"
+        )
+
+    if weights is not None and not weights.active:
+        weights = None
+
+    # Le budget de temps couvre tout l'appel, résolution exacte comprise
+    deadline = None
+    if time_budget_ms is not None:
+        deadline = time.perf_counter() + time_budget_ms / 1000
+
+    cache_key = None
+    if seed is not None and cache is not None:
+        # Sans critères de postes, l'empreinte reste celle des versions précédentes
+        extra = {"weights": weights} if weights is not None else {}
+        if alternatives > 0:
+            extra.update(alternatives=alternatives, min_diversity=min_diversity)
+        if pair_penalties is not None:
+            extra["pair_penalties"] = pair_penalties.fingerprint()
+        cache_key = roster_hash(
+            players,
+            **extra,
+            num_teams=num_teams,
+            num_subteams=num_subteams,
+            max_iterations=max_iterations,
+            batch_size=batch_size,
+            strategy=strategy,
+            time_budget_ms=time_budget_ms,
+            workers=workers,
+            seed=seed,
+            gap=gap,
+        )
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return Solution(
+                teams_from_entry(entry["teams"], players),
+                entry["score"],
+                entry["strategy"],
+                entry["optimal"],
+                stats=SolverStats(stop_reason=STOP_CACHED) if collect_stats else None,
+                alternatives=[
+                    (teams_from_entry(teams, players), score)
+                    for teams, score in entry.get("alternatives", [])
+                ],
+                lower_bound=entry.get("lower_bound", 0.0),
+            )
+
+    stats = SolverStats() if collect_stats else None
+    start = time.perf_counter()
+    roster = Roster(players)
+    if stats is not None:
+        stats.add_time("grouping", time.perf_counter() - start)
+    total_players = len(roster)
+    integer_levels = bool(np.all(np.mod(roster.levels, 1) == 0))
+    pair_matrix = None
+    if pair_penalties is not None:
+        names = [player.prénom for player in roster.players]
+        pair_matrix = pair_penalties.aligned(names)
+        if not np.any(pair_matrix):
+            pair_matrix = None
+    if pair_matrix is not None and strategy in ("auto", "exact"):
+        strategy = "local"
+    if strategy == "auto":
+        if (
+            total_players <= EXACT_MAX_PLAYERS
+            and integer_levels
+            and exact_supported(
+                roster.levels.tolist(),
+                roster.poste_codes.tolist(),
+                num_teams * num_subteams,
+            )
+        ):
+            strategy = "exact"
+        else:
+            strategy = "local"
+
+    if time_budget_ms is None and strategy in ("annealing", "tabu"):
+        time_budget_ms = DEFAULT_TIME_BUDGET_MS
+
+    distribution_plan = calculate_optimal_distribution(
+        total_players, num_teams, num_subteams
+    )
+    slot_of_rank = plan_slots(distribution_plan, num_subteams, total_players)
+    slot_counts = np.bincount(slot_of_rank, minlength=num_teams * num_subteams).tolist()
+
+    start = time.perf_counter()
+    lower_bound = score_lower_bound(
+        roster.levels,
+        slot_counts,
+        num_teams,
+        num_subteams,
+        roster.poste_codes,
+        weights,
+        roster.poste_labels,
+    )
+    if stats is not None:
+        stats.add_time("bound", time.perf_counter() - start)
+
+    chain_args = (
+        roster.levels,
+        roster.poste_codes,
+        roster.position_groups,
+        slot_of_rank,
+        num_teams,
+        num_subteams,
+        max_iterations,
+        batch_size,
+        strategy,
+        time_budget_ms,
+        weights,
+        roster.poste_labels,
+        pair_matrix,
+        lower_bound,
+        gap,
+    )
+
+    progress = None
+    if on_improvement is not None:
+
+        def progress(assignment: Sequence[int], score: float):
+            on_improvement(
+                Solution(
+                    roster.build_teams(assignment, num_teams, num_subteams),
+                    float(score),
+                    strategy,
+                    lower_bound=float(lower_bound),
+                )
+            )
+
+    top_k = None
+    if alternatives > 0:
+        top_k = TopK(
+            alternatives, num_teams * num_subteams, num_subteams, min_diversity
+        )
+
+    if workers > 1:
+        best_assignment, best_score, iterations = _parallel_search(
+            chain_args, workers, seed, stats, top_k, lower_bound + gap, stop_event
+        )
+    else:
+        best_assignment, best_score, iterations = _search_chain(
+            *chain_args, seed, stop_event, stats, top_k, progress
+        )
+    if best_assignment is None:
+        return None
+
+    # Le minorant atteint, la solution est optimale sans autre calcul
+    optimal = bool(best_score <= lower_bound + SCORE_TOLERANCE)
+    interrupted = stop_event is not None and stop_event.is_set()
+    if strategy == "exact" and integer_levels and not optimal and not interrupted:
+        start = time.perf_counter()
+        result = None
+        if deadline is None or start < deadline:
+            result = solve_exact(
+                roster.levels.astype(int).tolist(),
+                roster.poste_codes.tolist(),
+                slot_counts,
+                num_teams,
+                num_subteams,
+                incumbent=(list(best_assignment), best_score),
+                weights=weights,
+                poste_labels=roster.poste_labels,
+                deadline=deadline,
+            )
+        if result is not None:
+            best_assignment, best_score = result
+            optimal = True
+        if stats is not None:
+            stats.add_time("exact", time.perf_counter() - start)
+            if optimal:
+                stats.record(stats.iterations, best_score)
+            elif deadline is not None and time.perf_counter() >= deadline:
+                # Budget épuisé : la meilleure répartition heuristique est retournée
+                stats.stop_reason = STOP_DEADLINE
+
+    start = time.perf_counter()
+    teams = roster.build_teams(best_assignment, num_teams, num_subteams)
+    solution = Solution(
+        teams,
+        float(best_score),
+        strategy,
+        optimal,
+        iterations,
+        stats,
+        lower_bound=float(lower_bound),
+    )
+    if top_k is not None:
+        # La solution retenue en tête, puis les autres répartitions distinctes
+        top_k.offer(best_assignment, best_score)
+        signature = canonical_signature(list(best_assignment), num_subteams)
+        others = [
+            (roster.build_teams(assignment, num_teams, num_subteams), float(score))
+            for assignment, score in top_k.entries()
+            if canonical_signature(assignment.tolist(), num_subteams) != signature
+        ]
+        solution.alternatives = [(teams, solution.score)] + others[: alternatives - 1]
+    if stats is not None:
+        stats.add_time("teams", time.perf_counter() - start)
+    # Une recherche interrompue n'a pas fini son travail : pas de mise en cache
+    if cache_key is not None and not interrupted:
+        cache.put(
+            cache_key,
+            {
+                "teams": teams_to_entry(teams),
+                "score": solution.score,
+                "strategy": solution.strategy,
+                "optimal": solution.optimal,
+                "alternatives": [
+                    [teams_to_entry(teams), score]
+                    for teams, score in solution.alternatives
+                ],
+                "lower_bound": solution.lower_bound,
+            },
+        )
+    return solution
+
+
+def distribute_players(
+    players: List[Player],
+    num_teams: int,
+    num_subteams: int,
+    max_iterations: int = 1000,
+    batch_size: int = SCORING_BATCH_SIZE,
+    strategy: str = "auto",
+    time_budget_ms: Optional[float] = None,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    cache: Optional[ResultCache] = default_cache,
+    weights: Optional[BalanceWeights] = None,
+) -> List[Team]:
+    """Répartit les joueurs en équipes équilibrées : voir solve."""
+    solution = solve(
+        players,
+        num_teams,
+        num_subteams,
+        max_iterations,
+        batch_size,
+        strategy,
+        time_budget_ms,
+        workers,
+        seed,
+        cache,
+        weights=weights,
+    )
+    return solution.teams if solution is not None else None
+
+
+def _score_with_moves(
+    trials: np.ndarray,
+    home: np.ndarray,
+    roster: Roster,
+    num_teams: int,
+    num_subteams: int,
+    weights: Optional[BalanceWeights],
+    caps: Optional[List[float]],
+    move_cost: float,
+) -> np.ndarray:
+    """
+    Score d'un lot d'affectations des premiers joueurs de `roster`, coût des
+    joueurs déplacés compris.
+    """
+    size = trials.shape[1]
+    scores = score_assignments(
+        trials,
+        roster.levels[:size],
+        num_teams,
+        num_subteams,
+        roster.poste_codes[:size],
+        weights,
+        caps,
+    )
+    home = home[:size]
+    return scores + move_cost * ((trials != home) & (home >= 0)).sum(axis=1)
+
+
+def _balanced_counts(counts: np.ndarray) -> bool:
+    """
+    Vrai si les effectifs des équipes, et des sous-équipes d'une même équipe,
+    ne diffèrent que d'un joueur au plus (`counts` : équipes x sous-équipes).
+    """
+    return np.ptp(counts.sum(axis=1)) <= 1 and bool(np.all(np.ptp(counts, axis=1) <= 1))
+
+
+def _relocations(
+    assignment: np.ndarray, num_teams: int, num_subteams: int
+) -> np.ndarray:
+    """
+    Affectations obtenues en transférant un seul joueur vers une sous-équipe
+    comptant un joueur de moins que la sienne : les effectifs s'échangent
+    entre les deux sous-équipes, qui doivent rester équilibrés (voir
+    _balanced_counts). Retourne un tableau (transferts x joueurs).
+    """
+    num_slots = num_teams * num_subteams
+    slot_counts = np.bincount(assignment, minlength=num_slots)
+    trials = []
+    for source in range(num_slots):
+        for target in np.flatnonzero(slot_counts == slot_counts[source] - 1):
+            counts = slot_counts.copy()
+            counts[source] -= 1
+            counts[target] += 1
+            if not _balanced_counts(counts.reshape(num_teams, num_subteams)):
+                continue
+            for player_index in np.flatnonzero(assignment == source):
+                trial = assignment.copy()
+                trial[player_index] = target
+                trials.append(trial)
+    if not trials:
+        return np.empty((0, len(assignment)), dtype=np.intp)
+    return np.array(trials, dtype=np.intp)
+
+
+def repair_distribution(
+    teams: List[Team],
+    added: List[Player] = (),
+    removed: List[Player] = (),
+    weights: Optional[BalanceWeights] = None,
+    move_cost: float = DEFAULT_MOVE_COST,
+    seed: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+) -> Optional[Solution]:
+    """
+    Rééquilibre une répartition existante après l'arrivée des joueurs `added`
+    et le départ des joueurs `removed`, en déplaçant le moins de joueurs
+    possible, au lieu de tout recalculer avec solve.
+
+    Les joueurs retirés sont reconnus par prénom, poste et niveau. Chaque
+    nouveau joueur rejoint la sous-équipe la moins fournie de l'équipe la
+    moins fournie où il équilibre le mieux les niveaux ; des joueurs sont
+    ensuite transférés des sous-équipes les plus fournies vers les moins
+    fournies jusqu'à ce que les effectifs des équipes, et des sous-équipes
+    d'une même équipe, ne diffèrent plus que d'un joueur. Une recherche
+    locale améliore enfin l'équilibre, chaque joueur éloigné de sa
+    sous-équipe d'origine coûtant `move_cost` : échanges de joueurs (voir
+    search.local_search) en alternance avec des transferts d'un joueur entre
+    sous-équipes d'effectifs voisins, puis relances depuis la meilleure
+    répartition perturbée par quelques échanges aléatoires, jusqu'à
+    REPAIR_RESTARTS relances successives sans amélioration.
+
+    Retourne une Solution dont le score n'inclut pas le coût des
+    déplacements et dont `moved` compte les joueurs changés de sous-équipe,
+    ou None s'il ne reste aucun joueur. Lève ValueError si un joueur de
+    `removed` ne figure dans aucune équipe.
+    """
+    if weights is not None and not weights.active:
+        weights = None
+    num_teams = len(teams)
+    num_subteams = max((len(team.subteams) for team in teams), default=0)
+
+    # Joueurs restants avec leur sous-équipe d'origine, puis nouveaux joueurs
+    to_remove = Counter(player_key(player) for player in removed)
+    players, home = [], []
+    for team_id, team in enumerate(teams):
+        for subteam_id, subteam in enumerate(team.subteams):
+            for player in subteam:
+                key = player_key(player)
+                if to_remove[key] > 0:
+                    to_remove[key] -= 1
+                    continue
+                players.append(player)
+                home.append(team_id * num_subteams + subteam_id)
+    missing = [key[0] for key, count in to_remove.items() for _ in range(count)]
+    if missing:
+        raise ValueError(f"Joueurs absents des équipes : {', '.join(missing)}")
+    num_placed = len(players)
+    players.extend(added)
+    home.extend([-1] * len(added))
+    if not players:
+        return None
+
+    roster = Roster(players)
+    home = np.array(home, dtype=np.intp)
+    assignment = home.copy()
+    caps = weights.caps_for(roster.poste_labels) if weights is not None else None
+    slot_counts = np.bincount(home[:num_placed], minlength=num_teams * num_subteams)
+
+    def best_trial(trials: np.ndarray) -> int:
+        scores = _score_with_moves(
+            trials, home, roster, num_teams, num_subteams, weights, caps, move_cost
+        )
+        return int(np.argmin(scores))
+
+    # Nouveaux joueurs : sous-équipes les moins fournies des équipes les moins fournies
+    for player_index in range(num_placed, len(players)):
+        counts = slot_counts.reshape(num_teams, num_subteams)
+        team_counts = counts.sum(axis=1)
+        targets = np.array(
+            [
+                team_id * num_subteams + subteam_id
+                for team_id in np.flatnonzero(team_counts == team_counts.min())
+                for subteam_id in np.flatnonzero(
+                    counts[team_id] == counts[team_id].min()
+                )
+            ],
+            dtype=np.intp,
+        )
+        trials = np.repeat(assignment[None, : player_index + 1], len(targets), axis=0)
+        trials[:, player_index] = targets
+        target = targets[best_trial(trials)]
+        assignment[player_index] = target
+        slot_counts[target] += 1
+
+    # Effectifs : transferts de la sous-équipe la plus fournie vers la moins fournie
+    while True:
+        counts = slot_counts.reshape(num_teams, num_subteams)
+        team_counts = counts.sum(axis=1)
+        if team_counts.max() - team_counts.min() > 1:
+            source_team, target_team = np.argmax(team_counts), np.argmin(team_counts)
+        else:
+            unbalanced = np.flatnonzero(np.ptp(counts, axis=1) > 1)
+            if not len(unbalanced):
+                break
+            source_team = target_team = unbalanced[0]
+        source = source_team * num_subteams + np.argmax(counts[source_team])
+        target = target_team * num_subteams + np.argmin(counts[target_team])
+
+        candidates = np.flatnonzero(assignment == source)
+        trials = np.repeat(assignment[None, :], len(candidates), axis=0)
+        trials[np.arange(len(candidates)), candidates] = target
+        assignment[candidates[best_trial(trials)]] = target
+        slot_counts[source] -= 1
+        slot_counts[target] += 1
+
+    # Recherche locale, chaque déplacement supplémentaire ayant un coût
+    deadline = None
+    if time_budget_ms is not None:
+        deadline = time.perf_counter() + time_budget_ms / 1000
+    rng = random.Random(seed)
+    evaluations = 0
+
+    def out_of_time() -> bool:
+        return deadline is not None and time.perf_counter() >= deadline
+
+    def descend(assignment: np.ndarray) -> SwapState:
+        """Échanges puis transferts de joueurs, jusqu'à un optimum local."""
+        nonlocal evaluations
+        while True:
+            state = SwapState(
+                assignment,
+                roster.levels,
+                roster.poste_codes,
+                num_teams,
+                num_subteams,
+                weights,
+                roster.poste_labels,
+                home=home,
+                move_cost=move_cost,
+            )
+            local_search(state, rng, patience=REPAIR_PATIENCE, deadline=deadline)
+            evaluations += state.evaluations
+            assignment = np.array(state.assignment, dtype=np.intp)
+            trials = _relocations(assignment, num_teams, num_subteams)
+            if not len(trials) or out_of_time():
+                return state
+            scores = _score_with_moves(
+                trials, home, roster, num_teams, num_subteams, weights, caps, move_cost
+            )
+            evaluations += len(trials)
+            best = int(np.argmin(scores))
+            if scores[best] >= state.score - SCORE_TOLERANCE:
+                return state
+            assignment = trials[best]
+
+    state = descend(assignment)
+    perturbation = max(2, len(players) // 10)
+    failures = 0
+    while failures < REPAIR_RESTARTS and not out_of_time():
+        shaken = SwapState(
+            state.assignment,
+            roster.levels,
+            roster.poste_codes,
+            num_teams,
+            num_subteams,
+            weights,
+            roster.poste_labels,
+        )
+        for _ in range(perturbation):
+            move = shaken.random_swap(rng)
+            if move is not None:
+                shaken.apply_swap(*move)
+        candidate = descend(np.array(shaken.assignment, dtype=np.intp))
+        if candidate.score < state.score - SCORE_TOLERANCE:
+            state, failures = candidate, 0
+        else:
+            failures += 1
+
+    final = np.array(state.assignment, dtype=np.intp)
+    return Solution(
+        roster.build_teams(final, num_teams, num_subteams),
+        float(state.score - state.move_penalty),
+        "repair",
+        iterations=evaluations,
+        moved=int(((final != home) & (home >= 0)).sum()),
+    )
+
+
+def iter_solutions(
+    players: List[Player],
+    num_teams: int,
+    num_subteams: int,
+    stop_event: Optional[threading.Event] = None,
+    heartbeat: Optional[float] = None,
+    **options,
+) -> Iterator[Solution]:
+    """
+    Version « au fil de l'eau » de solve : la recherche s'exécute dans un
+    thread et chaque nouvelle meilleure répartition est produite dès qu'elle
+    est trouvée, sous forme de Solution provisoire. La dernière Solution
+    produite est le résultat définitif de solve (optimalité, alternatives,
+    mesures).
+
+    Lever `stop_event` arrête la recherche : sa meilleure répartition est
+    alors produite en dernier. Fermer le générateur avant la fin (ou
+    l'abandonner) lève `stop_event` et attend la fin du thread ; une
+    recherche menée à son terme ne le lève pas, il peut donc resservir.
+
+    Avec `heartbeat` (en secondes), la dernière Solution produite l'est de
+    nouveau après chaque `heartbeat` sans amélioration : l'appelant reprend
+    ainsi régulièrement la main, par exemple pour que Streamlit traite un
+    clic qui interrompt le script. Les `options` sont celles de solve.
+    """
+    if stop_event is None:
+        stop_event = threading.Event()
+    updates = queue.Queue()
+    finished = False
+    last = None
+
+    def on_improvement(provisional: Solution):
+        updates.put(("progress", provisional))
+
+    def run():
+        try:
+            solution = solve(
+                players,
+                num_teams,
+                num_subteams,
+                on_improvement=on_improvement,
+                stop_event=stop_event,
+                **options,
+            )
+            updates.put(("final", solution))
+        except BaseException as error:  # noqa: BLE001 - relancée dans l'appelant
+            updates.put(("error", error))
 
-    return best_distribution
+    thread = threading.Thread(target=run, name="iter_solutions", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                kind, value = updates.get(timeout=heartbeat)
+            except queue.Empty:
+                if last is not None:
+                    yield last
+                continue
+            if kind == "error":
+                finished = True
+                raise value
+            if kind == "final":
+                finished = True
+                if value is not None:
+                    yield value
+                return
+            last = value
+            yield value
+    finally:
+        if not finished:
+            stop_event.set()
+        thread.join()
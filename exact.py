@@ -0,0 +1,574 @@
+# exact.py
+import sys
+import time
+from collections import defaultdict
+from math import ceil, floor, inf, sqrt
+from typing import List, Optional, Sequence, Tuple
+from scoring import (
+    DEVIATION_THRESHOLD,
+    BalanceWeights,
+    level_penalty,
+    position_bounds,
+    score_totals,
+)
+
+# Taille maximale d'effectif pour laquelle la résolution exacte est tentée
+EXACT_MAX_PLAYERS = 25
+
+# Nombre maximal de nœuds explorés avant d'abandonner la résolution exacte
+EXACT_MAX_NODES = 50_000
+
+# Nombre de nœuds explorés entre deux vérifications de l'échéance
+EXACT_DEADLINE_CHECK_INTERVAL = 256
+
+# Appels laissés libres sur la pile de l'appelant de la résolution exacte
+EXACT_STACK_MARGIN = 200
+
+# Marge sur les comparaisons de scores, pour absorber les erreurs d'arrondi
+SCORE_TOLERANCE = 1e-9
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _box_penalty_bound(
+    lows: List[float], highs: List[float], mean: Optional[float] = None
+) -> float:
+    """
+    Minorant de calculate_level_penalty pour des valeurs comprises chacune
+    dans un intervalle [low, high]. La variance vaut au moins la moyenne des
+    carrés des distances de la moyenne `mean` aux intervalles ; si la moyenne
+    n'est pas connue, seule l'étendue minimale des valeurs est exploitée.
+    """
+    if mean is None:
+        spread = max(lows) - min(highs)
+        if spread <= 0:
+            return 0
+        # Étendue r : écart-type d'au moins r / sqrt(2n), écart maximal d'au moins r / 2
+        variance = spread**2 / (2 * len(lows))
+        max_deviation = spread / 2
+    else:
+        distances = [max(low - mean, mean - high, 0) for low, high in zip(lows, highs)]
+        variance = sum(distance**2 for distance in distances) / len(distances)
+        max_deviation = max(distances)
+
+    bound = sqrt(variance) * 50
+    if max_deviation > DEVIATION_THRESHOLD:
+        bound += (max_deviation * 2) ** 2 * 100
+    return bound
+
+
+def exact_supported(
+    levels: Sequence[int], postes: Sequence[str], num_slots: int
+) -> bool:
+    """
+    Vrai si la résolution exacte tient dans la limite de récursion de Python.
+    _ExactSolver.realize s'appelle une fois par sous-équipe pour chaque
+    classe (poste, niveau) : une grille bien plus grande que l'effectif
+    dépasserait la pile.
+    """
+    num_classes = len(set(zip(postes, levels)))
+    depth = num_classes * (num_slots + 3) + num_slots
+    return depth + EXACT_STACK_MARGIN < sys.getrecursionlimit()
+
+
+class _ExactSolver:
+    """
+    Résolution exacte en deux temps. Le score ne dépend que de la somme des
+    niveaux de chaque sous-équipe : on énumère d'abord les vecteurs de sommes
+    possibles, à symétries près, dont le score bat la meilleure solution
+    connue ; on cherche ensuite, par ordre de score croissant, le premier
+    vecteur réalisable par une affectation des joueurs. Le nombre total de
+    nœuds explorés est borné par `max_nodes`, et la durée par l'échéance
+    facultative `deadline` (time.perf_counter()).
+
+    Si `weights` est actif, la pénalité de composition des sous-équipes ne
+    dépend que du nombre de joueurs de chaque poste par sous-équipe : la
+    seconde étape cherche alors, pour chaque vecteur, l'affectation de
+    pénalité minimale.
+    """
+
+    def __init__(
+        self,
+        levels: Sequence[int],
+        postes: Sequence[str],
+        slot_counts: Sequence[int],
+        num_teams: int,
+        num_subteams: int,
+        max_nodes: int,
+        weights: Optional[BalanceWeights] = None,
+        poste_labels: Optional[Sequence[str]] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.levels = [int(level) for level in levels]
+        self.slot_counts = list(slot_counts)
+        self.num_teams = num_teams
+        self.num_subteams = num_subteams
+        self.num_slots = num_teams * num_subteams
+        self.total_level = sum(self.levels)
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = 0
+
+        # Classes de joueurs interchangeables (poste, niveau), postes à la suite
+        members_by_class = defaultdict(list)
+        for player_index, (poste, level) in enumerate(zip(postes, self.levels)):
+            members_by_class[(poste, level)].append(player_index)
+        self.classes = sorted(
+            members_by_class.items(), key=lambda item: (item[0][0], -item[0][1])
+        )
+
+        # Chaque équipe reçoit floor(n / nb_équipes) à ceil(n / nb_équipes)
+        # joueurs de chaque poste
+        position_totals = defaultdict(int)
+        for poste in postes:
+            position_totals[poste] += 1
+        self.position_bounds = {
+            poste: (floor(total / num_teams), ceil(total / num_teams))
+            for poste, total in position_totals.items()
+        }
+
+        # Critères de composition : maximum et part proportionnelle de chaque
+        # poste par sous-équipe
+        self.weights = weights if weights is not None and weights.active else None
+        if self.weights is not None:
+            postes_list = list(position_totals)
+            labels = [
+                poste_labels[poste] if poste_labels is not None else poste
+                for poste in postes_list
+            ]
+            lows, highs = position_bounds(
+                [position_totals[poste] for poste in postes_list], self.slot_counts
+            )
+            self.slot_position_bounds = {
+                poste: [
+                    (lows[slot][p], highs[slot][p]) for slot in range(self.num_slots)
+                ]
+                for p, poste in enumerate(postes_list)
+            }
+            self.position_caps = dict(zip(postes_list, self.weights.caps_for(labels)))
+
+        # Niveaux restant à placer à partir de chaque classe, triés, sous forme
+        # de sommes cumulées : bornes des sommes atteignables par k places
+        self.remaining_prefix_sums = []
+        for class_index in range(len(self.classes) + 1):
+            remaining = sorted(
+                level
+                for (_, level), members in self.classes[class_index:]
+                for _ in members
+            )
+            prefix = [0]
+            for level in remaining:
+                prefix.append(prefix[-1] + level)
+            self.remaining_prefix_sums.append(prefix)
+
+        # Sous-équipes et équipes de même effectif sont interchangeables
+        self.slot_twins = [-1] * self.num_slots
+        for slot in range(self.num_slots):
+            for other in range(slot - slot % num_subteams, slot):
+                if self.slot_counts[other] == self.slot_counts[slot]:
+                    self.slot_twins[slot] = other
+        team_profiles = [
+            self._team_slice(self.slot_counts, t) for t in range(num_teams)
+        ]
+        self.team_twins = [-1] * num_teams
+        for t in range(num_teams):
+            for other in range(t):
+                if team_profiles[other] == team_profiles[t]:
+                    self.team_twins[t] = other
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _BudgetExceeded
+        if (
+            self.deadline is not None
+            and self.nodes % EXACT_DEADLINE_CHECK_INTERVAL == 0
+            and time.perf_counter() >= self.deadline
+        ):
+            raise _BudgetExceeded
+
+    def _team_slice(self, values: Sequence, team_id: int) -> list:
+        start = team_id * self.num_subteams
+        return list(values[start : start + self.num_subteams])
+
+    def _reachable(self, prefix: List[int], capacity: int) -> Optional[Tuple[int, int]]:
+        """Sommes minimale et maximale de `capacity` niveaux parmi ceux restants."""
+        count = len(prefix) - 1
+        if capacity > count:
+            return None
+        return prefix[capacity], prefix[-1] - prefix[count - capacity]
+
+    # Étape 1 : vecteurs de sommes par sous-équipe
+
+    def _partial_bound(self, vector: List[int], assigned: int, ranges) -> float:
+        """
+        Minorant du score d'un vecteur dont les `assigned` premières sommes
+        sont fixées.
+        """
+        num_teams, num_subteams = self.num_teams, self.num_subteams
+        lows = vector[:assigned] + [low for low, _ in ranges[assigned:]]
+        highs = vector[:assigned] + [high for _, high in ranges[assigned:]]
+
+        def averages(low_values, high_values, sizes):
+            low_avgs = [
+                low / size if size else 0 for low, size in zip(low_values, sizes)
+            ]
+            high_avgs = [
+                high / size if size else 0 for high, size in zip(high_values, sizes)
+            ]
+            # La moyenne des moyennes est connue si les effectifs sont égaux
+            mean = None
+            if len(set(sizes)) == 1 and sizes[0]:
+                mean = self.total_level / (sizes[0] * len(sizes))
+            return low_avgs, high_avgs, mean
+
+        team_lows = [sum(self._team_slice(lows, t)) for t in range(num_teams)]
+        team_highs = [sum(self._team_slice(highs, t)) for t in range(num_teams)]
+        team_sizes = [
+            sum(self._team_slice(self.slot_counts, t)) for t in range(num_teams)
+        ]
+
+        bound = _box_penalty_bound(*averages(team_lows, team_highs, team_sizes))
+        bound += (
+            _box_penalty_bound(team_lows, team_highs, self.total_level / num_teams)
+            * 0.5
+        )
+        bound += sum(
+            level_penalty(
+                [
+                    total / size if size else 0
+                    for total, size in zip(
+                        self._team_slice(vector, t),
+                        self._team_slice(self.slot_counts, t),
+                    )
+                ]
+            )
+            for t in range(assigned // num_subteams)
+        ) * 2
+        bound += _box_penalty_bound(*averages(lows, highs, self.slot_counts)) * 1.5
+        return bound
+
+    def sum_vectors(self, best_score: float) -> List[Tuple[float, List[int]]]:
+        """
+        Vecteurs de sommes par sous-équipe, à symétries près, dont le score
+        est strictement inférieur à `best_score`, triés par score croissant.
+        """
+        prefix = self.remaining_prefix_sums[0]
+        ranges = [self._reachable(prefix, count) for count in self.slot_counts]
+        suffix_lows = [0] * (self.num_slots + 1)
+        suffix_highs = [0] * (self.num_slots + 1)
+        for slot in range(self.num_slots - 1, -1, -1):
+            suffix_lows[slot] = suffix_lows[slot + 1] + ranges[slot][0]
+            suffix_highs[slot] = suffix_highs[slot + 1] + ranges[slot][1]
+
+        vector = [0] * self.num_slots
+        candidates = []
+
+        def visit(slot: int, remaining: int):
+            self._tick()
+            if slot == self.num_slots:
+                score = score_totals(
+                    vector, self.slot_counts, self.num_teams, self.num_subteams
+                )
+                if score < best_score:
+                    candidates.append((score, list(vector)))
+                return
+
+            low = max(ranges[slot][0], remaining - suffix_highs[slot + 1])
+            high = min(ranges[slot][1], remaining - suffix_lows[slot + 1])
+            if self.slot_twins[slot] >= 0:
+                low = max(low, vector[self.slot_twins[slot]])
+
+            team_id = slot // self.num_subteams
+            team_complete = (slot + 1) % self.num_subteams == 0
+            team_twin = self.team_twins[team_id]
+            for value in range(low, high + 1):
+                vector[slot] = value
+                if team_complete:
+                    if team_twin >= 0 and (
+                        self._team_slice(vector, team_id)
+                        < self._team_slice(vector, team_twin)
+                    ):
+                        continue
+                    if self._partial_bound(vector, slot + 1, ranges) >= best_score:
+                        continue
+                visit(slot + 1, remaining - value)
+
+        visit(0, self.total_level)
+        candidates.sort(key=lambda candidate: candidate[0])
+        return candidates
+
+    # Étape 2 : affectation des joueurs réalisant un vecteur de sommes
+
+    def _position_penalty(self, poste, slot_position_counts: List[int]) -> float:
+        """Pénalité de composition due au poste `poste`, sur toutes les sous-équipes."""
+        cap = self.position_caps[poste]
+        excess = spread = 0
+        for count, (low, high) in zip(
+            slot_position_counts, self.slot_position_bounds[poste]
+        ):
+            if count > cap:
+                excess += count - cap
+            spread += max(low - count, count - high, 0)
+        return excess * self.weights.cap_weight + spread * self.weights.spread_weight
+
+    def realize(
+        self, targets: List[int], budget: float = inf
+    ) -> Optional[Tuple[List[int], float]]:
+        """
+        Affectation joueur -> sous-équipe atteignant les sommes `targets` et
+        sa pénalité de composition, ou None. Sans critères de postes, la
+        première affectation trouvée est retournée ; sinon, celle de pénalité
+        minimale, à condition qu'elle soit inférieure à `budget`.
+        """
+        num_slots, num_subteams = self.num_slots, self.num_subteams
+        weighted = self.weights is not None
+        capacities = list(self.slot_counts)
+        remaining = list(targets)
+        team_position_counts = [0] * self.num_teams
+        slot_position_counts = [0] * num_slots
+        placements = []  # (sous-équipe, nombre) par classe placée
+        # Plus petite pénalité accumulée avec laquelle chaque état a été exploré
+        visited = {}
+        penalty = [0.0]
+        best = {"penalty": budget, "placements": None}
+
+        def slot_state(slot: int):
+            if weighted:
+                return (
+                    capacities[slot],
+                    remaining[slot],
+                    slot_position_counts[slot],
+                    self.slot_counts[slot],
+                )
+            return capacities[slot], remaining[slot]
+
+        def place_class(class_index: int) -> bool:
+            if class_index == len(self.classes):
+                best["penalty"] = penalty[0]
+                best["placements"] = [list(placement) for placement in placements]
+                # Inutile de chercher mieux qu'une pénalité nulle
+                return not weighted or penalty[0] <= SCORE_TOLERANCE
+
+            team_states = [
+                (
+                    team_position_counts[t],
+                    tuple(
+                        sorted(
+                            slot_state(slot)
+                            for slot in range(t * num_subteams, (t + 1) * num_subteams)
+                        )
+                    ),
+                )
+                for t in range(self.num_teams)
+            ]
+            key = (class_index, tuple(sorted(team_states)))
+            previous = visited.get(key)
+            if previous is not None and penalty[0] >= previous:
+                return False
+            visited[key] = penalty[0]
+
+            # Symétries entre sous-équipes et équipes dans le même état
+            slot_twins = [-1] * num_slots
+            for slot in range(num_slots):
+                for other in range(slot - slot % num_subteams, slot):
+                    if slot_state(other) == slot_state(slot):
+                        slot_twins[slot] = other
+            team_twins = [-1] * self.num_teams
+            for t in range(self.num_teams):
+                for other in range(t):
+                    if team_states[other] == team_states[t]:
+                        team_twins[t] = other
+
+            (poste, level), members = self.classes[class_index]
+            context = {
+                "class_index": class_index,
+                "poste": poste,
+                "level": level,
+                "next_prefix": self.remaining_prefix_sums[class_index + 1],
+                "slot_twins": slot_twins,
+                "team_twins": team_twins,
+                "counts": [0] * num_slots,
+                "team_totals": [0] * self.num_teams,
+            }
+            placements.append([])
+            if fill(context, 0, len(members)):
+                return True
+            placements.pop()
+            return False
+
+        def fill(context: dict, slot: int, left: int) -> bool:
+            self._tick()
+            if slot == num_slots:
+                return left == 0 and finish_class(
+                    context["class_index"], context["poste"]
+                )
+
+            level = context["level"]
+            counts = context["counts"]
+            team_totals = context["team_totals"]
+            team_id = slot // num_subteams
+
+            max_count = min(
+                left,
+                capacities[slot],
+                remaining[slot] // level if level > 0 else left,
+                self.position_bounds[context["poste"]][1]
+                - team_position_counts[team_id],
+            )
+            if context["slot_twins"][slot] >= 0:
+                max_count = min(max_count, counts[context["slot_twins"][slot]])
+            team_twin = context["team_twins"][team_id]
+            if team_twin >= 0:
+                max_count = min(
+                    max_count, team_totals[team_twin] - team_totals[team_id]
+                )
+
+            for count in range(max_count, -1, -1):
+                # La sous-équipe doit rester complétable par les classes suivantes
+                reachable = self._reachable(
+                    context["next_prefix"], capacities[slot] - count
+                )
+                target = remaining[slot] - count * level
+                if reachable is None or not reachable[0] <= target <= reachable[1]:
+                    continue
+
+                capacities[slot] -= count
+                remaining[slot] -= count * level
+                team_position_counts[team_id] += count
+                slot_position_counts[slot] += count
+                team_totals[team_id] += count
+                counts[slot] = count
+                if count:
+                    placements[-1].append((slot, count))
+
+                if fill(context, slot + 1, left - count):
+                    return True
+
+                if count:
+                    placements[-1].pop()
+                capacities[slot] += count
+                remaining[slot] += count * level
+                team_position_counts[team_id] -= count
+                slot_position_counts[slot] -= count
+                team_totals[team_id] -= count
+            counts[slot] = 0
+            return False
+
+        def finish_class(class_index: int, poste: str) -> bool:
+            next_index = class_index + 1
+            same_poste = (
+                next_index < len(self.classes)
+                and self.classes[next_index][0][0] == poste
+            )
+            if same_poste:
+                return place_class(next_index)
+
+            # Dernière classe du poste : vérifier le minimum par équipe,
+            # puis repartir de zéro pour le poste suivant
+            lower = self.position_bounds[poste][0]
+            if any(count < lower for count in team_position_counts):
+                return False
+            added = 0
+            if weighted:
+                added = self._position_penalty(poste, slot_position_counts)
+            if penalty[0] + added >= best["penalty"]:
+                return False
+
+            saved_counts = list(team_position_counts)
+            saved_slot_counts = list(slot_position_counts)
+            team_position_counts[:] = [0] * self.num_teams
+            slot_position_counts[:] = [0] * num_slots
+            penalty[0] += added
+            if place_class(next_index):
+                return True
+            penalty[0] -= added
+            team_position_counts[:] = saved_counts
+            slot_position_counts[:] = saved_slot_counts
+            return False
+
+        place_class(0)
+        if best["placements"] is None:
+            return None
+
+        assignment = [0] * len(self.levels)
+        for (_, members), placement in zip(self.classes, best["placements"]):
+            members = iter(members)
+            for slot, count in placement:
+                for _ in range(count):
+                    assignment[next(members)] = slot
+        return assignment, best["penalty"]
+
+
+def solve_exact(
+    levels: Sequence[int],
+    postes: Sequence[str],
+    slot_counts: Sequence[int],
+    num_teams: int,
+    num_subteams: int,
+    max_nodes: int = EXACT_MAX_NODES,
+    incumbent: Optional[Tuple[List[int], float]] = None,
+    weights: Optional[BalanceWeights] = None,
+    poste_labels: Optional[Sequence[str]] = None,
+    deadline: Optional[float] = None,
+) -> Optional[Tuple[List[int], float]]:
+    """
+    Recherche la répartition de score minimal parmi celles où chaque équipe
+    reçoit entre floor(n / nb_équipes) et ceil(n / nb_équipes) joueurs de
+    chaque poste. `slot_counts` donne l'effectif de chaque sous-équipe
+    (équipe * nb_sous_équipes + sous-équipe) et les niveaux doivent être entiers.
+
+    `incumbent` (affectation, score), par exemple issu d'une recherche
+    heuristique, ne sert qu'à élaguer la recherche : la répartition retournée
+    ne dépend pas de lui, ce qui rend le résultat reproductible. Il n'est
+    retourné que si aucune répartition respectant les contraintes de postes
+    ne l'égale.
+
+    Si `weights` est actif, le score inclut les critères de composition des
+    sous-équipes (`poste_labels` donnant le nom de chaque poste quand
+    `postes` contient des codes) : les vecteurs de sommes sont parcourus tant
+    que leur score de niveaux reste inférieur au meilleur score complet. Le
+    résultat peut alors être `incumbent` lui-même s'il est déjà optimal.
+
+    Retourne l'affectation joueur -> sous-équipe et son score, optimal par
+    construction, ou None si aucune répartition ne respecte les contraintes
+    ou si plus de `max_nodes` nœuds ont été explorés, ou si l'échéance
+    `deadline` (time.perf_counter()) est dépassée, ou si la grille est trop
+    grande pour la pile (voir exact_supported).
+    """
+    if not exact_supported(levels, postes, num_teams * num_subteams):
+        return None
+    solver = _ExactSolver(
+        levels,
+        postes,
+        slot_counts,
+        num_teams,
+        num_subteams,
+        max_nodes,
+        weights,
+        poste_labels,
+        deadline,
+    )
+    best_score = float("inf")
+    if incumbent is not None:
+        best_score = incumbent[1] + SCORE_TOLERANCE
+    best = incumbent
+
+    try:
+        for score, vector in solver.sum_vectors(best_score):
+            if score >= best_score:
+                break
+            result = solver.realize(vector, best_score - score)
+            if result is None:
+                continue
+            assignment, penalty = result
+            if solver.weights is None:
+                return assignment, score
+            best_score = score + penalty
+            best = assignment, best_score
+    except _BudgetExceeded:
+        return None
+
+    return best
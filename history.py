@@ -0,0 +1,214 @@
+# history.py
+import datetime
+import json
+import os
+import sqlite3
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scoring import PairPenalties
+
+# Fichier SQLite utilisé par défaut pour l'historique des séances, à côté des
+# modules : l'application et la ligne de commande partagent le même historique
+# quel que soit le répertoire de lancement
+DEFAULT_HISTORY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "historique.sqlite3"
+)
+
+# Variable d'environnement qui remplace DEFAULT_HISTORY_PATH
+HISTORY_PATH_ENV = "FCE_HISTORIQUE"
+
+# Pénalité proposée par défaut pour chaque séance déjà jouée ensemble
+DEFAULT_ROTATION_WEIGHT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    played_on TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_played_on ON sessions (played_on);
+
+CREATE TABLE IF NOT EXISTS lineups (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    team INTEGER NOT NULL,
+    subteam INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lineups_player ON lineups (player, session_id);
+CREATE INDEX IF NOT EXISTS lineups_session ON lineups (session_id);
+
+-- Matrice de co-occurrence matérialisée : séances jouées dans une même
+-- sous-équipe, par paire de joueurs (player_a < player_b)
+CREATE TABLE IF NOT EXISTS pairs (
+    player_a TEXT NOT NULL,
+    player_b TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_played TEXT NOT NULL,
+    PRIMARY KEY (player_a, player_b)
+) WITHOUT ROWID;
+"""
+
+
+def history_path() -> str:
+    """Chemin de l'historique : HISTORY_PATH_ENV, à défaut DEFAULT_HISTORY_PATH."""
+    return os.environ.get(HISTORY_PATH_ENV) or DEFAULT_HISTORY_PATH
+
+
+def _subteam_pairs(lineup: Sequence[Tuple[str, int, int]]) -> List[Tuple[str, str]]:
+    """Paires (a, b), a < b, de joueurs d'une même sous-équipe."""
+    subteams: Dict[Tuple[int, int], List[str]] = {}
+    for player, team, subteam in lineup:
+        subteams.setdefault((team, subteam), []).append(player)
+    return [
+        pair
+        for members in subteams.values()
+        for pair in combinations(sorted(set(members)), 2)
+    ]
+
+
+class HistoryStore:
+    """
+    Historique des répartitions jouées, dans une base SQLite locale.
+
+    Chaque séance conserve la composition des sous-équipes (joueurs
+    identifiés par leur prénom). Le nombre de séances jouées ensemble par
+    chaque paire de joueurs est tenu à jour à chaque enregistrement ou
+    suppression : le lire ne dépend que des joueurs demandés, jamais de la
+    longueur de l'historique.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = history_path()
+        # Streamlit peut réexécuter le script dans un autre thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(
+        self,
+        team_data: Dict[str, Dict[int, List[dict]]],
+        played_on: Optional[datetime.date] = None,
+    ) -> int:
+        """
+        Enregistre une séance jouée avec les équipes `team_data` (format de
+        teams_to_data) et retourne son identifiant.
+        """
+        played_on = (played_on or datetime.date.today()).isoformat()
+        lineup = [
+            (player["prénom"], team_index, subteam_index)
+            for team_index, subteams in enumerate(team_data.values())
+            for subteam_index, players in enumerate(subteams.values())
+            for player in players
+        ]
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (played_on) VALUES (?)", (played_on,)
+            )
+            session_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO lineups VALUES (?, ?, ?, ?)",
+                [(session_id, *row) for row in lineup],
+            )
+            self.connection.executemany(
+                """
+                INSERT INTO pairs VALUES (?, ?, 1, ?)
+                ON CONFLICT (player_a, player_b) DO UPDATE SET
+                    count = count + 1,
+                    last_played = max(last_played, excluded.last_played)
+                """,
+                [(a, b, played_on) for a, b in _subteam_pairs(lineup)],
+            )
+        return session_id
+
+    def delete(self, session_id: int):
+        """
+        Supprime une séance et retire ses paires de la matrice de
+        co-occurrence ; la dernière séance commune de ces paires est
+        recalculée sur les séances restantes.
+        """
+        lineup = self.connection.execute(
+            "SELECT player, team, subteam FROM lineups WHERE session_id = ?",
+            (session_id,),
+        ).fetchall()
+        pairs = _subteam_pairs(lineup)
+        with self.connection:
+            self.connection.executemany(
+                """
+                UPDATE pairs SET count = count - 1
+                WHERE player_a = ? AND player_b = ?
+                """,
+                pairs,
+            )
+            self.connection.execute("DELETE FROM pairs WHERE count <= 0")
+            self.connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self.connection.executemany(
+                """
+                UPDATE pairs SET last_played = (
+                    SELECT max(sessions.played_on)
+                    FROM lineups AS a
+                    JOIN lineups AS b
+                      ON b.session_id = a.session_id
+                     AND b.team = a.team
+                     AND b.subteam = a.subteam
+                    JOIN sessions ON sessions.id = a.session_id
+                    WHERE a.player = pairs.player_a AND b.player = pairs.player_b
+                )
+                WHERE player_a = ? AND player_b = ?
+                """,
+                pairs,
+            )
+
+    def sessions(self, player: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Séances (identifiant, date), de la plus récente à la plus ancienne."""
+        if player is None:
+            query = """
+                SELECT id, played_on FROM sessions ORDER BY played_on DESC, id DESC
+            """
+            return self.connection.execute(query).fetchall()
+        query = """
+            SELECT sessions.id, sessions.played_on
+            FROM lineups JOIN sessions ON sessions.id = lineups.session_id
+            WHERE lineups.player = ?
+            ORDER BY sessions.played_on DESC, sessions.id DESC
+        """
+        return self.connection.execute(query, (player,)).fetchall()
+
+    def co_occurrence(self, names: Sequence[str]) -> np.ndarray:
+        """
+        Matrice symétrique du nombre de séances jouées dans une même
+        sous-équipe par chaque paire de joueurs `names`.
+        """
+        index = {name: position for position, name in enumerate(names)}
+        matrix = np.zeros((len(names), len(names)))
+        encoded = json.dumps(list(index), ensure_ascii=False)
+        rows = self.connection.execute(
+            """
+            SELECT player_a, player_b, count FROM pairs
+            WHERE player_a IN (SELECT value FROM json_each(?))
+              AND player_b IN (SELECT value FROM json_each(?))
+            """,
+            (encoded, encoded),
+        )
+        for a, b, count in rows:
+            matrix[index[a], index[b]] = matrix[index[b], index[a]] = count
+        return matrix
+
+    def pair_penalties(
+        self, names: Sequence[str], weight: float = DEFAULT_ROTATION_WEIGHT
+    ) -> PairPenalties:
+        """
+        Pénalités de rotation pour solve : `weight` par séance déjà jouée
+        ensemble.
+        """
+        names = list(dict.fromkeys(names))
+        return PairPenalties(names, self.co_occurrence(names) * weight)
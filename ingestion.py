@@ -0,0 +1,159 @@
+# ingestion.py
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from player import Player
+
+# Colonnes attendues dans le fichier des joueurs
+REQUIRED_COLUMNS = ("prénom", "poste", "niveau", "présence")
+
+# Valeur de la colonne présence indiquant un joueur disponible
+PRESENT_MARK = "X"
+
+# Nombre de fichiers analysés conservés en mémoire par read_roster_bytes
+ROSTER_CACHE_MAX_ENTRIES = 16
+
+_roster_cache = OrderedDict()
+_roster_cache_lock = threading.Lock()
+
+
+def _normalize_column_name(name) -> str:
+    return str(name).strip().lower()
+
+
+def read_roster(
+    source: Union[str, BinaryIO], filename: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Lit un fichier Excel, CSV ou Parquet en une seule passe et retourne les
+    colonnes attendues, normalisées.
+
+    `source` est un chemin ou un fichier ouvert (par exemple l'objet renvoyé
+    par st.file_uploader) ; `filename` permet de préciser l'extension quand
+    elle ne peut pas être déduite de `source`. Seules les colonnes utiles sont
+    chargées, openpyxl lisant le classeur en mode lecture seule.
+    """
+    if filename is None:
+        filename = source if isinstance(source, str) else getattr(source, "name", "")
+
+    def wanted(column) -> bool:
+        return _normalize_column_name(column) in REQUIRED_COLUMNS
+
+    extension = os.path.splitext(str(filename))[1].lower()
+    if extension == ".csv":
+        df = pd.read_csv(source, usecols=wanted, dtype=str, keep_default_na=False)
+    elif extension == ".parquet":
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_excel(source, usecols=wanted, engine="openpyxl")
+
+    return normalize_roster(df)
+
+
+def roster_cache_key(data: bytes, filename: str) -> str:
+    """Empreinte du contenu d'un fichier et de son extension, qui fixe le format."""
+    extension = os.path.splitext(filename)[1].lower()
+    return hashlib.sha256(extension.encode("utf-8") + b"\0" + data).hexdigest()
+
+
+def read_roster_bytes(data: bytes, filename: str) -> pd.DataFrame:
+    """
+    read_roster pour un fichier déjà chargé en mémoire (par exemple
+    uploaded_file.getvalue()). Le tableau normalisé est conservé, indexé par
+    l'empreinte du contenu : un même fichier n'est analysé qu'une fois, quels
+    que soient la session ou le nom sous lequel il est envoyé. Les
+    ROSTER_CACHE_MAX_ENTRIES fichiers les plus récents sont conservés.
+
+    Retourne une copie, que l'appelant peut modifier. Les erreurs
+    (ValueError) ne sont pas mises en cache.
+    """
+    key = roster_cache_key(data, filename)
+    with _roster_cache_lock:
+        df = _roster_cache.get(key)
+        if df is not None:
+            _roster_cache.move_to_end(key)
+    if df is None:
+        df = read_roster(io.BytesIO(data), filename)
+        with _roster_cache_lock:
+            _roster_cache[key] = df
+            _roster_cache.move_to_end(key)
+            while len(_roster_cache) > ROSTER_CACHE_MAX_ENTRIES:
+                _roster_cache.popitem(last=False)
+    return df.copy()
+
+
+def clear_roster_cache():
+    with _roster_cache_lock:
+        _roster_cache.clear()
+
+
+def normalize_roster(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valide et normalise un tableau de joueurs :
+    - noms de colonnes sans espaces ni majuscules ;
+    - prénom et poste en texte sans espaces superflus ;
+    - niveau numérique (entier si toutes les valeurs le sont) ;
+    - présence booléenne (vraie pour "X", quelle que soit la casse).
+
+    Les lignes sans prénom sont ignorées. Lève ValueError si une colonne
+    manque ou si un niveau n'est pas un nombre.
+    """
+    df = df.rename(columns=_normalize_column_name)
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    df = df.loc[:, ~df.columns.duplicated()]
+    prénoms = df["prénom"].fillna("").astype(str).str.strip()
+    df = df[prénoms != ""]
+    prénoms = prénoms[prénoms != ""]
+
+    niveaux = pd.to_numeric(df["niveau"], errors="coerce")
+    invalid = niveaux.isna()
+    if invalid.any():
+        # Numéros de ligne tels qu'affichés dans le tableur (en-tête en ligne 1)
+        rows = ", ".join(str(row + 2) for row in df.index[invalid][:10])
+        raise ValueError(f"Niveau invalide ou manquant aux lignes : {rows}")
+    if np.all(np.mod(niveaux.to_numpy(dtype=float), 1) == 0):
+        niveaux = niveaux.astype(int)
+
+    return pd.DataFrame(
+        {
+            "prénom": prénoms,
+            "poste": df["poste"].fillna("").astype(str).str.strip(),
+            "niveau": niveaux,
+            "présence": df["présence"].fillna("").astype(str).str.strip().str.upper()
+            == PRESENT_MARK,
+        }
+    ).reset_index(drop=True)
+
+
+def split_players(df: pd.DataFrame) -> Tuple[List[Player], List[dict]]:
+    """
+    Sépare un tableau normalisé en joueurs disponibles (objets Player) et
+    joueurs non disponibles (dictionnaires prénom/poste/niveau).
+    """
+    present = df["présence"].to_numpy(dtype=bool)
+    available = df[present]
+    players = [
+        Player(prénom, poste, niveau)
+        for prénom, poste, niveau in zip(
+            available["prénom"].tolist(),
+            available["poste"].tolist(),
+            available["niveau"].tolist(),
+        )
+    ]
+    non_disponibles = df.loc[~present, ["prénom", "poste", "niveau"]].to_dict("records")
+    return players, non_disponibles
+
+
+def load_players(
+    source: Union[str, BinaryIO], filename: Optional[str] = None
+) -> Tuple[List[Player], List[dict]]:
+    """Lit un fichier de joueurs et le sépare en disponibles / non disponibles."""
+    return split_players(read_roster(source, filename))
@@ -0,0 +1,141 @@
+# layout.py
+from typing import Dict, List, Sequence, Tuple
+from utils import get_team_color
+
+# En-tête du conteneur des joueurs non disponibles
+NON_DISPONIBLES_HEADER = "Non disponibles"
+
+# Clé du conteneur des joueurs non disponibles ; les sous-équipes ont pour clé
+# (nom d'équipe, n° de sous-équipe)
+NON_DISPONIBLES = None
+
+
+class TeamLayout:
+    """
+    Répartition modifiable par glisser-déposer, conservée dans st.session_state.
+
+    Chaque joueur reçoit un identifiant entier stable et une étiquette unique
+    pour streamlit-sortables ; les conteneurs ne stockent que des identifiants.
+    Les résultats du glisser-déposer sont relus par simple recherche
+    étiquette -> identifiant, sans analyse de texte ni copie des joueurs.
+    La répartition initiale est conservée sous forme de tuples immuables.
+    """
+
+    __slots__ = (
+        "players",
+        "labels",
+        "label_to_id",
+        "containers",
+        "headers",
+        "header_to_key",
+        "initial",
+    )
+
+    def __init__(
+        self, team_data: Dict[str, Dict[int, List[dict]]], non_disponibles: List[dict]
+    ):
+        players = []
+        containers = {}
+        for team_name, subteams in team_data.items():
+            for subteam_id, subteam in subteams.items():
+                start = len(players)
+                players.extend(subteam)
+                containers[(team_name, subteam_id)] = tuple(range(start, len(players)))
+        if non_disponibles:
+            start = len(players)
+            players.extend(non_disponibles)
+            containers[NON_DISPONIBLES] = tuple(range(start, len(players)))
+
+        self.players = tuple(players)
+        self.labels = _unique_labels(self.players)
+        self.label_to_id = {
+            label: player_id for player_id, label in enumerate(self.labels)
+        }
+        self.containers = containers
+        self.initial = tuple(containers.items())
+
+        team_index = {team_name: index for index, team_name in enumerate(team_data)}
+        self.headers = {}
+        for key in containers:
+            if key is NON_DISPONIBLES:
+                self.headers[key] = NON_DISPONIBLES_HEADER
+            else:
+                team_name, subteam_id = key
+                color_name, _ = get_team_color(team_index[team_name], len(team_index))
+                self.headers[key] = f"{color_name} - {subteam_id}"
+        self.header_to_key = {header: key for key, header in self.headers.items()}
+
+    def sortable_items(self) -> List[dict]:
+        """Conteneurs au format attendu par streamlit_sortables.sort_items."""
+        return [
+            {
+                "header": self.headers[key],
+                "items": [self.labels[player_id] for player_id in player_ids],
+            }
+            for key, player_ids in self.containers.items()
+        ]
+
+    def update(self, sorted_items: List[dict]) -> List[Tuple[int, object, object]]:
+        """
+        Applique le résultat de sort_items et retourne les déplacements
+        effectués : (identifiant du joueur, conteneur d'origine, conteneur
+        d'arrivée). Un changement d'ordre dans un conteneur n'est pas un
+        déplacement.
+        """
+        previous = {
+            player_id: key
+            for key, player_ids in self.containers.items()
+            for player_id in player_ids
+        }
+        containers = {}
+        moves = []
+        for item in sorted_items:
+            key = self.header_to_key[item["header"]]
+            player_ids = tuple(self.label_to_id[label] for label in item["items"])
+            containers[key] = player_ids
+            for player_id in player_ids:
+                if previous[player_id] != key:
+                    moves.append((player_id, previous[player_id], key))
+        self.containers = containers
+        return moves
+
+    def reset(self):
+        """Revient à la répartition initiale."""
+        self.containers = dict(self.initial)
+
+    def team_data(self) -> Dict[str, Dict[int, List[dict]]]:
+        """Équipes au format de teams_to_data, pour les statistiques et le PDF."""
+        team_data = {}
+        for key, player_ids in self.containers.items():
+            if key is NON_DISPONIBLES:
+                continue
+            team_name, subteam_id = key
+            team_data.setdefault(team_name, {})[subteam_id] = [
+                self.players[player_id] for player_id in player_ids
+            ]
+        return team_data
+
+    def non_disponibles(self) -> List[dict]:
+        return [
+            self.players[player_id]
+            for player_id in self.containers.get(NON_DISPONIBLES, ())
+        ]
+
+
+def player_label(player: dict) -> str:
+    return f"{player['prénom']} ({player['poste']}, {player['niveau']})"
+
+
+def _unique_labels(players: Sequence[dict]) -> Tuple[str, ...]:
+    """Étiquettes d'affichage, numérotées quand deux joueurs sont identiques."""
+    labels = []
+    used = set()
+    for player in players:
+        base = label = player_label(player)
+        number = 1
+        while label in used:
+            number += 1
+            label = f"{base} #{number}"
+        used.add(label)
+        labels.append(label)
+    return tuple(labels)
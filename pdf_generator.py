@@ -1,63 +1,77 @@
 # pdf_generator.py
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import (
+    SimpleDocTemplate,
+    Table,
+    TableStyle,
+    Paragraph,
+    Spacer,
+    PageBreak,
+)
 from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from utils import get_team_color
-import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import io
+import json
+import threading
+from xml.sax.saxutils import escape
 
-def create_pdf(teams, non_disponibles):
+# Nombre de PDF conservés en mémoire par le cache de rendu
+PDF_CACHE_MAX_ENTRIES = 32
+
+# Nombre de joueurs non disponibles par paragraphe : reportlab recoupe un
+# paragraphe à chaque saut de page, un seul paragraphe géant coûterait un
+# temps quadratique
+NON_DISPONIBLES_PER_PARAGRAPH = 40
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def pdf_cache_key(teams, non_disponibles):
     """
-    Génère un PDF avec les sous-équipes empilées verticalement par équipe,
-    avec des en-têtes colorés répétés pour chaque sous-équipe
+    Empreinte du contenu d'un PDF. L'ordre des équipes et des joueurs est
+    conservé : il détermine les couleurs et la mise en page.
     """
-    doc = SimpleDocTemplate(
-        "teams.pdf",
-        pagesize=landscape(A4),
-        rightMargin=0.5 * inch,
-        leftMargin=0.5 * inch,
-        topMargin=0.5 * inch,
-        bottomMargin=0.5 * inch,
+    payload = json.dumps(
+        [list(teams.items()), non_disponibles], ensure_ascii=False, default=str
     )
-    #  os.write(1, f"Mes teams sont {teams} !".encode())
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    # Identifier le nombre maximum de joueurs
-    max_players = max(
-        len(players) for team in teams.values() for players in team.values()
-    )
 
-    # Calculer le nombre maximal de sous-équipes parmi toutes les équipes
-    max_subteams = max(
-        max(len(team) for team in teams.values()) for team in teams.values()
-    )
+def clear_pdf_cache():
+    with _pdf_cache_lock:
+        _pdf_cache.clear()
 
-    # Préparer les données
-    data = []
 
-    # Créer les en-têtes des sous-équipes
-    for subteam_num in range(1, max_subteams + 1):
-        headers = []
-        for i in range(len(teams)):
-            team_name, _ = get_team_color(i, len(teams))
-            simple_name = team_name.replace("Équipe ", "").capitalize()
-            headers.append(f"{simple_name} {subteam_num}")
-        data.append(headers)
+@lru_cache(maxsize=None)
+def _stylesheet():
+    """Feuille de styles de reportlab, construite une seule fois."""
+    return getSampleStyleSheet()
 
-        # Remplir les données des joueurs de la sous-équipe
-        for i in range(max_players):
-            row = []
-            for team in teams.values():
-                if subteam_num in team and i < len(team[subteam_num]):
-                    row.append(team[subteam_num][i]["prénom"])
-                else:
-                    row.append("")
-            data.append(row)
 
-    # Créer le tableau
-    col_width = (A4[1] - inch) / (len(teams) + 1)
-    table = Table(data, colWidths=[col_width] * (len(teams) + 1))
+@lru_cache(maxsize=None)
+def _list_style():
+    """Style des paragraphes de la liste des non disponibles, sans espacement."""
+    return ParagraphStyle(
+        "ListeNonDisponibles",
+        parent=_stylesheet()["BodyText"],
+        spaceBefore=0,
+        spaceAfter=0,
+    )
+
 
+@lru_cache(maxsize=64)
+def _table_style(num_teams, max_subteams, max_players):
+    """
+    Style du tableau des équipes, qui ne dépend que de sa forme : il est
+    calculé une fois par combinaison (équipes, sous-équipes, joueurs).
+    """
     styles = [
         ("ALIGN", (0, 0), (-1, -1), "CENTER"),
         ("FONT", (0, 0), (-1, -1), "Helvetica", 10),
@@ -65,8 +79,8 @@ def create_pdf(teams, non_disponibles):
     ]
 
     # Ajouter les couleurs pour les en-têtes d'équipe
-    for i in range(len(teams)):
-        _, color = get_team_color(i, len(teams))
+    for i in range(num_teams):
+        _, color = get_team_color(i, num_teams)
         if isinstance(color, str):
             color = colors.HexColor(color)
 
@@ -98,7 +112,7 @@ def create_pdf(teams, non_disponibles):
             )
 
     # Ajouter des lignes verticales entre les équipes
-    for i in range(len(teams)):
+    for i in range(num_teams):
         styles.append(("LINEAFTER", (i, 0), (i, -1), 1, colors.black))
 
     # Ajouter une ligne horizontale entre les sous-équipes
@@ -113,26 +127,159 @@ def create_pdf(teams, non_disponibles):
             )
         )
 
-    table.setStyle(TableStyle(styles))
+    return TableStyle(styles)
+
+
+def _build_table(teams):
+    """Tableau des sous-équipes, empilées verticalement pour chaque équipe."""
+    # Identifier le nombre maximum de joueurs
+    max_players = max(
+        len(players) for team in teams.values() for players in team.values()
+    )
+
+    # Calculer le nombre maximal de sous-équipes parmi toutes les équipes
+    max_subteams = max(
+        max(len(team) for team in teams.values()) for team in teams.values()
+    )
+
+    # Préparer les données
+    data = []
+
+    # Créer les en-têtes des sous-équipes
+    for subteam_num in range(1, max_subteams + 1):
+        headers = []
+        for i in range(len(teams)):
+            team_name, _ = get_team_color(i, len(teams))
+            simple_name = team_name.replace("Équipe ", "").capitalize()
+            headers.append(f"{simple_name} {subteam_num}")
+        data.append(headers)
 
-    # Section pour les joueurs non disponibles
-    stylesheets = getSampleStyleSheet()
+        # Remplir les données des joueurs de la sous-équipe
+        for i in range(max_players):
+            row = []
+            for team in teams.values():
+                if subteam_num in team and i < len(team[subteam_num]):
+                    row.append(team[subteam_num][i]["prénom"])
+                else:
+                    row.append("")
+            data.append(row)
+
+    # Créer le tableau
+    col_width = (A4[1] - inch) / (len(teams) + 1)
+    table = Table(data, colWidths=[col_width] * (len(teams) + 1))
+    table.setStyle(_table_style(len(teams), max_subteams, max_players))
+    return table
+
+
+def _non_disponibles_section(non_disponibles):
+    """Section listant les joueurs non disponibles."""
+    stylesheets = _stylesheet()
     non_disponibles_section = [
         Spacer(1, 0.5 * inch),
         Paragraph("<b>Joueuses non disponibles :</b>", stylesheets["Heading3"]),
     ]
 
     if non_disponibles:
-        non_disponibles_text = "<br/>".join(
-            joueur["prénom"] for joueur in non_disponibles
-        )
-        non_disponibles_section.append(
-            Paragraph(non_disponibles_text, stylesheets["BodyText"])
-        )
+        names = [escape(str(joueur["prénom"])) for joueur in non_disponibles]
+        for start in range(0, len(names), NON_DISPONIBLES_PER_PARAGRAPH):
+            chunk = names[start : start + NON_DISPONIBLES_PER_PARAGRAPH]
+            non_disponibles_section.append(
+                Paragraph("<br/>".join(chunk), _list_style())
+            )
     else:
         non_disponibles_section.append(
             Paragraph("Aucun joueur non disponible.", stylesheets["BodyText"])
         )
+    return non_disponibles_section
+
+
+def _render(flowables, output=None):
+    """Construit le document en mémoire et retourne ses octets."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        rightMargin=0.5 * inch,
+        leftMargin=0.5 * inch,
+        topMargin=0.5 * inch,
+        bottomMargin=0.5 * inch,
+    )
+    doc.build(flowables)
+    pdf_bytes = buffer.getvalue()
+    if output is not None:
+        output.write(pdf_bytes)
+    return pdf_bytes
+
+
+def create_pdf(teams, non_disponibles, output=None, use_cache=True):
+    """
+    Génère un PDF avec les sous-équipes empilées verticalement par équipe,
+    avec des en-têtes colorés répétés pour chaque sous-équipe.
+
+    Le document est construit en mémoire et retourné sous forme d'octets ;
+    s'il est fourni, `output` (fichier ouvert en écriture binaire) le reçoit
+    également. Aucun fichier n'est écrit dans le répertoire courant.
+
+    Avec `use_cache`, un document identique déjà généré (même équipes, même
+    ordre, mêmes joueurs non disponibles) est retourné sans nouveau rendu.
+    """
+    key = pdf_cache_key(teams, non_disponibles) if use_cache else None
+    if key is not None:
+        with _pdf_cache_lock:
+            pdf_bytes = _pdf_cache.get(key)
+            if pdf_bytes is not None:
+                _pdf_cache.move_to_end(key)
+        if pdf_bytes is not None:
+            if output is not None:
+                output.write(pdf_bytes)
+            return pdf_bytes
 
     # Générer le PDF
-    doc.build([table] + non_disponibles_section)
+    pdf_bytes = _render(
+        [_build_table(teams)] + _non_disponibles_section(non_disponibles)
+    )
+
+    if key is not None:
+        with _pdf_cache_lock:
+            _pdf_cache[key] = pdf_bytes
+            _pdf_cache.move_to_end(key)
+            while len(_pdf_cache) > PDF_CACHE_MAX_ENTRIES:
+                _pdf_cache.popitem(last=False)
+
+    if output is not None:
+        output.write(pdf_bytes)
+    return pdf_bytes
+
+
+def create_pdf_batch(sessions, output=None, workers=None):
+    """
+    Génère un seul PDF de plusieurs pages pour une liste de séances.
+
+    Chaque séance est un dictionnaire avec les clés "teams" et
+    "non_disponibles" (même format que create_pdf) et, facultativement,
+    "title". Les tableaux sont construits en parallèle par `workers` threads,
+    puis chaque séance occupe sa propre section : titre, tableau et joueurs
+    non disponibles, précédée d'un saut de page.
+
+    Retourne les octets du document, écrits aussi dans `output` s'il est fourni.
+    """
+    sessions = list(sessions)
+    if not sessions:
+        raise ValueError("Aucune séance à exporter")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tables = list(
+            executor.map(lambda session: _build_table(session["teams"]), sessions)
+        )
+
+    stylesheets = _stylesheet()
+    flowables = []
+    for index, (session, table) in enumerate(zip(sessions, tables)):
+        if index > 0:
+            flowables.append(PageBreak())
+        title = session.get("title") or f"Séance {index + 1}"
+        flowables.append(Paragraph(title, stylesheets["Heading2"]))
+        flowables.append(table)
+        flowables.extend(_non_disponibles_section(session.get("non_disponibles")))
+
+    return _render(flowables, output)
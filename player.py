@@ -3,7 +3,8 @@ from dataclasses import dataclass
 
 @dataclass
 class Player:
+    __slots__ = ("prénom", "poste", "niveau")
+
     prénom: str
     poste: str  # G, D, Att, Ail, Mil
     niveau: int  # 1 à 4
-    
@@ -0,0 +1,119 @@
+# result_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import List, Optional, Sequence
+from player import Player
+from team import Team
+
+# Nombre de répartitions conservées en mémoire
+DEFAULT_MAX_ENTRIES = 128
+
+
+def player_key(player: Player) -> tuple:
+    """Identité d'un joueur dans le cache : (prénom, poste, niveau)."""
+    return (str(player.prénom), str(player.poste), float(player.niveau))
+
+
+def roster_hash(players: Sequence[Player], **params) -> str:
+    """
+    Empreinte canonique d'un effectif et des paramètres de répartition :
+    l'ordre des joueurs n'intervient pas.
+    """
+    payload = {
+        "players": sorted(player_key(player) for player in players),
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def teams_to_entry(teams: List[Team]) -> list:
+    """Forme sérialisable des équipes : listes de clés de joueurs par sous-équipe."""
+    return [
+        [[list(player_key(player)) for player in subteam] for subteam in team.subteams]
+        for team in teams
+    ]
+
+
+def teams_from_entry(entry: list, players: Sequence[Player]) -> List[Team]:
+    """Reconstruit les équipes d'une entrée du cache avec les objets `players`."""
+    available = defaultdict(list)
+    for player in players:
+        available[player_key(player)].append(player)
+
+    teams = []
+    for team_id, subteams in enumerate(entry):
+        team = Team(team_id, len(subteams))
+        for subteam_id, keys in enumerate(subteams):
+            for key in keys:
+                team.add_player_to_subteam(available[tuple(key)].pop(0), subteam_id)
+        teams.append(team)
+    return teams
+
+
+class ResultCache:
+    """
+    Cache LRU de répartitions, indexé par roster_hash. Les entrées sont des
+    dictionnaires sérialisables en JSON ; si `directory` est donné, elles sont
+    aussi écrites sur disque et relues quand elles ne sont plus en mémoire.
+    """
+
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, directory: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key: str, value: dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as file:
+                value = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+
+        if self.directory is not None:
+            # Écriture atomique : un autre processus ne lit jamais un fichier partiel
+            suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+            temporary_path = f"{self._path(key)}.{suffix}"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(value, file, ensure_ascii=False)
+            os.replace(temporary_path, self._path(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Cache partagé par défaut, en mémoire uniquement
+default_cache = ResultCache()
@@ -0,0 +1,54 @@
+# roster.py
+from typing import List, Sequence
+import numpy as np
+from player import Player
+from team import Team
+
+
+class Roster:
+    """
+    Représentation compacte d'un effectif pour le solveur : niveaux dans un
+    tableau NumPy, postes encodés en entiers et index des joueurs de chaque
+    poste. Les objets Team ne sont construits que pour le résultat final.
+    """
+
+    __slots__ = ("players", "levels", "poste_codes", "poste_labels", "position_groups")
+
+    def __init__(self, players: Sequence[Player]):
+        self.players = list(players)
+        self.levels = np.fromiter(
+            (player.niveau for player in self.players),
+            dtype=float,
+            count=len(self.players),
+        )
+
+        # Codes de postes dans l'ordre de première apparition
+        codes = {}
+        for player in self.players:
+            codes.setdefault(player.poste, len(codes))
+        self.poste_labels = list(codes)
+        self.poste_codes = np.fromiter(
+            (codes[player.poste] for player in self.players),
+            dtype=np.intp,
+            count=len(self.players),
+        )
+
+        self.position_groups = [
+            np.flatnonzero(self.poste_codes == code) for code in range(len(codes))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def build_teams(
+        self, assignment: Sequence[int], num_teams: int, num_subteams: int
+    ) -> List[Team]:
+        """Construit les équipes à partir d'une affectation joueur -> sous-équipe."""
+        assignment = np.asarray(assignment, dtype=np.intp)
+        teams = [Team(i, num_subteams) for i in range(num_teams)]
+        for index in np.argsort(assignment, kind="stable").tolist():
+            slot = int(assignment[index])
+            teams[slot // num_subteams].add_player_to_subteam(
+                self.players[index], slot % num_subteams
+            )
+        return teams
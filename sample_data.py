@@ -0,0 +1,168 @@
+# sample_data.py
+import os
+from typing import Iterator, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+PRENOMS = [
+    "Alice",
+    "Béatrice",
+    "Clara",
+    "Diane",
+    "Élodie",
+    "Fanny",
+    "Gisèle",
+    "Hélène",
+    "Isabelle",
+    "Jade",
+    "Karine",
+    "Léa",
+    "Mélanie",
+    "Nathalie",
+    "Océane",
+    "Pascale",
+    "Quentin",
+    "Roxane",
+    "Sophie",
+    "Tatiana",
+    "Ursula",
+    "Valérie",
+    "Wendy",
+    "Xavier",
+    "Yasmine",
+    "Zoé",
+]
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+NIVEAUX = [1, 2, 3, 4]
+
+# Nombre de lignes générées à la fois lors de l'écriture d'un gros fichier
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Nombre maximal de lignes d'une feuille Excel, en-tête compris
+XLSX_MAX_ROWS = 1_048_576
+
+COLUMNS = ["id", "prénom", "poste", "niveau", "présence"]
+
+
+def _probabilities(
+    weights: Optional[Sequence[float]], size: int
+) -> Optional[np.ndarray]:
+    """Pondérations normalisées ; None pour un tirage uniforme."""
+    if weights is None:
+        return None
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (size,) or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError(f"Pondérations invalides : {size} valeurs positives attendues")
+    return weights / weights.sum()
+
+
+def iter_random_chunks(
+    num_players: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: Optional[int] = None,
+    poste_weights: Optional[Sequence[float]] = None,
+    niveau_weights: Optional[Sequence[float]] = None,
+    presence_rate: float = 0.5,
+    unique_names: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Génère un effectif aléatoire de `num_players` joueurs par blocs de
+    `chunk_size` lignes, sans jamais le construire entièrement en mémoire.
+
+    Chaque ligne a un identifiant unique (colonne "id"). Les postes et niveaux
+    suivent les pondérations `poste_weights` (dans l'ordre de POSTES) et
+    `niveau_weights` (dans l'ordre de NIVEAUX), uniformes par défaut ; chaque
+    joueur est présent avec la probabilité `presence_rate`. Avec
+    `unique_names`, l'identifiant est ajouté au prénom.
+    """
+    rng = np.random.default_rng(seed)
+    poste_p = _probabilities(poste_weights, len(POSTES))
+    niveau_p = _probabilities(niveau_weights, len(NIVEAUX))
+    prenoms = np.array(PRENOMS, dtype=object)
+    postes = np.array(POSTES, dtype=object)
+    niveaux = np.array(NIVEAUX)
+
+    for start in range(0, num_players, chunk_size):
+        size = min(chunk_size, num_players - start)
+        ids = np.arange(start + 1, start + size + 1)
+        names = prenoms[rng.integers(len(PRENOMS), size=size)]
+        if unique_names:
+            names = names + " " + ids.astype(str).astype(object)
+        yield pd.DataFrame(
+            {
+                "id": ids,
+                "prénom": names,
+                "poste": postes[rng.choice(len(POSTES), size=size, p=poste_p)],
+                "niveau": niveaux[rng.choice(len(NIVEAUX), size=size, p=niveau_p)],
+                "présence": np.where(rng.random(size) < presence_rate, "X", ""),
+            },
+            columns=COLUMNS,
+        )
+
+
+def write_random_roster(path: str, num_players: int, **options) -> str:
+    """
+    Écrit un effectif aléatoire dans `path` bloc par bloc ; le format est
+    déduit de l'extension : .csv, .xlsx (xlsxwriter en mode mémoire constante)
+    ou .parquet (pyarrow requis). Les options sont celles de iter_random_chunks.
+
+    Lève ValueError si l'effectif ne tient pas dans une feuille Excel
+    (XLSX_MAX_ROWS lignes) : xlsxwriter ignorerait les lignes en trop.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".xlsx" and num_players + 1 > XLSX_MAX_ROWS:
+        raise ValueError(
+            f"Une feuille Excel est limitée à {XLSX_MAX_ROWS - 1} joueurs : "
+            "utiliser le format .csv ou .parquet"
+        )
+    chunks = iter_random_chunks(num_players, **options)
+
+    if extension == ".csv":
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(",".join(COLUMNS) + "\n")
+            for chunk in chunks:
+                chunk.to_csv(file, header=False, index=False)
+
+    elif extension == ".xlsx":
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        worksheet = workbook.add_worksheet("Joueurs")
+        worksheet.write_row(0, 0, COLUMNS)
+        row = 1
+        for chunk in chunks:
+            for values in zip(*(chunk[column].tolist() for column in COLUMNS)):
+                worksheet.write_row(row, 0, values)
+                row += 1
+        workbook.close()
+
+    elif extension == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("L'export Parquet nécessite pyarrow") from error
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    else:
+        raise ValueError(f"Format non pris en charge : {extension or path}")
+
+    return path
+
+
+def generate_random_data(num_players=20, seed=None, **options):
+    """Petit effectif aléatoire en mémoire, utilisé comme modèle de fichier Excel."""
+    chunks = list(iter_random_chunks(num_players, seed=seed, **options))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS[1:])
+    return pd.concat(chunks, ignore_index=True).drop(columns="id")
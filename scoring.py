@@ -0,0 +1,402 @@
+# scoring.py
+import hashlib
+import numpy as np
+from dataclasses import dataclass
+from math import inf, sqrt
+from typing import List, Optional, Sequence, Tuple
+
+# Pondérations proposées par défaut dans l'interface pour les critères de postes
+DEFAULT_CAP_WEIGHT = 100.0
+DEFAULT_SPREAD_WEIGHT = 20.0
+
+# Écart maximal à la moyenne au-delà duquel s'ajoute la pénalité des grands
+# écarts. La marge absorbe les erreurs d'arrondi : un écart égal au seuil est
+# jugé de la même façon par tous les moteurs, quel que soit l'ordre des calculs
+DEVIATION_THRESHOLD = 0.5 + 1e-9
+
+
+@dataclass(frozen=True)
+class BalanceWeights:
+    """
+    Critères de composition des sous-équipes, ajoutés au score d'équilibre
+    des niveaux :
+    - `cap_weight` par joueur au-delà du maximum fixé pour un poste dans
+      `position_caps` (par défaut un seul gardien "G" par sous-équipe) ;
+    - `spread_weight` par joueur d'écart entre le nombre de joueurs d'un
+      poste dans une sous-équipe et sa part proportionnelle, arrondie à
+      l'entier inférieur ou supérieur.
+
+    Avec des poids nuls (valeurs par défaut), seul le niveau compte.
+    """
+
+    cap_weight: float = 0.0
+    spread_weight: float = 0.0
+    position_caps: Tuple[Tuple[str, int], ...] = (("G", 1),)
+
+    @property
+    def active(self) -> bool:
+        return self.cap_weight > 0 or self.spread_weight > 0
+
+    def caps_for(self, poste_labels: Sequence[str]) -> List[float]:
+        """Maximum par sous-équipe de chaque poste, dans l'ordre de `poste_labels`."""
+        caps = dict(self.position_caps)
+        return [float(caps.get(label, inf)) for label in poste_labels]
+
+
+class PairPenalties:
+    """
+    Pénalité ajoutée au score pour chaque paire de joueurs réunis dans une
+    même sous-équipe, par exemple proportionnelle au nombre de séances déjà
+    jouées ensemble (voir history.HistoryStore.pair_penalties).
+
+    `matrix` est une matrice symétrique indexée comme `names` (prénoms) ;
+    les joueurs absents de `names` n'ont aucune pénalité.
+    """
+
+    def __init__(self, names: Sequence[str], matrix: np.ndarray):
+        self.names = list(names)
+        self.matrix = np.asarray(matrix, dtype=float)
+        self._index = {name: index for index, name in enumerate(self.names)}
+
+    def fingerprint(self) -> str:
+        """Empreinte du contenu, pour les clés de cache."""
+        digest = hashlib.sha256("\0".join(self.names).encode("utf-8"))
+        digest.update(np.ascontiguousarray(self.matrix).tobytes())
+        return digest.hexdigest()
+
+    def aligned(self, names: Sequence[str]) -> np.ndarray:
+        """Matrice des pénalités des joueurs `names`, dans cet ordre."""
+        indices = np.array([self._index.get(name, -1) for name in names], dtype=np.intp)
+        known = indices >= 0
+        matrix = np.zeros((len(indices), len(indices)))
+        rows = np.flatnonzero(known)
+        matrix[np.ix_(rows, rows)] = self.matrix[np.ix_(indices[known], indices[known])]
+        np.fill_diagonal(matrix, 0)
+        return matrix
+
+    def pairs(self, names: Sequence[str]):
+        """Paires des joueurs `names` de pénalité non nulle : voir matrix_pairs."""
+        return matrix_pairs(self.aligned(names))
+
+
+def matrix_pairs(matrix: np.ndarray):
+    """
+    Forme creuse d'une matrice symétrique de pénalités : index (i, j), i < j,
+    des paires de pénalité non nulle et pénalités correspondantes.
+    """
+    first, second = np.nonzero(np.triu(matrix, 1))
+    return first, second, matrix[first, second]
+
+
+def rotation_penalty(assignments: np.ndarray, pairs) -> np.ndarray:
+    """
+    Somme des pénalités des paires `pairs` (voir matrix_pairs) réunies
+    dans une même sous-équipe, pour un lot d'affectations.
+    """
+    first, second, values = pairs
+    assignments = np.atleast_2d(assignments)
+    return (assignments[:, first] == assignments[:, second]) @ values
+
+
+def level_penalty(values: Sequence[float]) -> float:
+    """
+    Équivalent de calculate_level_penalty en Python pur, sans conversion NumPy,
+    pour les petites listes évaluées à chaque mouvement de la recherche locale.
+    """
+    if not values:
+        return 0
+
+    target = sum(values) / len(values)
+    variance = sum((value - target) ** 2 for value in values) / len(values)
+    max_deviation = max(abs(value - target) for value in values)
+
+    penalty = sqrt(variance) * 50
+    if max_deviation > DEVIATION_THRESHOLD:
+        penalty += (max_deviation * 2) ** 2 * 100
+
+    return penalty
+
+
+def batch_level_penalty(values: np.ndarray) -> np.ndarray:
+    """
+    Version vectorisée de calculate_level_penalty : la pénalité est calculée
+    sur le dernier axe, pour toutes les lignes du tableau en une seule passe.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.shape[-1] == 0:
+        return np.zeros(values.shape[:-1])
+
+    target = values.mean(axis=-1, keepdims=True)
+    max_deviation = np.abs(values - target).max(axis=-1)
+
+    # Pénalité de base basée sur l'écart-type
+    penalty = values.std(axis=-1) * 50
+
+    # Pénalité supplémentaire pour les grands écarts
+    large = max_deviation > DEVIATION_THRESHOLD
+    return penalty + np.where(large, (max_deviation * 2) ** 2 * 100, 0.0)
+
+
+def slot_totals(assignments: np.ndarray, levels: np.ndarray, num_slots: int):
+    """
+    Calcule la somme des niveaux et le nombre de joueurs de chaque sous-équipe
+    pour un lot de candidats.
+
+    `assignments` a la forme (candidats, joueurs) et contient pour chaque joueur
+    l'index de sa sous-équipe : équipe * nb_sous_équipes + sous-équipe.
+    """
+    assignments = np.atleast_2d(assignments)
+    batch_size = assignments.shape[0]
+
+    # Décaler les index de chaque candidat pour un unique appel à bincount
+    flat = (assignments + np.arange(batch_size)[:, None] * num_slots).ravel()
+    minlength = batch_size * num_slots
+    weights = np.tile(np.asarray(levels, dtype=float), batch_size)
+    sums = np.bincount(flat, weights=weights, minlength=minlength)
+    counts = np.bincount(flat, minlength=minlength)
+
+    return sums.reshape(batch_size, num_slots), counts.reshape(batch_size, num_slots)
+
+
+def score_slot_totals(
+    sums: np.ndarray, counts: np.ndarray, num_teams: int, num_subteams: int
+) -> np.ndarray:
+    """
+    Reproduit evaluate_distribution à partir des sommes et effectifs de chaque
+    sous-équipe, pour tous les candidats du lot.
+    """
+    sums = np.asarray(sums, dtype=float).reshape(-1, num_teams, num_subteams)
+    counts = np.asarray(counts).reshape(-1, num_teams, num_subteams)
+
+    team_sums = sums.sum(axis=-1)
+    team_counts = counts.sum(axis=-1)
+    team_levels = np.divide(
+        team_sums, team_counts, out=np.zeros_like(team_sums), where=team_counts > 0
+    )
+    subteam_levels = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    score = batch_level_penalty(team_levels)
+    score += batch_level_penalty(team_sums) * 0.5
+    score += batch_level_penalty(subteam_levels).sum(axis=-1) * 2
+    score += batch_level_penalty(subteam_levels.reshape(len(sums), -1)) * 1.5
+
+    return score
+
+
+def score_assignments(
+    assignments: np.ndarray,
+    levels: np.ndarray,
+    num_teams: int,
+    num_subteams: int,
+    poste_codes: Optional[np.ndarray] = None,
+    weights: Optional[BalanceWeights] = None,
+    caps: Optional[Sequence[float]] = None,
+    pairs=None,
+) -> np.ndarray:
+    """
+    Évalue un lot de répartitions représentées par des tableaux d'affectation.
+    Si `weights` est actif, les critères de postes (codes `poste_codes`,
+    maximum `caps` par code) s'ajoutent au score dans la même passe, de même
+    que les pénalités des paires `pairs` (voir rotation_penalty).
+    """
+    num_slots = num_teams * num_subteams
+    sums, counts = slot_totals(assignments, levels, num_slots)
+    score = score_slot_totals(sums, counts, num_teams, num_subteams)
+    if weights is not None and weights.active and poste_codes is not None:
+        num_postes = len(caps)
+        poste_counts = position_counts(assignments, poste_codes, num_slots, num_postes)
+        score += batch_position_penalty(poste_counts, caps, weights)
+    if pairs is not None:
+        score += rotation_penalty(assignments, pairs)
+    return score
+
+
+def score_totals(
+    slot_sums: Sequence[float],
+    slot_counts: Sequence[int],
+    num_teams: int,
+    num_subteams: int,
+) -> float:
+    """
+    Reproduit evaluate_distribution pour une seule répartition, à partir des
+    sommes et effectifs de chaque sous-équipe, en Python pur.
+    """
+    team_sums = [
+        sum(slot_sums[t * num_subteams : (t + 1) * num_subteams])
+        for t in range(num_teams)
+    ]
+    team_counts = [
+        sum(slot_counts[t * num_subteams : (t + 1) * num_subteams])
+        for t in range(num_teams)
+    ]
+    subteam_levels = [
+        total / count if count else 0 for total, count in zip(slot_sums, slot_counts)
+    ]
+
+    score = level_penalty(
+        [total / count if count else 0 for total, count in zip(team_sums, team_counts)]
+    )
+    score += level_penalty(team_sums) * 0.5
+    score += sum(
+        level_penalty(subteam_levels[t * num_subteams : (t + 1) * num_subteams])
+        for t in range(num_teams)
+    ) * 2
+    score += level_penalty(subteam_levels) * 1.5
+
+    return score
+
+
+def position_bounds(
+    poste_totals: Sequence[int], slot_sizes: Sequence[int]
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Part proportionnelle de chaque poste dans chaque sous-équipe, arrondie :
+    retourne les bornes inférieures et supérieures [sous-équipe][poste].
+    """
+    total_players = sum(slot_sizes)
+    lows, highs = [], []
+    for size in slot_sizes:
+        shares = [total * size for total in poste_totals]
+        if total_players:
+            lows.append([share // total_players for share in shares])
+            highs.append([-(-share // total_players) for share in shares])
+        else:
+            lows.append([0] * len(poste_totals))
+            highs.append([0] * len(poste_totals))
+    return lows, highs
+
+
+def slot_position_penalty(
+    counts: Sequence[int],
+    lows: Sequence[int],
+    highs: Sequence[int],
+    caps: Sequence[float],
+    weights: BalanceWeights,
+) -> float:
+    """Pénalité de composition d'une sous-équipe ; `counts` : effectif par poste."""
+    excess = sum(count - cap for count, cap in zip(counts, caps) if count > cap)
+    spread = sum(
+        max(low - count, count - high, 0)
+        for count, low, high in zip(counts, lows, highs)
+    )
+    return excess * weights.cap_weight + spread * weights.spread_weight
+
+
+def position_counts(
+    assignments: np.ndarray, poste_codes: np.ndarray, num_slots: int, num_postes: int
+) -> np.ndarray:
+    """
+    Nombre de joueurs de chaque poste par sous-équipe, pour un lot de
+    candidats : tableau de forme (candidats, sous-équipes, postes).
+    """
+    assignments = np.atleast_2d(assignments)
+    batch_size = assignments.shape[0]
+    cells = num_slots * num_postes
+    flat = (
+        assignments * num_postes
+        + np.asarray(poste_codes)
+        + np.arange(batch_size)[:, None] * cells
+    ).ravel()
+    counts = np.bincount(flat, minlength=batch_size * cells)
+    return counts.reshape(batch_size, num_slots, num_postes)
+
+
+def batch_position_penalty(
+    counts: np.ndarray, caps: Sequence[float], weights: BalanceWeights
+) -> np.ndarray:
+    """Version vectorisée de slot_position_penalty, sommée sur les sous-équipes."""
+    sizes = counts.sum(axis=-1)
+    totals = counts.sum(axis=1)
+    total_players = np.maximum(sizes.sum(axis=-1), 1)[:, None, None]
+    shares = totals[:, None, :] * sizes[:, :, None]
+    lows = shares // total_players
+    highs = -(-shares // total_players)
+
+    excess = np.maximum(counts - np.asarray(caps, dtype=float), 0).sum(axis=(1, 2))
+    spread = np.maximum(np.maximum(lows - counts, counts - highs), 0).sum(axis=(1, 2))
+    return excess * weights.cap_weight + spread * weights.spread_weight
+
+
+def _balanced_penalty(total_units: int, count: int, unit: float) -> float:
+    """
+    level_penalty du vecteur le plus équilibré de `count` multiples de `unit`
+    dont la somme vaut `total_units` * `unit` : valeurs égales à une unité
+    près, le minimum parmi tous ces vecteurs.
+    """
+    base, extra = divmod(total_units, count)
+    return level_penalty([(base + 1) * unit] * extra + [base * unit] * (count - extra))
+
+
+def score_lower_bound(
+    levels: Sequence[float],
+    slot_sizes: Sequence[int],
+    num_teams: int,
+    num_subteams: int,
+    poste_codes: Optional[Sequence[int]] = None,
+    weights: Optional[BalanceWeights] = None,
+    poste_labels: Optional[Sequence[str]] = None,
+) -> float:
+    """
+    Minorant du score de toute répartition de joueurs de niveaux `levels`
+    en sous-équipes d'effectifs `slot_sizes` (plan de
+    calculate_optimal_distribution), calculé sans rien affecter.
+
+    Avec des niveaux entiers de PGCD g, chaque somme d'équipe ou de
+    sous-équipe est un multiple de g et leur total est fixé : la pénalité
+    des sommes d'équipes vaut au moins celle du vecteur de multiples de g le
+    plus équilibré, de même que celle des moyennes quand les effectifs sont
+    égaux. Si `weights` est actif, s'y ajoute la pénalité de composition
+    inévitable : joueurs d'un poste en surnombre par rapport au maximum
+    autorisé dans l'ensemble des sous-équipes, ou incompatibilité entre ce
+    maximum et la part proportionnelle de chaque sous-équipe.
+    """
+    bound = 0.0
+    level_values = np.asarray(levels, dtype=float)
+    integer_levels = level_values.size and np.all(np.mod(level_values, 1) == 0)
+    step = 0
+    if integer_levels:
+        step = int(np.gcd.reduce(np.abs(level_values).astype(np.int64)))
+    team_sizes = [
+        sum(slot_sizes[t * num_subteams : (t + 1) * num_subteams])
+        for t in range(num_teams)
+    ]
+    if step:
+        total_units = int(round(level_values.sum())) // step
+        bound += _balanced_penalty(total_units, num_teams, step) * 0.5
+        if len(set(team_sizes)) == 1 and team_sizes[0]:
+            bound += _balanced_penalty(total_units, num_teams, step / team_sizes[0])
+        if len(set(slot_sizes)) == 1 and slot_sizes[0]:
+            bound += (
+                _balanced_penalty(total_units, len(slot_sizes), step / slot_sizes[0])
+                * 1.5
+            )
+
+    if weights is not None and weights.active and poste_codes is not None:
+        poste_totals = np.bincount(
+            np.asarray(poste_codes, dtype=np.intp),
+            minlength=len(poste_labels) if poste_labels is not None else 0,
+        ).tolist()
+        if poste_labels is None:
+            poste_labels = list(range(len(poste_totals)))
+        caps = weights.caps_for(poste_labels)
+        lows, highs = position_bounds(poste_totals, slot_sizes)
+
+        # Surnombre global : au-delà de nb_sous_équipes * maximum
+        forced = sum(
+            max(total - cap * len(slot_sizes), 0) * weights.cap_weight
+            for total, cap in zip(poste_totals, caps)
+            if cap != inf
+        )
+        # Chaque sous-équipe et chaque poste pris isolément
+        cells = 0.0
+        for slot in range(len(slot_sizes)):
+            for poste, cap in enumerate(caps):
+                low, high = lows[slot][poste], highs[slot][poste]
+                if cap < low:
+                    cells += min(
+                        weights.cap_weight * (low - cap),
+                        weights.spread_weight * (low - cap),
+                    )
+        bound += max(forced, cells)
+
+    return bound
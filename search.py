@@ -0,0 +1,584 @@
+# search.py
+import random
+import time
+from collections import defaultdict
+from math import exp
+from typing import Callable, List, Optional, Sequence, Tuple
+import numpy as np
+from scoring import (
+    BalanceWeights,
+    level_penalty,
+    position_bounds,
+    slot_position_penalty,
+)
+
+# Nombre d'essais consécutifs sans amélioration avant d'arrêter la recherche locale
+LOCAL_SEARCH_PATIENCE = 2000
+
+# Nombre de mouvements entre deux vérifications de l'échéance
+DEADLINE_CHECK_INTERVAL = 100
+
+# Nombre de mouvements tirés pour calibrer la température initiale du recuit
+ANNEALING_CALIBRATION_MOVES = 100
+
+# Nombre de mouvements examinés à chaque pas de la recherche tabou
+TABU_NEIGHBOURHOOD_SIZE = 30
+
+# Part des joueurs qui reste tabou après chaque pas : un joueur déplacé ne
+# peut plus bouger pendant ce nombre de pas rapporté à l'effectif
+TABU_TENURE_RATIO = 0.1
+
+
+class SwapState:
+    """
+    Répartition modifiable par échanges de joueurs de même poste.
+
+    Les sommes de niveaux par équipe et par sous-équipe sont mises à jour de
+    manière incrémentale : évaluer un échange ne dépend que du nombre de
+    sous-équipes, jamais du nombre de joueurs.
+
+    Si `weights` (BalanceWeights) est actif, le score inclut les critères de
+    composition des sous-équipes, tenus à jour de la même manière, et deux
+    joueurs de postes différents d'une même équipe peuvent aussi être
+    échangés : seuls ces échanges modifient la composition des sous-équipes
+    sans toucher à la répartition des postes entre équipes. `poste_labels`
+    donne le nom de chaque poste quand `postes` contient des codes.
+
+    Si `home` est donné (sous-équipe d'origine de chaque joueur, -1 pour un
+    joueur sans origine), chaque joueur placé hors de sa sous-équipe
+    d'origine ajoute `move_cost` au score.
+
+    `pair_matrix` (matrice symétrique indexée comme les joueurs) ajoute la
+    pénalité de chaque paire réunie dans une même sous-équipe. L'affinité de
+    chaque joueur avec chaque sous-équipe (somme de ses pénalités avec les
+    membres) est tenue à jour, ce qui garde l'évaluation d'un échange en
+    temps constant.
+    """
+
+    def __init__(
+        self,
+        assignment: Sequence[int],
+        levels: Sequence[float],
+        postes: Sequence[str],
+        num_teams: int,
+        num_subteams: int,
+        weights: Optional[BalanceWeights] = None,
+        poste_labels: Optional[Sequence[str]] = None,
+        home: Optional[Sequence[int]] = None,
+        move_cost: float = 0.0,
+        pair_matrix: Optional[np.ndarray] = None,
+    ):
+        self.assignment = [int(slot) for slot in assignment]
+        self.levels = [float(level) for level in levels]
+        self.num_teams = num_teams
+        self.num_subteams = num_subteams
+
+        num_slots = num_teams * num_subteams
+        self.slot_sums = [0.0] * num_slots
+        self.slot_counts = [0] * num_slots
+        for player_index, slot in enumerate(self.assignment):
+            self.slot_sums[slot] += self.levels[player_index]
+            self.slot_counts[slot] += 1
+
+        self.team_sums = [
+            sum(self.slot_sums[t * num_subteams : (t + 1) * num_subteams])
+            for t in range(num_teams)
+        ]
+        self.team_counts = [
+            sum(self.slot_counts[t * num_subteams : (t + 1) * num_subteams])
+            for t in range(num_teams)
+        ]
+
+        # Postes encodés en entiers, dans l'ordre de première apparition
+        codes = {}
+        self.postes = [codes.setdefault(poste, len(codes)) for poste in postes]
+
+        # Joueurs regroupés par poste : seuls ceux-ci peuvent être échangés
+        players_by_position = defaultdict(list)
+        for player_index, poste in enumerate(self.postes):
+            players_by_position[poste].append(player_index)
+        self.position_groups = [
+            group for group in players_by_position.values() if len(group) > 1
+        ]
+
+        # Pénalité des sous-équipes de chaque équipe, mise en cache
+        self.subteam_penalties = [
+            self._subteam_penalty(t) for t in range(num_teams)
+        ]
+        self.level_score = self._score(self.subteam_penalties)
+
+        self.weights = weights if weights is not None and weights.active else None
+        self.position_penalty = 0.0
+        if self.weights is not None:
+            labels = [
+                poste_labels[poste] if poste_labels is not None else poste
+                for poste in codes
+            ]
+            self.caps = self.weights.caps_for(labels)
+            self.position_counts = [[0] * len(codes) for _ in range(num_slots)]
+            for player_index, slot in enumerate(self.assignment):
+                self.position_counts[slot][self.postes[player_index]] += 1
+            poste_totals = [0] * len(codes)
+            for poste in self.postes:
+                poste_totals[poste] += 1
+            self.position_lows, self.position_highs = position_bounds(
+                poste_totals, self.slot_counts
+            )
+            self.slot_position_penalties = [
+                self._slot_position_penalty(slot, self.position_counts[slot])
+                for slot in range(num_slots)
+            ]
+            self.position_penalty = sum(self.slot_position_penalties)
+
+            # Joueurs de chaque équipe, pour tirer des échanges internes
+            self.team_players = [[] for _ in range(num_teams)]
+            self.team_index = [0] * len(self.assignment)
+            for player_index, slot in enumerate(self.assignment):
+                team_players = self.team_players[slot // num_subteams]
+                self.team_index[player_index] = len(team_players)
+                team_players.append(player_index)
+            self.mixed_teams = [
+                t for t in range(num_teams) if len(self.team_players[t]) > 1
+            ]
+
+        self.home = [int(slot) for slot in home] if home is not None else None
+        self.move_cost = move_cost
+        self.move_penalty = 0.0
+        if self.home is not None:
+            self.move_penalty = move_cost * sum(
+                self._moved(player_index, slot)
+                for player_index, slot in enumerate(self.assignment)
+            )
+
+        self.pair_matrix = None
+        self.rotation_penalty = 0.0
+        if pair_matrix is not None and np.any(pair_matrix):
+            self.pair_matrix = np.asarray(pair_matrix, dtype=float)
+            members = np.zeros((len(self.assignment), num_slots))
+            members[np.arange(len(self.assignment)), self.assignment] = 1
+            self.affinity = self.pair_matrix @ members
+            players = np.arange(len(self.assignment))
+            self.rotation_penalty = float(
+                self.affinity[players, self.assignment].sum() / 2
+            )
+
+        self.score = (
+            self.level_score
+            + self.position_penalty
+            + self.move_penalty
+            + self.rotation_penalty
+        )
+        # Nombre d'échanges évalués depuis la création de l'état
+        self.evaluations = 0
+
+    def _subteam_levels(self, team_id: int) -> List[float]:
+        start = team_id * self.num_subteams
+        sums, counts = self.slot_sums, self.slot_counts
+        return [
+            sums[slot] / counts[slot] if counts[slot] else 0
+            for slot in range(start, start + self.num_subteams)
+        ]
+
+    def _subteam_penalty(self, team_id: int) -> float:
+        return level_penalty(self._subteam_levels(team_id))
+
+    def _slot_position_penalty(self, slot: int, counts: List[int]) -> float:
+        return slot_position_penalty(
+            counts,
+            self.position_lows[slot],
+            self.position_highs[slot],
+            self.caps,
+            self.weights,
+        )
+
+    def _moved(self, player_index: int, slot: int) -> bool:
+        """Vrai si le joueur placé dans `slot` a quitté sa sous-équipe d'origine."""
+        origin = self.home[player_index]
+        return origin >= 0 and slot != origin
+
+    def _move_delta(self, i: int, j: int) -> float:
+        """
+        Variation du coût de déplacement si `i` et `j` échangeaient leurs
+        sous-équipes.
+        """
+        slot_i, slot_j = self.assignment[i], self.assignment[j]
+        changed = (
+            self._moved(i, slot_j)
+            + self._moved(j, slot_i)
+            - self._moved(i, slot_i)
+            - self._moved(j, slot_j)
+        )
+        return changed * self.move_cost
+
+    def _rotation_delta(self, i: int, j: int) -> float:
+        """
+        Variation de la pénalité des paires si `i` et `j` échangeaient leurs
+        sous-équipes.
+        """
+        slot_i, slot_j = self.assignment[i], self.assignment[j]
+        affinity = self.affinity
+        return float(
+            affinity[i, slot_j]
+            + affinity[j, slot_i]
+            - affinity[i, slot_i]
+            - affinity[j, slot_j]
+            - 2 * self.pair_matrix[i, j]
+        )
+
+    def _score(self, subteam_penalties: List[float]) -> float:
+        team_levels = [
+            total / count if count else 0
+            for total, count in zip(self.team_sums, self.team_counts)
+        ]
+        all_subteam_levels = [
+            total / count if count else 0
+            for total, count in zip(self.slot_sums, self.slot_counts)
+        ]
+
+        score = level_penalty(team_levels)
+        score += level_penalty(self.team_sums) * 0.5
+        score += sum(subteam_penalties) * 2
+        score += level_penalty(all_subteam_levels) * 1.5
+        return score
+
+    def _shift(self, slot_a: int, slot_b: int, delta: float):
+        """Transfère `delta` niveaux de la sous-équipe `slot_b` vers `slot_a`."""
+        self.slot_sums[slot_a] += delta
+        self.slot_sums[slot_b] -= delta
+        self.team_sums[slot_a // self.num_subteams] += delta
+        self.team_sums[slot_b // self.num_subteams] -= delta
+
+    def _swapped_position_penalties(self, i: int, j: int):
+        """
+        Pénalités de composition des sous-équipes de `i` et `j` après leur
+        échange.
+        """
+        slot_i, slot_j = self.assignment[i], self.assignment[j]
+        counts_i = list(self.position_counts[slot_i])
+        counts_j = list(self.position_counts[slot_j])
+        counts_i[self.postes[i]] -= 1
+        counts_i[self.postes[j]] += 1
+        counts_j[self.postes[j]] -= 1
+        counts_j[self.postes[i]] += 1
+        return (
+            self._slot_position_penalty(slot_i, counts_i),
+            self._slot_position_penalty(slot_j, counts_j),
+        )
+
+    def swap_score(self, i: int, j: int) -> float:
+        """Score obtenu si les joueurs `i` et `j` échangeaient leurs sous-équipes."""
+        self.evaluations += 1
+        slot_i, slot_j = self.assignment[i], self.assignment[j]
+        delta = self.levels[j] - self.levels[i]
+        mixed = self.postes[i] != self.postes[j]
+        if slot_i == slot_j or (
+            delta == 0 and not mixed and self.home is None and self.pair_matrix is None
+        ):
+            return self.score
+
+        level_score = self.level_score
+        if delta != 0:
+            self._shift(slot_i, slot_j, delta)
+            penalties = list(self.subteam_penalties)
+            for team_id in {slot_i // self.num_subteams, slot_j // self.num_subteams}:
+                penalties[team_id] = self._subteam_penalty(team_id)
+            level_score = self._score(penalties)
+            self._shift(slot_i, slot_j, -delta)
+
+        position_penalty = self.position_penalty
+        if mixed:
+            penalty_i, penalty_j = self._swapped_position_penalties(i, j)
+            position_penalty += (
+                penalty_i
+                + penalty_j
+                - self.slot_position_penalties[slot_i]
+                - self.slot_position_penalties[slot_j]
+            )
+
+        move_penalty = self.move_penalty
+        if self.home is not None:
+            move_penalty += self._move_delta(i, j)
+
+        rotation_penalty = self.rotation_penalty
+        if self.pair_matrix is not None:
+            rotation_penalty += self._rotation_delta(i, j)
+
+        return level_score + position_penalty + move_penalty + rotation_penalty
+
+    def apply_swap(self, i: int, j: int, score: Optional[float] = None):
+        """Échange les sous-équipes des joueurs `i` et `j`."""
+        slot_i, slot_j = self.assignment[i], self.assignment[j]
+        self._shift(slot_i, slot_j, self.levels[j] - self.levels[i])
+        if self.home is not None:
+            self.move_penalty += self._move_delta(i, j)
+        if self.pair_matrix is not None:
+            self.rotation_penalty += self._rotation_delta(i, j)
+            column_i, column_j = self.pair_matrix[:, i], self.pair_matrix[:, j]
+            self.affinity[:, slot_i] += column_j - column_i
+            self.affinity[:, slot_j] += column_i - column_j
+
+        if self.weights is not None:
+            if self.postes[i] != self.postes[j]:
+                penalty_i, penalty_j = self._swapped_position_penalties(i, j)
+                for slot, player, other in ((slot_i, i, j), (slot_j, j, i)):
+                    self.position_counts[slot][self.postes[player]] -= 1
+                    self.position_counts[slot][self.postes[other]] += 1
+                self.position_penalty += (
+                    penalty_i
+                    + penalty_j
+                    - self.slot_position_penalties[slot_i]
+                    - self.slot_position_penalties[slot_j]
+                )
+                self.slot_position_penalties[slot_i] = penalty_i
+                self.slot_position_penalties[slot_j] = penalty_j
+
+            team_i, team_j = slot_i // self.num_subteams, slot_j // self.num_subteams
+            if team_i != team_j:
+                index_i, index_j = self.team_index[i], self.team_index[j]
+                self.team_players[team_i][index_i] = j
+                self.team_players[team_j][index_j] = i
+                self.team_index[i], self.team_index[j] = index_j, index_i
+
+        self.assignment[i], self.assignment[j] = slot_j, slot_i
+
+        for team_id in {slot_i // self.num_subteams, slot_j // self.num_subteams}:
+            self.subteam_penalties[team_id] = self._subteam_penalty(team_id)
+        self.level_score = self._score(self.subteam_penalties)
+        if score is None:
+            score = (
+                self.level_score
+                + self.position_penalty
+                + self.move_penalty
+                + self.rotation_penalty
+            )
+        self.score = score
+
+    @property
+    def can_swap(self) -> bool:
+        """Vrai si au moins un échange est possible."""
+        return bool(self.position_groups) or (
+            self.weights is not None and bool(self.mixed_teams)
+        )
+
+    def random_swap(self, rng: random.Random):
+        """
+        Tire deux joueurs de même poste placés dans des sous-équipes
+        différentes ou, une fois sur deux quand les critères de postes sont
+        actifs, deux joueurs d'une même équipe placés dans des sous-équipes
+        différentes.
+        """
+        if self.weights is not None and self.mixed_teams and rng.random() < 0.5:
+            i, j = rng.sample(self.team_players[rng.choice(self.mixed_teams)], 2)
+        elif self.position_groups:
+            i, j = rng.sample(rng.choice(self.position_groups), 2)
+        else:
+            return None
+        if self.assignment[i] == self.assignment[j]:
+            return None
+        return i, j
+
+
+def _should_stop(deadline: Optional[float], stop_event, move: int) -> bool:
+    """Vrai si l'échéance est dépassée ou si l'arrêt a été demandé."""
+    if move % DEADLINE_CHECK_INTERVAL != 0:
+        return False
+    if stop_event is not None and stop_event.is_set():
+        return True
+    return deadline is not None and time.perf_counter() >= deadline
+
+
+def local_search(
+    state: SwapState,
+    rng: Optional[random.Random] = None,
+    patience: int = LOCAL_SEARCH_PATIENCE,
+    max_moves: int = 100_000,
+    deadline: Optional[float] = None,
+    stop_event=None,
+    on_improvement: Optional[Callable[[SwapState], None]] = None,
+    target: Optional[float] = None,
+) -> SwapState:
+    """
+    Améliore la répartition par échanges successifs de joueurs de même poste,
+    en n'acceptant que les échanges qui diminuent le score.
+
+    `deadline` est une échéance facultative exprimée en time.perf_counter() ;
+    `stop_event` (threading.Event ou multiprocessing.Event) permet d'interrompre
+    la recherche depuis l'extérieur. `on_improvement` est appelé avec l'état
+    à chaque nouveau meilleur score. La recherche s'arrête aussi dès que le
+    score atteint `target` (par exemple un minorant connu).
+    """
+    if rng is None:
+        rng = random.Random()
+
+    attempts_without_improvement = 0
+    for move_index in range(max_moves):
+        if attempts_without_improvement >= patience:
+            break
+        if _should_stop(deadline, stop_event, move_index):
+            break
+
+        move = state.random_swap(rng)
+        if move is None:
+            attempts_without_improvement += 1
+            continue
+
+        score = state.swap_score(*move)
+        if score < state.score:
+            state.apply_swap(*move, score)
+            attempts_without_improvement = 0
+            if on_improvement is not None:
+                on_improvement(state)
+            if target is not None and state.score <= target:
+                break
+        else:
+            attempts_without_improvement += 1
+
+    return state
+
+
+def _initial_temperature(state: SwapState, rng: random.Random) -> float:
+    """Température initiale : dégradation moyenne d'un échange aléatoire."""
+    increases = []
+    for _ in range(ANNEALING_CALIBRATION_MOVES):
+        move = state.random_swap(rng)
+        if move is not None:
+            delta = state.swap_score(*move) - state.score
+            if delta > 0:
+                increases.append(delta)
+    return sum(increases) / len(increases) if increases else 1.0
+
+
+def simulated_annealing(
+    state: SwapState,
+    deadline: float,
+    rng: Optional[random.Random] = None,
+    final_ratio: float = 1e-3,
+    stop_event=None,
+    on_improvement: Optional[Callable[[SwapState], None]] = None,
+    target: Optional[float] = None,
+) -> Tuple[List[int], float]:
+    """
+    Recuit simulé : un échange qui dégrade le score de `delta` est accepté avec
+    une probabilité exp(-delta / T). La température T décroît géométriquement
+    avec le temps écoulé, jusqu'à l'échéance `deadline` (time.perf_counter()).
+
+    `stop_event` permet d'interrompre la recherche avant l'échéance ;
+    `on_improvement` est appelé avec l'état à chaque nouveau meilleur score.
+    La recherche s'arrête aussi dès que le meilleur score atteint `target`.
+
+    Retourne la meilleure affectation rencontrée et son score.
+    """
+    if rng is None:
+        rng = random.Random()
+
+    best_assignment, best_score = list(state.assignment), state.score
+    if not state.can_swap:
+        return best_assignment, best_score
+
+    start = time.perf_counter()
+    duration = max(deadline - start, 1e-9)
+    initial_temperature = _initial_temperature(state, rng)
+    temperature = initial_temperature
+
+    move_index = 0
+    while True:
+        if move_index % DEADLINE_CHECK_INTERVAL == 0:
+            progress = (time.perf_counter() - start) / duration
+            if progress >= 1 or _should_stop(None, stop_event, move_index):
+                break
+            temperature = initial_temperature * final_ratio**progress
+        move_index += 1
+
+        move = state.random_swap(rng)
+        if move is None:
+            continue
+
+        score = state.swap_score(*move)
+        delta = score - state.score
+        if delta < 0 or rng.random() < exp(-delta / temperature):
+            state.apply_swap(*move, score)
+            if state.score < best_score:
+                best_assignment, best_score = list(state.assignment), state.score
+                if on_improvement is not None:
+                    on_improvement(state)
+                if target is not None and best_score <= target:
+                    break
+
+    return best_assignment, best_score
+
+
+def tabu_search(
+    state: SwapState,
+    deadline: float,
+    rng: Optional[random.Random] = None,
+    neighbourhood_size: int = TABU_NEIGHBOURHOOD_SIZE,
+    tenure: Optional[int] = None,
+    stop_event=None,
+    on_improvement: Optional[Callable[[SwapState], None]] = None,
+    target: Optional[float] = None,
+) -> Tuple[List[int], float]:
+    """
+    Recherche tabou : la répartition est d'abord menée à un optimum local
+    (local_search), puis, à chaque pas, le meilleur des `neighbourhood_size`
+    échanges tirés est appliqué, même s'il dégrade le score, à condition de ne
+    pas déplacer un joueur déplacé depuis moins de `tenure` pas (sauf s'il
+    améliore la meilleure solution connue). `tenure` vaut par défaut
+    TABU_TENURE_RATIO fois le nombre de joueurs. S'arrête à l'échéance
+    `deadline` ou dès que `stop_event` est levé. `on_improvement` est appelé
+    avec l'état à chaque nouveau meilleur score. La recherche s'arrête aussi
+    dès que le meilleur score atteint `target`.
+
+    Retourne la meilleure affectation rencontrée et son score, jamais moins
+    bonne que celle de la recherche locale initiale.
+    """
+    if rng is None:
+        rng = random.Random()
+
+    if not state.can_swap:
+        return list(state.assignment), state.score
+
+    local_search(
+        state,
+        rng,
+        deadline=deadline,
+        stop_event=stop_event,
+        on_improvement=on_improvement,
+        target=target,
+    )
+    best_assignment, best_score = list(state.assignment), state.score
+    if target is not None and best_score <= target:
+        return best_assignment, best_score
+
+    if tenure is None:
+        tenure = max(1, round(len(state.assignment) * TABU_TENURE_RATIO))
+    tabu_until = {}
+    step = 0
+    # Un pas évalue déjà `neighbourhood_size` échanges : échéance vérifiée à chaque pas
+    while not _should_stop(deadline, stop_event, 0):
+        step += 1
+        best_move, best_move_score = None, float("inf")
+        for _ in range(neighbourhood_size):
+            move = state.random_swap(rng)
+            if move is None:
+                continue
+            score = state.swap_score(*move)
+            is_tabu = any(tabu_until.get(player, 0) >= step for player in move)
+            if is_tabu and score >= best_score:
+                continue
+            if score < best_move_score:
+                best_move, best_move_score = move, score
+
+        if best_move is None:
+            continue
+
+        state.apply_swap(*best_move, best_move_score)
+        for player in best_move:
+            tabu_until[player] = step + tenure
+        if state.score < best_score:
+            best_assignment, best_score = list(state.assignment), state.score
+            if on_improvement is not None:
+                on_improvement(state)
+            if target is not None and best_score <= target:
+                break
+
+    return best_assignment, best_score
@@ -0,0 +1,96 @@
+# stats.py
+from typing import Dict, List
+from scoring import level_penalty, score_totals
+
+
+class TeamStats:
+    """
+    Statistiques des équipes et sous-équipes pendant les modifications
+    manuelles : sommes et effectifs sont mis à jour par différence à chaque
+    déplacement de joueur, sans reparcourir les équipes.
+
+    Les conteneurs sont désignés par les clés de layout.TeamLayout :
+    (nom d'équipe, n° de sous-équipe), ou None pour les non disponibles,
+    qui n'entrent pas dans les statistiques.
+    """
+
+    def __init__(self, team_data: Dict[str, Dict[int, List[dict]]]):
+        self.team_names = list(team_data)
+        self.num_subteams = max(
+            (len(subteams) for subteams in team_data.values()), default=0
+        )
+        self.slots = {}
+        for team_index, (team_name, subteams) in enumerate(team_data.items()):
+            for subteam_index, subteam_id in enumerate(subteams):
+                self.slots[(team_name, subteam_id)] = (
+                    team_index * self.num_subteams + subteam_index
+                )
+
+        num_slots = len(self.team_names) * self.num_subteams
+        self.slot_sums = [0] * num_slots
+        self.slot_counts = [0] * num_slots
+        self.team_sums = [0] * len(self.team_names)
+        self.team_counts = [0] * len(self.team_names)
+        for team_name, subteams in team_data.items():
+            for subteam_id, players in subteams.items():
+                for player in players:
+                    self.add(player["niveau"], (team_name, subteam_id))
+
+    def add(self, niveau, key):
+        """Ajoute un joueur de niveau `niveau` au conteneur `key`."""
+        self._update(key, niveau, 1)
+
+    def remove(self, niveau, key):
+        """Retire un joueur de niveau `niveau` du conteneur `key`."""
+        self._update(key, -niveau, -1)
+
+    def move(self, niveau, source, target):
+        """Déplace un joueur de niveau `niveau` du conteneur `source` vers `target`."""
+        self.remove(niveau, source)
+        self.add(niveau, target)
+
+    def _update(self, key, delta_sum, delta_count):
+        slot = self.slots.get(key)
+        if slot is None:
+            return
+        team = slot // self.num_subteams
+        self.slot_sums[slot] += delta_sum
+        self.slot_counts[slot] += delta_count
+        self.team_sums[team] += delta_sum
+        self.team_counts[team] += delta_count
+
+    @staticmethod
+    def _summary(total, count) -> dict:
+        return {
+            "sum": total,
+            "average": total / count if count else 0,
+            "total_players": count,
+        }
+
+    def team(self, team_name: str) -> dict:
+        """Somme, moyenne et effectif d'une équipe."""
+        team = self.team_names.index(team_name)
+        return self._summary(self.team_sums[team], self.team_counts[team])
+
+    def subteams(self, team_name: str) -> Dict[int, dict]:
+        """Somme, moyenne et effectif de chaque sous-équipe d'une équipe."""
+        return {
+            subteam_id: self._summary(self.slot_sums[slot], self.slot_counts[slot])
+            for (name, subteam_id), slot in self.slots.items()
+            if name == team_name
+        }
+
+    def team_penalty(self) -> float:
+        """Pénalité de calculate_level_penalty sur les niveaux moyens des équipes."""
+        return level_penalty(
+            [
+                total / count if count else 0
+                for total, count in zip(self.team_sums, self.team_counts)
+            ]
+        )
+
+    def score(self) -> float:
+        """Score d'équilibre global, identique à evaluate_distribution."""
+        return score_totals(
+            self.slot_sums, self.slot_counts, len(self.team_names), self.num_subteams
+        )
@@ -5,25 +5,66 @@ class Team:
     def __init__(self, team_id: int, nb_subteams: int):
         self.team_id = team_id
         self.subteams = [[] for _ in range(nb_subteams)]
+        # Sommes des niveaux par sous-équipe, tenues à jour à chaque ajout
+        self._subteam_sums = [0] * nb_subteams
 
     def add_player_to_subteam(self, player: Player, subteam_id: int):
         self.subteams[subteam_id].append(player)
+        self._subteam_sums[subteam_id] += player.niveau
 
     def get_average_level(self) -> float:
-        all_players = [p for subteam in self.subteams for p in subteam]
-        if not all_players:
+        num_players = sum(len(subteam) for subteam in self.subteams)
+        if not num_players:
             return 0
-        return sum(p.niveau for p in all_players) / len(all_players)
+        return sum(self._subteam_sums) / num_players
 
     def get_total_level(self) -> float:
-        all_players = [p for subteam in self.subteams for p in subteam]
-        if not all_players:
+        if not any(self.subteams):
             return 0
-        return sum(p.niveau for p in all_players)
+        return sum(self._subteam_sums)
 
     def get_subteam_average_level(self, subteam_id: int) -> float:
         if not self.subteams[subteam_id]:
             return 0
-        return sum(p.niveau for p in self.subteams[subteam_id]) / len(
-            self.subteams[subteam_id]
-        )
+        return self._subteam_sums[subteam_id] / len(self.subteams[subteam_id])
+
+
+def teams_to_data(teams) -> dict:
+    """
+    Convertit des équipes en dictionnaire {nom d'équipe: {n° de sous-équipe:
+    [joueurs]}}, chaque joueur étant un dictionnaire prénom/poste/niveau.
+    C'est le format utilisé par l'interface et par create_pdf.
+    """
+    team_data = {}
+    for team in teams:
+        team_name = f"Équipe {team.team_id + 1}"
+        team_data[team_name] = {}
+        for subteam_id, subteam in enumerate(team.subteams):
+            team_data[team_name][subteam_id + 1] = [
+                {
+                    "prénom": player.prénom,
+                    "poste": player.poste,
+                    "niveau": player.niveau,
+                }
+                for player in subteam
+            ]
+    return team_data
+
+
+def teams_from_data(team_data: dict) -> list:
+    """
+    Inverse de teams_to_data : reconstruit les équipes, dans l'ordre du
+    dictionnaire, à partir de {nom d'équipe: {n° de sous-équipe: [joueurs]}}.
+    """
+    num_subteams = max((len(subteams) for subteams in team_data.values()), default=0)
+    teams = []
+    for team_id, subteams in enumerate(team_data.values()):
+        team = Team(team_id, num_subteams)
+        for subteam_index, players in enumerate(subteams.values()):
+            for player in players:
+                team.add_player_to_subteam(
+                    Player(player["prénom"], player["poste"], player["niveau"]),
+                    subteam_index,
+                )
+        teams.append(team)
+    return teams
@@ -0,0 +1,47 @@
+# test_alternatives.py
+import random
+import numpy as np
+from alternatives import TopK, canonical_signature, co_membership_distance
+from distribution import solve
+from player import Player
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+
+
+def test_distance_ignores_numbering():
+    a = np.array([0, 0, 1, 1, 2, 2, 3, 3])
+    # Équipes et sous-équipes renumérotées
+    b = np.array([3, 3, 2, 2, 1, 1, 0, 0])
+    assert co_membership_distance(a, b, 4, 2) == 0
+    assert canonical_signature(a, 2) == canonical_signature(b, 2)
+
+
+def test_distance_sees_team_grouping():
+    # Sous-équipes d'une joueuse : seules les équipes les distinguent
+    a = np.array([0, 1, 2, 3])
+    b = np.array([0, 2, 1, 3])
+    assert co_membership_distance(a, b, 4, 1) == 0
+    assert co_membership_distance(a, b, 4, 2) > 0
+
+
+def test_top_k_keeps_distinct_best():
+    top_k = TopK(2, 4, 2, min_diversity=0.1)
+    assert top_k.offer([0, 0, 1, 1, 2, 2, 3, 3], 10.0)
+    # Même répartition renumérotée : ignorée
+    assert not top_k.offer([2, 2, 3, 3, 0, 0, 1, 1], 5.0)
+    assert top_k.offer([0, 1, 0, 1, 2, 3, 2, 3], 20.0)
+    assert top_k.offer([0, 2, 1, 3, 0, 2, 1, 3], 15.0)
+    scores = [score for _, score in top_k.entries()]
+    assert scores == [10.0, 15.0]
+    assignments = [assignment for assignment, _ in top_k.entries()]
+    assert co_membership_distance(*assignments, 4, 2) >= 0.1
+
+
+def test_one_player_subteams_yield_several_alternatives():
+    rng = random.Random(2)
+    players = [
+        Player(f"Joueuse {index}", rng.choice(POSTES), rng.randint(1, 4))
+        for index in range(25)
+    ]
+    solution = solve(players, 5, 5, seed=1, cache=None, alternatives=5)
+    assert len(solution.alternatives) > 1
@@ -0,0 +1,63 @@
+# test_api.py
+import asyncio
+import json
+import pytest
+from api import MAX_TIME_BUDGET_MS, RequestError, TeamService
+
+PLAYERS = [
+    {"prénom": f"Joueuse {index}", "poste": "Att", "niveau": 1 + index % 4}
+    for index in range(8)
+]
+
+
+@pytest.fixture
+def service():
+    service = TeamService(workers=1)
+    yield service
+    service.executor.shutdown()
+
+
+def dispatch(service: TeamService, path: str, payload: dict):
+    body = json.dumps(payload).encode("utf-8")
+    return asyncio.run(service.dispatch("POST", path, body))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"seed": -1},
+        {"seed": True},
+        {"seed": 1.5},
+        {"num_teams": "3"},
+        {"num_teams": 0},
+        {"num_teams": 3, "num_subteams": 3},
+        {"time_budget_ms": MAX_TIME_BUDGET_MS + 1},
+        {"strategy": "inconnue"},
+    ],
+)
+def test_invalid_options_are_rejected(service, options):
+    with pytest.raises(RequestError) as error:
+        dispatch(service, "/teams", {"players": PLAYERS, **options})
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize(
+    "teams",
+    [
+        [],
+        {"Équipe 1": {"premier": []}},
+        {"Équipe 1": {"1": ["Alice"]}},
+        {"Équipe 1": {"1": [{"prénom": "Alice", "poste": "Att"}]}},
+    ],
+)
+def test_invalid_teams_are_rejected(service, teams):
+    with pytest.raises(RequestError, match="Format d'équipes invalide") as error:
+        dispatch(service, "/pdf", {"teams": teams})
+    assert error.value.status == 400
+
+
+def test_invalid_non_disponibles_are_rejected(service):
+    teams = {"Équipe 1": {"1": PLAYERS[:2]}}
+    with pytest.raises(RequestError) as error:
+        dispatch(service, "/pdf", {"teams": teams, "non_disponibles": ["Alice"]})
+    assert error.value.status == 400
@@ -0,0 +1,54 @@
+# test_cli.py
+import json
+import pandas as pd
+import pytest
+from cli import main
+
+
+@pytest.fixture
+def roster_path(tmp_path):
+    path = tmp_path / "joueurs.csv"
+    pd.DataFrame(
+        {
+            "prénom": [f"Joueuse {index}" for index in range(8)],
+            "poste": ["G", "Def", "Mill", "Att"] * 2,
+            "niveau": [1, 2, 3, 4] * 2,
+            "présence": ["X"] * 7 + [""],
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+def test_writes_teams_as_json(roster_path, tmp_path):
+    output_dir = tmp_path / "sorties"
+    status = main(
+        [roster_path, "--teams", "2", "--subteams", "2", "--seed", "0", "--json"]
+        + ["--output-dir", str(output_dir)]
+    )
+    assert status == 0
+    with open(output_dir / "joueurs.json", encoding="utf-8") as file:
+        result = json.load(file)
+    placed = [
+        player["prénom"]
+        for subteams in result["teams"].values()
+        for players in subteams.values()
+        for player in players
+    ]
+    assert sorted(placed) == [f"Joueuse {index}" for index in range(7)]
+    assert [player["prénom"] for player in result["non_disponibles"]] == [
+        "Joueuse 7"
+    ]
+
+
+def test_rejects_more_subteams_than_players(roster_path, capsys):
+    assert main([roster_path, "--teams", "4", "--subteams", "2"]) == 1
+    assert "4 x 2 sous-équipes pour 7 joueurs" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "arguments", [["--teams", "0"], ["--subteams", "x"], ["--strategy", "inconnue"]]
+)
+def test_rejects_invalid_arguments(roster_path, arguments):
+    with pytest.raises(SystemExit) as error:
+        main([roster_path] + arguments)
+    assert error.value.code == 2
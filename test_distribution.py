@@ -0,0 +1,80 @@
+# test_distribution.py
+import random
+import threading
+from distribution import STOP_DEADLINE, iter_solutions, repair_distribution, solve
+from player import Player
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+
+
+def random_players(num_players, seed):
+    rng = random.Random(seed)
+    return [
+        Player(f"Joueuse {index}", rng.choice(POSTES), rng.randint(1, 4))
+        for index in range(num_players)
+    ]
+
+
+def test_time_budget_bounds_exact_phase():
+    # 18 joueuses en 5x5 : la résolution exacte ne conclut pas en 50 ms, elle
+    # doit s'arrêter à l'échéance plutôt qu'à la limite de nœuds
+    players = random_players(18, seed=1)
+    solution = solve(
+        players, 5, 5, time_budget_ms=50, seed=0, cache=None, collect_stats=True
+    )
+
+    assert solution.strategy == "exact"
+    assert not solution.optimal
+    assert solution.stats.stop_reason == STOP_DEADLINE
+
+
+def test_free_repair_matches_fresh_solve():
+    # Sans coût de déplacement, réparer ne doit pas faire nettement moins bien
+    # que tout recalculer
+    for seed in range(10):
+        players = random_players(20, seed)
+        newcomer = Player("Nouvelle", "Def", 4)
+        teams = solve(players, 3, 2, seed=seed, cache=None).teams
+        repaired = repair_distribution(teams, added=[newcomer], move_cost=0, seed=seed)
+        fresh = solve(players + [newcomer], 3, 2, seed=seed, cache=None)
+
+        assert repaired.score <= fresh.score + 20
+
+
+def test_grid_larger_than_roster():
+    # 150 sous-équipes pour 20 joueuses : la résolution exacte dépasserait la pile
+    players = random_players(20, seed=1)
+    for strategy in ("auto", "exact"):
+        solution = solve(players, 30, 5, seed=1, cache=None, strategy=strategy)
+        placed = [
+            player for team in solution.teams for sub in team.subteams for player in sub
+        ]
+        assert sorted(player.prénom for player in placed) == sorted(
+            player.prénom for player in players
+        )
+
+
+def test_iter_solutions_streams_improvements_then_the_final_solution():
+    players = random_players(40, seed=3)
+    stop_event = threading.Event()
+    solutions = list(
+        iter_solutions(players, 4, 2, stop_event, seed=0, cache=None, strategy="local")
+    )
+    scores = [solution.score for solution in solutions]
+    assert scores == sorted(scores, reverse=True)
+    final = solve(players, 4, 2, seed=0, cache=None, strategy="local")
+    assert scores[-1] == final.score
+    # Une recherche menée à son terme laisse l'événement de l'appelant intact
+    assert not stop_event.is_set()
+
+
+def test_closing_iter_solutions_stops_the_search():
+    players = random_players(40, seed=4)
+    stop_event = threading.Event()
+    stream = iter_solutions(
+        players, 4, 2, stop_event, seed=0, cache=None, strategy="annealing"
+    )
+    first = next(stream)
+    stream.close()
+    assert stop_event.is_set()
+    assert first.teams
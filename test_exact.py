@@ -0,0 +1,161 @@
+# test_exact.py
+import random
+from collections import Counter
+import numpy as np
+import pytest
+from distribution import calculate_optimal_distribution, plan_slots, solve
+from player import Player
+from roster import Roster
+from scoring import BalanceWeights, score_assignments, score_lower_bound
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+NUM_TEAMS, NUM_SUBTEAMS = 2, 2
+
+
+def random_players(num_players: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        Player(f"Joueuse {index}", rng.choice(POSTES), rng.randint(1, 4))
+        for index in range(num_players)
+    ]
+
+
+def arrangements(counts: Counter, length: int):
+    """Toutes les suites distinctes de `length` sous-équipes d'effectifs `counts`."""
+    if not length:
+        yield []
+        return
+    for slot in list(counts):
+        if counts[slot]:
+            counts[slot] -= 1
+            for rest in arrangements(counts, length - 1):
+                yield [slot] + rest
+            counts[slot] += 1
+
+
+def slot_sizes(num_players: int):
+    plan = calculate_optimal_distribution(num_players, NUM_TEAMS, NUM_SUBTEAMS)
+    return [size for subteam_sizes in plan for size in subteam_sizes]
+
+
+def brute_force_scores(players, weights=None):
+    """
+    Scores de toutes les répartitions du plan de sous-équipes, et indicateur
+    de celles où chaque équipe reçoit floor ou ceil de chaque poste
+    (l'espace parcouru par la résolution exacte).
+    """
+    plan = calculate_optimal_distribution(len(players), NUM_TEAMS, NUM_SUBTEAMS)
+    slots = plan_slots(plan, NUM_SUBTEAMS, len(players))
+    assignments = np.array(list(arrangements(Counter(slots.tolist()), len(players))))
+    roster = Roster(players)
+    caps = weights.caps_for(roster.poste_labels) if weights is not None else None
+    scores = score_assignments(
+        assignments,
+        roster.levels,
+        NUM_TEAMS,
+        NUM_SUBTEAMS,
+        roster.poste_codes,
+        weights,
+        caps,
+    )
+
+    balanced = np.ones(len(assignments), dtype=bool)
+    teams = assignments // NUM_SUBTEAMS
+    for poste in set(player.poste for player in players):
+        members = [player.poste == poste for player in players]
+        total = sum(members)
+        for team_id in range(NUM_TEAMS):
+            count = (teams[:, members] == team_id).sum(axis=1)
+            balanced &= (count >= total // NUM_TEAMS) & (
+                count <= -(-total // NUM_TEAMS)
+            )
+    return scores, balanced
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_exact_solution_is_brute_force_optimum(seed):
+    players = random_players(9, seed)
+    solution = solve(
+        players, NUM_TEAMS, NUM_SUBTEAMS, strategy="exact", seed=seed, cache=None
+    )
+    scores, balanced = brute_force_scores(players)
+    assert solution.optimal
+    assert solution.score == pytest.approx(scores[balanced].min())
+
+
+@pytest.mark.parametrize("strategy", ["random", "local", "annealing", "tabu"])
+@pytest.mark.parametrize("seed", range(4))
+def test_heuristics_claim_optimality_only_at_the_optimum(strategy, seed):
+    players = random_players(9, seed)
+    solution = solve(
+        players,
+        NUM_TEAMS,
+        NUM_SUBTEAMS,
+        strategy=strategy,
+        time_budget_ms=20,
+        seed=seed,
+        cache=None,
+    )
+    scores, balanced = brute_force_scores(players)
+    assert solution.score >= scores[balanced].min() - 1e-9
+    if solution.optimal:
+        assert solution.score == pytest.approx(scores.min())
+
+
+@pytest.mark.parametrize("strategy", ["random", "local", "annealing", "tabu"])
+def test_heuristics_reaching_the_bound_are_optimal(strategy):
+    players = [Player(f"Joueuse {index}", POSTES[index % 3], 2) for index in range(9)]
+    solution = solve(
+        players,
+        NUM_TEAMS,
+        NUM_SUBTEAMS,
+        strategy=strategy,
+        time_budget_ms=20,
+        seed=0,
+        cache=None,
+    )
+    scores, _ = brute_force_scores(players)
+    assert solution.optimal
+    assert solution.score == pytest.approx(scores.min())
+
+
+@pytest.mark.parametrize("num_players", [8, 9])
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize(
+    "weights", [None, BalanceWeights(cap_weight=100, spread_weight=20)]
+)
+def test_lower_bound_never_exceeds_brute_force_optimum(num_players, seed, weights):
+    players = random_players(num_players, seed)
+    roster = Roster(players)
+    bound = score_lower_bound(
+        roster.levels,
+        slot_sizes(num_players),
+        NUM_TEAMS,
+        NUM_SUBTEAMS,
+        roster.poste_codes,
+        weights,
+        roster.poste_labels,
+    )
+    scores, _ = brute_force_scores(players, weights)
+    assert bound <= scores.min() + 1e-9
+
+
+def test_lower_bound_counts_unavoidable_cap_excess():
+    # Six gardiennes pour quatre sous-équipes limitées à une : deux en trop
+    players = [
+        Player(f"Joueuse {index}", "G" if index < 6 else "Att", 2) for index in range(8)
+    ]
+    weights = BalanceWeights(cap_weight=100, spread_weight=20)
+    roster = Roster(players)
+    bound = score_lower_bound(
+        roster.levels,
+        slot_sizes(8),
+        NUM_TEAMS,
+        NUM_SUBTEAMS,
+        roster.poste_codes,
+        weights,
+        roster.poste_labels,
+    )
+    scores, _ = brute_force_scores(players, weights)
+    assert bound == pytest.approx(200)
+    assert bound == pytest.approx(scores.min())
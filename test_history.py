@@ -0,0 +1,74 @@
+# test_history.py
+import datetime
+import pytest
+from history import HISTORY_PATH_ENV, HistoryStore, history_path
+
+
+def lineup(*subteams):
+    """Une équipe dont chaque sous-équipe est une liste de prénoms."""
+    return {
+        "Équipe 1": {
+            index + 1: [{"prénom": name, "poste": "Att", "niveau": 2} for name in names]
+            for index, names in enumerate(subteams)
+        }
+    }
+
+
+def last_played(store: HistoryStore, a: str, b: str):
+    row = store.connection.execute(
+        "SELECT last_played FROM pairs WHERE player_a = ? AND player_b = ?", (a, b)
+    ).fetchone()
+    return row[0] if row else None
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / "historique.sqlite3")) as store:
+        yield store
+
+
+def test_record_counts_pairs_of_each_subteam(store):
+    store.record(lineup(["Alice", "Bea"], ["Chloé"]), datetime.date(2024, 9, 1))
+    store.record(lineup(["Alice", "Bea", "Chloé"]), datetime.date(2024, 9, 8))
+    matrix = store.co_occurrence(["Alice", "Bea", "Chloé", "Inconnue"])
+    assert matrix.tolist() == [
+        [0, 2, 1, 0],
+        [2, 0, 1, 0],
+        [1, 1, 0, 0],
+        [0, 0, 0, 0],
+    ]
+    assert last_played(store, "Alice", "Bea") == "2024-09-08"
+    assert [played_on for _, played_on in store.sessions("Chloé")] == [
+        "2024-09-08",
+        "2024-09-01",
+    ]
+
+
+def test_delete_updates_counts_and_last_played(store):
+    first = store.record(lineup(["Alice", "Bea"]), datetime.date(2024, 9, 1))
+    last = store.record(lineup(["Alice", "Bea"], ["Chloé"]), datetime.date(2024, 9, 8))
+    store.record(lineup(["Bea", "Chloé"]), datetime.date(2024, 9, 15))
+
+    store.delete(last)
+    assert store.co_occurrence(["Alice", "Bea"])[0, 1] == 1
+    assert last_played(store, "Alice", "Bea") == "2024-09-01"
+    assert last_played(store, "Bea", "Chloé") == "2024-09-15"
+
+    store.delete(first)
+    assert last_played(store, "Alice", "Bea") is None
+    assert [session_id for session_id, _ in store.sessions()] == [3]
+
+
+def test_pair_penalties_scale_with_sessions(store):
+    store.record(lineup(["Alice", "Bea"]))
+    store.record(lineup(["Alice", "Bea"]))
+    penalties = store.pair_penalties(["Bea", "Alice", "Bea"], weight=3)
+    assert penalties.names == ["Bea", "Alice"]
+    assert penalties.matrix.tolist() == [[0, 6], [6, 0]]
+
+
+def test_history_path_follows_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv(HISTORY_PATH_ENV, str(tmp_path / "autre.sqlite3"))
+    assert history_path() == str(tmp_path / "autre.sqlite3")
+    monkeypatch.delenv(HISTORY_PATH_ENV)
+    assert history_path().endswith("historique.sqlite3")
@@ -0,0 +1,63 @@
+# test_ingestion.py
+import io
+import pandas as pd
+import pytest
+from ingestion import load_players, normalize_roster, read_roster_bytes
+
+
+def roster_frame(**overrides) -> pd.DataFrame:
+    columns = {
+        " Prénom ": ["Alice", " Bea ", "", "Chloé"],
+        "POSTE": ["G", "Def ", "Att", "Mill"],
+        "Niveau": [3, "2", 1, 4.0],
+        "Présence": ["X", "x", "X", ""],
+        "Remarque": ["", "", "", "blessée"],
+    }
+    columns.update(overrides)
+    return pd.DataFrame(columns)
+
+
+def test_normalize_roster_cleans_columns_and_values():
+    df = normalize_roster(roster_frame())
+    assert list(df.columns) == ["prénom", "poste", "niveau", "présence"]
+    # La ligne sans prénom est ignorée
+    assert df["prénom"].tolist() == ["Alice", "Bea", "Chloé"]
+    assert df["poste"].tolist() == ["G", "Def", "Mill"]
+    assert df["niveau"].tolist() == [3, 2, 4]
+    assert df["niveau"].dtype.kind == "i"
+    assert df["présence"].tolist() == [True, True, False]
+
+
+def test_normalize_roster_reports_missing_columns():
+    with pytest.raises(ValueError, match="présence"):
+        normalize_roster(roster_frame().drop(columns="Présence"))
+
+
+def test_normalize_roster_reports_invalid_levels_by_spreadsheet_row():
+    with pytest.raises(ValueError, match="lignes : 3"):
+        normalize_roster(roster_frame(Niveau=[3, "fort", 1, 4]))
+
+
+@pytest.mark.parametrize("filename", ["joueurs.csv", "joueurs.xlsx"])
+def test_load_players_splits_available_players(filename):
+    buffer = io.BytesIO()
+    if filename.endswith(".csv"):
+        roster_frame().to_csv(buffer, index=False)
+    else:
+        roster_frame().to_excel(buffer, index=False)
+    buffer.seek(0)
+    players, non_disponibles = load_players(buffer, filename)
+    assert [(p.prénom, p.poste, p.niveau) for p in players] == [
+        ("Alice", "G", 3),
+        ("Bea", "Def", 2),
+    ]
+    assert non_disponibles == [{"prénom": "Chloé", "poste": "Mill", "niveau": 4}]
+
+
+def test_read_roster_bytes_returns_independent_copies():
+    buffer = io.BytesIO()
+    roster_frame().to_csv(buffer, index=False)
+    first = read_roster_bytes(buffer.getvalue(), "joueurs.csv")
+    first.loc[0, "prénom"] = "Modifiée"
+    second = read_roster_bytes(buffer.getvalue(), "joueurs.csv")
+    assert second.loc[0, "prénom"] == "Alice"
@@ -0,0 +1,22 @@
+# test_pdf_generator.py
+from pdf_generator import create_pdf
+
+TEAMS = {
+    "Équipe 1": {1: [{"prénom": "Alice", "poste": "G", "niveau": 3}]},
+    "Équipe 2": {1: [{"prénom": "Bea", "poste": "Def", "niveau": 2}]},
+}
+
+
+def test_long_non_disponibles_list_spans_pages():
+    non_disponibles = [
+        {"prénom": f"Joueuse {index}", "poste": "Att", "niveau": 1}
+        for index in range(2000)
+    ]
+    pdf_bytes = create_pdf(TEAMS, non_disponibles, use_cache=False)
+    assert pdf_bytes.startswith(b"%PDF")
+    assert pdf_bytes.count(b"/Type /Page\n") > 10
+
+
+def test_names_are_escaped():
+    non_disponibles = [{"prénom": "Zoé & <Léa>", "poste": "Att", "niveau": 1}]
+    assert create_pdf(TEAMS, non_disponibles, use_cache=False).startswith(b"%PDF")
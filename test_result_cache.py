@@ -0,0 +1,50 @@
+# test_result_cache.py
+import random
+from distribution import STOP_CACHED, solve
+from player import Player
+from result_cache import ResultCache, roster_hash, teams_to_entry
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+
+
+def random_players(num_players: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        Player(f"Joueuse {index}", rng.choice(POSTES), rng.randint(1, 4))
+        for index in range(num_players)
+    ]
+
+
+def test_roster_hash_ignores_player_order():
+    players = random_players(12, seed=0)
+    assert roster_hash(players, seed=1) == roster_hash(players[::-1], seed=1)
+    assert roster_hash(players, seed=1) != roster_hash(players, seed=2)
+
+
+def test_seeded_runs_are_reproducible():
+    players = random_players(30, seed=1)
+    first = solve(players, 3, 2, strategy="local", seed=7, cache=None)
+    second = solve(players, 3, 2, strategy="local", seed=7, cache=None)
+    assert teams_to_entry(first.teams) == teams_to_entry(second.teams)
+    assert first.score == second.score
+
+
+def test_disk_cache_round_trip(tmp_path):
+    players = random_players(30, seed=2)
+    options = dict(strategy="local", seed=3, alternatives=3)
+    solution = solve(players, 3, 2, cache=ResultCache(directory=tmp_path), **options)
+
+    # Un nouveau cache sur le même dossier relit l'entrée écrite sur disque
+    cache = ResultCache(directory=tmp_path)
+    cached = solve(players, 3, 2, cache=cache, collect_stats=True, **options)
+    assert cached.stats.stop_reason == STOP_CACHED
+    assert teams_to_entry(cached.teams) == teams_to_entry(solution.teams)
+    assert cached.score == solution.score
+    assert cached.optimal == solution.optimal
+    assert cached.lower_bound == solution.lower_bound
+    assert [score for _, score in cached.alternatives] == [
+        score for _, score in solution.alternatives
+    ]
+    assert [teams_to_entry(teams) for teams, _ in cached.alternatives] == [
+        teams_to_entry(teams) for teams, _ in solution.alternatives
+    ]
@@ -0,0 +1,78 @@
+# test_scoring.py
+import random
+import numpy as np
+import pytest
+from distribution import calculate_level_penalty, evaluate_distribution
+from player import Player
+from roster import Roster
+from scoring import (
+    BalanceWeights,
+    PairPenalties,
+    batch_level_penalty,
+    level_penalty,
+    score_assignments,
+)
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+
+
+def random_roster(num_players: int, seed: int) -> Roster:
+    rng = random.Random(seed)
+    return Roster(
+        [
+            Player(f"Joueuse {index}", rng.choice(POSTES), rng.randint(1, 4))
+            for index in range(num_players)
+        ]
+    )
+
+
+def random_assignments(num_players: int, num_slots: int, batch_size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, num_slots, size=(batch_size, num_players))
+
+
+@pytest.mark.parametrize("num_teams, num_subteams", [(2, 2), (3, 2), (4, 3)])
+def test_batch_score_matches_evaluate_distribution(num_teams, num_subteams):
+    roster = random_roster(23, seed=num_teams)
+    assignments = random_assignments(
+        len(roster), num_teams * num_subteams, 16, seed=num_subteams
+    )
+    scores = score_assignments(assignments, roster.levels, num_teams, num_subteams)
+    for assignment, score in zip(assignments, scores):
+        teams = roster.build_teams(assignment, num_teams, num_subteams)
+        assert score == pytest.approx(evaluate_distribution(teams, num_subteams))
+
+
+def test_position_criteria_match_evaluate_distribution():
+    roster = random_roster(23, seed=5)
+    weights = BalanceWeights(cap_weight=100, spread_weight=20)
+    caps = weights.caps_for(roster.poste_labels)
+    assignments = random_assignments(len(roster), 6, 16, seed=5)
+    scores = score_assignments(
+        assignments, roster.levels, 3, 2, roster.poste_codes, weights, caps
+    )
+    for assignment, score in zip(assignments, scores):
+        teams = roster.build_teams(assignment, 3, 2)
+        assert score == pytest.approx(evaluate_distribution(teams, 2, weights))
+
+
+def test_rotation_penalties_match_evaluate_distribution():
+    roster = random_roster(12, seed=6)
+    names = [player.prénom for player in roster.players]
+    upper = np.triu(np.random.default_rng(6).integers(0, 3, (12, 12)), 1) * 5.0
+    penalties = PairPenalties(names[::-1], (upper + upper.T)[::-1, ::-1])
+    pairs = penalties.pairs(names)
+    assignments = random_assignments(len(roster), 4, 16, seed=6)
+    scores = score_assignments(assignments, roster.levels, 2, 2, pairs=pairs)
+    for assignment, score in zip(assignments, scores):
+        teams = roster.build_teams(assignment, 2, 2)
+        expected = evaluate_distribution(teams, 2, pair_penalties=penalties)
+        assert score == pytest.approx(expected)
+
+
+def test_deviation_equal_to_threshold_is_scored_alike():
+    # Moyenne 2.5 : écart maximal exactement égal au seuil, aux arrondis près
+    values = [total / 5 for total in (11, 13, 14, 10, 15, 11, 13, 13)]
+    expected = calculate_level_penalty(values)
+    assert level_penalty(values) == pytest.approx(expected)
+    assert batch_level_penalty(np.array([values]))[0] == pytest.approx(expected)
@@ -0,0 +1,84 @@
+# test_search.py
+import random
+import numpy as np
+import pytest
+from scoring import BalanceWeights, matrix_pairs, score_assignments
+from search import SwapState, local_search
+
+POSTES = ["G", "Def", "Mill", "Ailier", "Att"]
+NUM_TEAMS, NUM_SUBTEAMS = 3, 2
+
+
+def random_state(seed: int, **options) -> SwapState:
+    rng = random.Random(seed)
+    levels = [rng.randint(1, 4) for _ in range(20)]
+    postes = [rng.choice(POSTES) for _ in range(20)]
+    assignment = [index % (NUM_TEAMS * NUM_SUBTEAMS) for index in range(20)]
+    rng.shuffle(assignment)
+    return SwapState(assignment, levels, postes, NUM_TEAMS, NUM_SUBTEAMS, **options)
+
+
+WEIGHTS = BalanceWeights(cap_weight=100, spread_weight=20)
+
+
+def pair_matrix(seed: int) -> np.ndarray:
+    """Pénalités de rotation aléatoires, symétriques, entre 20 joueurs."""
+    upper = np.triu(np.random.default_rng(seed).integers(0, 3, (20, 20)), 1) * 5.0
+    return upper + upper.T
+
+
+def full_score(state: SwapState, assignment) -> float:
+    weights = state.weights
+    caps = state.caps if weights is not None else None
+    pairs = matrix_pairs(state.pair_matrix) if state.pair_matrix is not None else None
+    return float(
+        score_assignments(
+            np.array(assignment),
+            state.levels,
+            NUM_TEAMS,
+            NUM_SUBTEAMS,
+            np.array(state.postes),
+            weights,
+            caps,
+            pairs,
+        )[0]
+    )
+
+
+def check_swap_scores(state: SwapState, seed: int):
+    rng = random.Random(seed)
+    assert state.score == pytest.approx(full_score(state, state.assignment))
+    for _ in range(200):
+        move = state.random_swap(rng)
+        if move is None:
+            continue
+        i, j = move
+        swapped = list(state.assignment)
+        swapped[i], swapped[j] = swapped[j], swapped[i]
+        assert state.swap_score(i, j) == pytest.approx(full_score(state, swapped))
+        state.apply_swap(i, j)
+        assert state.score == pytest.approx(full_score(state, state.assignment))
+
+
+@pytest.mark.parametrize("weights", [None, WEIGHTS])
+@pytest.mark.parametrize("seed", range(5))
+def test_swap_scores_match_full_evaluation(seed, weights):
+    state = random_state(seed, weights=weights)
+    check_swap_scores(state, seed)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_swap_scores_include_rotation_penalties(seed):
+    state = random_state(seed, weights=WEIGHTS, pair_matrix=pair_matrix(seed))
+    check_swap_scores(state, seed)
+
+
+def test_local_search_keeps_subteam_positions():
+    state = random_state(0)
+    compositions = sorted(zip(state.assignment, state.postes))
+    initial_score = state.score
+    local_search(state, random.Random(0))
+    assert state.score < initial_score
+    assert state.score == pytest.approx(full_score(state, state.assignment))
+    # Seuls des joueurs de même poste sont échangés
+    assert sorted(zip(state.assignment, state.postes)) == compositions
@@ -0,0 +1,58 @@
+# test_stats.py
+import random
+import pytest
+from distribution import evaluate_distribution
+from stats import TeamStats
+from team import teams_from_data
+
+
+def random_team_data(seed: int) -> dict:
+    rng = random.Random(seed)
+    return {
+        f"Équipe {team}": {
+            subteam: [
+                {
+                    "prénom": f"Joueuse {team}.{subteam}.{index}",
+                    "poste": "Att",
+                    "niveau": rng.randint(1, 4),
+                }
+                for index in range(rng.randint(1, 4))
+            ]
+            for subteam in (1, 2)
+        }
+        for team in (1, 2, 3)
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_moves_keep_stats_in_sync_with_full_evaluation(seed):
+    team_data = random_team_data(seed)
+    stats = TeamStats(team_data)
+    rng = random.Random(seed)
+    keys = [(team, subteam) for team in team_data for subteam in (1, 2)]
+    for _ in range(30):
+        source, target = rng.sample(keys, 2)
+        players = team_data[source[0]][source[1]]
+        if not players:
+            continue
+        player = players.pop(rng.randrange(len(players)))
+        team_data[target[0]][target[1]].append(player)
+        stats.move(player["niveau"], source, target)
+
+        assert stats.score() == pytest.approx(
+            evaluate_distribution(teams_from_data(team_data), 2)
+        )
+        for team_name, subteams in team_data.items():
+            members = [player for players in subteams.values() for player in players]
+            assert stats.team(team_name)["sum"] == sum(p["niveau"] for p in members)
+            assert stats.team(team_name)["total_players"] == len(members)
+
+
+def test_unavailable_players_are_ignored():
+    team_data = random_team_data(0)
+    stats = TeamStats(team_data)
+    score = stats.score()
+    player = team_data["Équipe 1"][1][0]
+    stats.move(player["niveau"], None, ("Équipe 2", 1))
+    stats.move(player["niveau"], ("Équipe 2", 1), None)
+    assert stats.score() == pytest.approx(score)